@@ -0,0 +1,156 @@
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+
+class TokenCache:
+    """Bounded in-process LRU of authenticated tokens, or a shared cache in its place
+    
+    Entries are stored pickled, so every request gets its own Token/User
+    instances and views can never mutate a cached copy.
+    
+    Invalidation only reaches the LRU of the process that handles it, so
+    without a shared tier a revoked token stays valid in other worker
+    processes for up to ``ttl`` seconds. With one, the LRU is skipped and
+    every process reads the shared entry, which invalidation deletes.
+    """
+    
+    def __init__(self, max_size=10000, ttl=60, shared_alias=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(
+            ('local_hits', 'shared_hits', 'misses', 'evictions', 'invalidations'), 0
+        )
+    
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+    
+    def shared_key(self, key):
+        # Never use raw tokens as cache keys
+        return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+    
+    def get(self, key):
+        if self.shared is not None:
+            payload = self.shared.get(self.shared_key(key))
+            tier = 'shared_hits'
+        else:
+            payload = None
+            tier = 'local_hits'
+            now = time.monotonic()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if entry[2] > now:
+                        self._entries.move_to_end(key)
+                        payload = entry[0]
+                    else:
+                        self._discard(key)
+        
+        with self._lock:
+            self._stats[tier if payload is not None else 'misses'] += 1
+        return pickle.loads(payload) if payload is not None else None
+    
+    def set(self, key, token):
+        payload = pickle.dumps(token, pickle.HIGHEST_PROTOCOL)
+        if self.shared is not None:
+            self.shared.set(self.shared_key(key), payload, self.ttl)
+        else:
+            self._store(key, payload, token.user_id)
+    
+    def _store(self, key, payload, user_id):
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (payload, user_id, time.monotonic() + self.ttl)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+    
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[1])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry[1]]
+    
+    def invalidate(self, key):
+        with self._lock:
+            self._discard(key)
+            self._stats['invalidations'] += 1
+        if self.shared is not None:
+            self.shared.delete(self.shared_key(key))
+    
+    def invalidate_user(self, user_id):
+        with self._lock:
+            keys = set(self._keys_by_user.get(user_id, ()))
+        if self.shared is not None:
+            # Other processes may hold tokens this one never saw
+            keys.update(Token.objects.filter(user_id=user_id).values_list('key', flat=True))
+        for key in keys:
+            self.invalidate(key)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'size': len(self._entries)}
+
+
+_token_cache = None
+
+
+def get_token_cache():
+    global _token_cache
+    if _token_cache is None:
+        options = settings.TOKEN_AUTH_CACHE
+        _token_cache = TokenCache(
+            max_size=options['MAX_SIZE'],
+            ttl=options['TTL'],
+            shared_alias=options.get('SHARED_CACHE_ALIAS'),
+        )
+    return _token_cache
+
+
+@receiver(setting_changed)
+def reset_token_cache(setting, **kwargs):
+    global _token_cache
+    if setting == 'TOKEN_AUTH_CACHE':
+        _token_cache = None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the token lookup for recently seen tokens"""
+    
+    def authenticate_credentials(self, key):
+        token_cache = get_token_cache()
+        token = token_cache.get(key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, token)
+            return user, token
+        
+        if not token.user.is_active:
+            token_cache.invalidate(key)
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return token.user, token
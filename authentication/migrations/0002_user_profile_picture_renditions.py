@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
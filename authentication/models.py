@@ -13,6 +13,8 @@ class User(AbstractUser):
         blank=True, 
         null=True
     )
+    # Built in the background by blog_api.images
+    profile_picture_renditions = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
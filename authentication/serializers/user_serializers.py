@@ -2,6 +2,9 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.password_validation import validate_password
 
+from blog_api.compiled_serializers import CompiledSerializer
+from blog_api.images import RenditionsField
+
 User = get_user_model()
 
 
@@ -69,12 +72,14 @@ class UserLoginSerializer(serializers.Serializer):
 
 class UserProfileSerializer(serializers.ModelSerializer):
     """Serializer for user profile"""
+    profile_picture_renditions = RenditionsField('profile_picture')
     
     class Meta:
         model = User
         fields = (
             'id', 'username', 'email', 'first_name', 'last_name',
-            'bio', 'profile_picture', 'created_at', 'updated_at'
+            'bio', 'profile_picture', 'profile_picture_renditions',
+            'created_at', 'updated_at'
         )
         read_only_fields = ('id', 'created_at', 'updated_at')
 
@@ -96,3 +101,8 @@ class UserUpdateSerializer(serializers.ModelSerializer):
                 "A user with that username already exists."
             )
         return value
+
+
+class CompiledUserProfileSerializer(CompiledSerializer):
+    """Compiled ``UserProfileSerializer``"""
+    serializer_class = UserProfileSerializer
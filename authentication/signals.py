@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from authentication.backends import get_token_cache
+from blog_api.images import renditions_ready, sync_renditions
+
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Logout deletes the token; forget it straight away"""
+    get_token_cache().invalidate(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, update_fields=None, **kwargs):
+    """Deactivation and profile edits must not be served from a cached user"""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    get_token_cache().invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def process_profile_picture(sender, instance, **kwargs):
+    sync_renditions(instance, 'profile_picture', 'profile_picture_renditions')
+
+
+@receiver(renditions_ready, sender=User)
+def invalidate_user_renditions(sender, instance_pk, **kwargs):
+    """Renditions are stored with an UPDATE, which sends no post_save"""
+    get_token_cache().invalidate_user(instance_pk)
@@ -1,3 +1,177 @@
-from django.test import TestCase
+import tempfile
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from authentication.backends import TokenCache, get_token_cache
+
+
+User = get_user_model()
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Tests for the cached token authentication backend"""
+    
+    def setUp(self):
+        get_token_cache().clear()
+        self.user = User.objects.create_user(
+            username='reader',
+            email='reader@example.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='User'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('authentication:profile')
+    
+    def test_repeated_requests_skip_the_token_lookup(self):
+        before = get_token_cache().stats()
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['email'], 'reader@example.com')
+        after = get_token_cache().stats()
+        self.assertEqual(after['local_hits'] - before['local_hits'], 1)
+        self.assertEqual(after['misses'] - before['misses'], 1)
+    
+    def test_counters_are_exported_to_metrics(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        stats = get_token_cache().stats()
+        metrics = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn(f'blog_token_cache_hits_total{{tier="local"}} {stats["local_hits"]}\n', metrics)
+        self.assertIn(f'blog_token_cache_misses_total {stats["misses"]}\n', metrics)
+    
+    def test_logout_invalidates_immediately(self):
+        self.client.get(self.url)
+        self.client.post(reverse('authentication:logout'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+    
+    def test_deactivation_invalidates_immediately(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+    
+    def test_profile_updates_are_not_served_stale(self):
+        self.client.get(self.url)
+        self.client.patch(self.url, {'first_name': 'Renamed'})
+        self.assertEqual(self.client.get(self.url).data['first_name'], 'Renamed')
+    
+    def test_invalid_token_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token nope')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+    
+    @override_settings(TOKEN_AUTH_CACHE={'MAX_SIZE': 10, 'TTL': 60, 'SHARED_CACHE_ALIAS': 'default'})
+    def test_shared_tier_serves_other_processes(self):
+        cache.clear()
+        self.client.get(self.url)
+        other_process = TokenCache(shared_alias='default')
+        token = other_process.get(self.token.key)
+        self.assertEqual(token.user.email, 'reader@example.com')
+        self.assertEqual(other_process.stats()['shared_hits'], 1)
+        
+        key = self.token.key
+        self.token.delete()
+        self.assertIsNone(TokenCache(shared_alias='default').get(key))
+        # Including the process that had already seen it
+        self.assertIsNone(other_process.get(key))
+    
+    @override_settings(TOKEN_AUTH_CACHE={'MAX_SIZE': 10, 'TTL': 60, 'SHARED_CACHE_ALIAS': 'default'})
+    def test_logout_invalidates_every_process(self):
+        cache.clear()
+        self.client.get(self.url)
+        other_process = TokenCache(shared_alias='default')
+        self.assertIsNotNone(other_process.get(self.token.key))
+        self.client.post(reverse('authentication:logout'))
+        self.assertIsNone(other_process.get(self.token.key))
+
+
+class TokenCacheTests(TestCase):
+    """Unit tests for the token LRU"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='reader',
+            email='reader@example.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='User'
+        )
+    
+    def make_token(self, key):
+        return Token(key=key, user=self.user)
+    
+    def test_is_bounded(self):
+        token_cache = TokenCache(max_size=2)
+        for key in ('a', 'b', 'c'):
+            token_cache.set(key, self.make_token(key))
+        self.assertIsNone(token_cache.get('a'))
+        self.assertIsNotNone(token_cache.get('c'))
+        self.assertEqual(token_cache.stats()['evictions'], 1)
+    
+    def test_entries_expire(self):
+        token_cache = TokenCache(ttl=30)
+        with mock.patch('authentication.backends.time.monotonic', return_value=100):
+            token_cache.set('a', self.make_token('a'))
+        with mock.patch('authentication.backends.time.monotonic', return_value=129):
+            self.assertIsNotNone(token_cache.get('a'))
+        with mock.patch('authentication.backends.time.monotonic', return_value=131):
+            self.assertIsNone(token_cache.get('a'))
+    
+    def test_hits_return_independent_copies(self):
+        token_cache = TokenCache()
+        token_cache.set('a', self.make_token('a'))
+        token_cache.get('a').user.first_name = 'Mutated'
+        self.assertEqual(token_cache.get('a').user.first_name, 'Test')
+
+
+@override_settings(IMAGE_PIPELINE={
+    'ENABLED': True,
+    'EAGER': True,
+    'WORKERS': 1,
+    'FORMATS': ['webp'],
+    'QUALITY': 80,
+    'SIZES': {'thumbnail': {'size': (16, 16), 'crop': True}},
+})
+class ProfilePictureTests(TestCase):
+    """Tests for profile picture renditions"""
+    
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create_user(
+            username='reader',
+            email='reader@example.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='User'
+        )
+        self.client = APIClient()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    
+    def test_profile_exposes_thumbnail(self):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30), 'blue').save(buffer, 'PNG')
+        picture = SimpleUploadedFile('me.png', buffer.getvalue(), content_type='image/png')
+        url = reverse('authentication:profile')
+        self.client.patch(url, {'profile_picture': picture}, format='multipart')
+        
+        renditions = self.client.get(url).data['profile_picture_renditions']
+        self.assertEqual(renditions['thumbnail']['width'], 16)
+        self.assertTrue(renditions['thumbnail']['webp'].endswith('.webp'))
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import login, logout
+from blog_api.uploads import StreamingImageUploadMixin
 from authentication.serializers.user_serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
@@ -11,7 +12,7 @@ from authentication.serializers.user_serializers import (
 )
 
 
-class UserRegistrationView(generics.CreateAPIView):
+class UserRegistrationView(StreamingImageUploadMixin, generics.CreateAPIView):
     """View for user registration"""
     serializer_class = UserRegistrationSerializer
     permission_classes = [AllowAny]
@@ -73,7 +74,7 @@ class UserLogoutView(generics.GenericAPIView):
         }, status=status.HTTP_200_OK)
 
 
-class UserProfileView(generics.RetrieveUpdateAPIView):
+class UserProfileView(StreamingImageUploadMixin, generics.RetrieveUpdateAPIView):
     """View for user profile"""
     permission_classes = [IsAuthenticated]
     
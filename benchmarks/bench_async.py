@@ -0,0 +1,161 @@
+"""
+Compare sync and async read endpoints under uvicorn at high concurrency.
+
+Seeds a throwaway SQLite database and serves it with uvicorn through
+``benchmarks.latency_asgi``, which adds ``--latency`` ms to every query to
+stand in for a networked database. It then hammers the sync and async
+variants of the feed, post detail and comment list with ``--concurrency``
+simultaneous clients for ``--duration`` seconds each::
+
+    python -m benchmarks.bench_async --concurrency 200 --latency 5
+
+Requires uvicorn (``pip install uvicorn``).
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.utils import setup_django
+
+
+def seed(posts):
+    from django.contrib.auth import get_user_model
+    from blog.models import BlogPost, Category, Comment
+
+    author = get_user_model().objects.create_user(
+        username='bench', email='bench@example.com', password='bench-pass-123',
+        first_name='Bench', last_name='User'
+    )
+    category = Category.objects.create(name='Benchmarks')
+    BlogPost.objects.bulk_create([
+        BlogPost(
+            title=f'Post {index}', slug=f'post-{index}', description='Description',
+            content='Content ' * 50, author=author, category=category, is_published=True
+        )
+        for index in range(posts)
+    ])
+    post = BlogPost.objects.get(slug='post-0')
+    roots = Comment.objects.bulk_create([
+        Comment(user=author, blog_post=post, content=f'Comment {index}') for index in range(10)
+    ])
+    Comment.objects.bulk_create([
+        Comment(user=author, blog_post=post, content='Reply', parent=root) for root in roots
+    ])
+    BlogPost.objects.filter(pk=post.pk).refresh_counters()
+    Comment.objects.refresh_counters()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def fetch(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: application/json\r\n'
+        'Connection: close\r\n\r\n'.encode()
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def wait_for_server(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await fetch(port, '/api/blog/categories/')
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def load(port, path, concurrency, duration):
+    """Requests per second, latency percentiles (ms) and error count for ``path``"""
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def client():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                status = await fetch(port, path)
+            except OSError:
+                status = None
+            if status == 200:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+    if not latencies:
+        return {'rps': 0.0, 'p50': float('nan'), 'p99': float('nan'), 'errors': errors}
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies),
+        'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--latency', type=float, default=5, help='Fake per-query latency in ms.')
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    print(f'Seeding {args.posts} posts...')
+    seed(args.posts)
+
+    port = free_port()
+    env = {**os.environ, 'BENCH_DB': str(db_path), 'BENCH_LATENCY_MS': str(args.latency)}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'benchmarks.latency_asgi:application',
+         '--port', str(port), '--log-level', 'warning', '--no-access-log'],
+        env=env
+    )
+    cases = [
+        ('feed', '/api/blog/posts/', '/api/blog/async/posts/'),
+        ('detail', '/api/blog/posts/post-0/', '/api/blog/async/posts/post-0/'),
+        ('comments', '/api/blog/posts/post-0/comments/', '/api/blog/async/posts/post-0/comments/'),
+    ]
+    try:
+        asyncio.run(wait_for_server(port))
+        print(
+            f'{args.concurrency} clients x {args.duration:g}s per case, '
+            f'{args.latency:g} ms fake latency per query'
+        )
+        print(f"{'case':<24}{'req/s':>10}{'p50':>10}{'p99':>10}{'errors':>8}  (ms)")
+        for name, sync_path, async_path in cases:
+            for mode, path in (('sync', sync_path), ('async', async_path)):
+                stats = asyncio.run(load(port, path, args.concurrency, args.duration))
+                print(
+                    f"{f'{name} ({mode})':<24}{stats['rps']:>10.1f}{stats['p50']:>10.1f}"
+                    f"{stats['p99']:>10.1f}{stats['errors']:>8}"
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Compare page-number (COUNT + OFFSET) and keyset pagination latency on the post feed.
+
+Seeds a throwaway SQLite database with ``--rows`` published posts and times
+``GET /api/blog/posts/`` at the requested page depths in both modes::
+
+    python -m benchmarks.bench_pagination --rows 1000000 --pages 1 1000 50000
+"""
+
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.utils import print_table, setup_django, timed
+
+
+def seed(rows, chunk_size=50000):
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction
+    from blog.models import BlogPost, Category
+
+    author = get_user_model().objects.create_user(
+        username='bench', email='bench@example.com', password='bench-pass-123',
+        first_name='Bench', last_name='User'
+    )
+    categories = [Category.objects.create(name=f'Category {index}') for index in range(10)]
+    table = BlogPost._meta.db_table
+    sql = (
+        f'INSERT INTO {table} (title, slug, description, content, image, image_renditions, '
+        'author_id, category_id, is_published, likes_count, comments_count, created_at, updated_at) '
+        'VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'
+    )
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for offset in range(0, rows, chunk_size):
+            batch = []
+            for index in range(offset, min(rows, offset + chunk_size)):
+                # Every fifth timestamp is shared with its neighbour to exercise tie-breaking
+                created_at = start + timedelta(seconds=index - (index % 5 == 4))
+                batch.append((
+                    f'Post {index}', f'post-{index}', 'Description', 'Content', '', '{}',
+                    author.pk, categories[index % len(categories)].pk, True, 0, 0,
+                    created_at, created_at,
+                ))
+            cursor.executemany(sql, batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 1000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--db', help='Reuse an existing benchmark database instead of seeding a new one.')
+    args = parser.parse_args()
+
+    setup_django(args.db)
+
+    from rest_framework.test import APIRequestFactory
+    from blog.models import BlogPost
+    from blog.pagination import KeysetPagination
+    from blog.views.blog_views import BlogPostListView
+
+    if not args.db:
+        print(f'Seeding {args.rows} posts...')
+        seed(args.rows)
+
+    factory = APIRequestFactory()
+    view = BlogPostListView.as_view()
+    page_size = KeysetPagination.page_size
+    feed = BlogPost.objects.filter(is_published=True).order_by('-created_at', '-pk')
+
+    def request(params):
+        def run():
+            response = view(factory.get('/api/blog/posts/', params))
+            assert response.status_code == 200, response.status_code
+            response.render()
+        return run
+
+    results = {}
+    for page in args.pages:
+        results[f'page={page} (offset)'] = timed(request({'page': page}), repeat=args.repeat)
+        params = {'pagination': 'cursor'}
+        if page > 1:
+            # The cursor a client holds after walking page - 1 pages
+            last = feed.values('created_at', 'pk')[(page - 1) * page_size - 1]
+            params = {'cursor': KeysetPagination().encode_cursor((last['created_at'], last['pk']))}
+        results[f'page={page} (keyset)'] = timed(request(params), repeat=args.repeat)
+
+    print_table(results, title=f'GET /api/blog/posts/ over {BlogPost.objects.count()} posts')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare JSON renderers on realistic ``GET /api/blog/posts/`` payloads.
+
+Seeds a throwaway SQLite database (see ``bench_serializers``) and builds
+the response data of feed pages of ``--page-sizes`` posts, plus the
+comment tree of one post. It then times rendering each one with DRF's
+``JSONRenderer``, and with ``BlogJSONRenderer`` and ``FragmentJSONRenderer``
+both with and without orjson::
+
+    python -m benchmarks.bench_renderers --page-sizes 10 100 1000
+"""
+
+import argparse
+from unittest import mock
+
+from benchmarks.bench_serializers import seed
+from benchmarks.utils import print_table, setup_django, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.test import APIRequestFactory
+    from blog import renderers
+    from blog.models import BlogPost, Comment
+    from blog.views.blog_views import BlogPostListView, CommentListCreateView
+
+    print(f'Seeding {args.posts} posts...')
+    seed(args.posts)
+    post = BlogPost.objects.first()
+    replier = get_user_model().objects.exclude(pk=post.author_id).first()
+    roots = Comment.objects.bulk_create([
+        Comment(user=post.author, blog_post=post, content=f'Comment {index}') for index in range(10)
+    ])
+    Comment.objects.bulk_create([
+        Comment(user=replier, blog_post=post, content='Reply', parent=root)
+        for root in roots for _ in range(3)
+    ])
+
+    factory = APIRequestFactory()
+    payloads = {}
+    for page_size in args.page_sizes:
+        with mock.patch('blog.pagination.OptionalCursorPagination.page_size', page_size):
+            response = BlogPostListView.as_view()(factory.get('/api/blog/posts/'))
+        payloads[f'feed {page_size}'] = response.data
+    response = CommentListCreateView.as_view()(factory.get(f'/api/blog/posts/{post.slug}/comments/'), slug=post.slug)
+    payloads['comments'] = response.data
+
+    orjson = renderers.orjson
+    cases = [
+        ('drf', JSONRenderer, None),
+        ('blog', renderers.BlogJSONRenderer, None),
+        ('blog+orjson', renderers.BlogJSONRenderer, orjson),
+        ('fragment', renderers.FragmentJSONRenderer, None),
+        ('fragment+orjson', renderers.FragmentJSONRenderer, orjson),
+    ]
+    results = {}
+    for payload_name, data in payloads.items():
+        expected = JSONRenderer().render(data)
+        for case_name, renderer_class, encoder in cases:
+            with mock.patch('blog.renderers.orjson', encoder):
+                assert renderer_class().render(data) == expected
+                # A fresh renderer per run, as DRF makes one per request
+                results[f'{payload_name} {case_name}'] = timed(
+                    lambda: renderer_class().render(data), repeat=args.repeat
+                )
+    if orjson is None:
+        print('orjson is not installed; the orjson cases ran the stdlib encoder.')
+    print_table(results, title='Rendering blog API payloads')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Compare DRF and compiled serialization of the post feed.
+
+Seeds a throwaway SQLite database with ``--posts`` published posts, each
+carrying an image and a full renditions map, and times turning all of them
+into response data, with the rows already loaded and including the query::
+
+    python -m benchmarks.bench_serializers --posts 10000
+"""
+
+import argparse
+
+from benchmarks.utils import print_table, setup_django, timed
+
+
+def seed(posts):
+    from django.contrib.auth import get_user_model
+    from blog.models import BlogPost, Category
+
+    renditions = {'source': 'blog_images/ab/abc.jpg'}
+    for label, width in (('thumbnail', 320), ('medium', 960), ('large', 1920)):
+        renditions[label] = {
+            'width': width, 'height': width * 2 // 3,
+            'avif': f'blog_images/renditions/abc-{label}.avif',
+            'webp': f'blog_images/renditions/abc-{label}.webp',
+        }
+    authors = [
+        get_user_model().objects.create_user(
+            username=f'bench{index}', email=f'bench{index}@example.com', password='bench-pass-123',
+            first_name='Bench', last_name='User', bio='Benchmarks things'
+        )
+        for index in range(20)
+    ]
+    categories = [Category.objects.create(name=f'Category {index}') for index in range(10)]
+    BlogPost.objects.bulk_create([
+        BlogPost(
+            title=f'Post {index}', slug=f'post-{index}', description='Description',
+            content='Content', image='blog_images/ab/abc.jpg', image_renditions=renditions,
+            author=authors[index % len(authors)], category=categories[index % len(categories)],
+            is_published=True
+        )
+        for index in range(posts)
+    ], batch_size=1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from blog.models import BlogPost
+    from blog.serializers.blog_serializers import BlogPostListSerializer
+    from blog.serializers.compiled_serializers import CompiledBlogPostListSerializer
+
+    print(f'Seeding {args.posts} posts...')
+    seed(args.posts)
+
+    context = {'request': Request(APIRequestFactory().get('/api/blog/posts/'))}
+    compiled = CompiledBlogPostListSerializer()
+    queryset = BlogPost.objects.feed().filter(is_published=True)
+    instances = list(queryset)
+    rows = list(queryset.values(*compiled.lookups))
+
+    def drf():
+        return BlogPostListSerializer(instances, many=True, context=context).data
+
+    def fast():
+        return compiled.serialize(rows, context)
+
+    assert fast() == drf()
+    results = {
+        'serialize (DRF)': timed(drf, repeat=args.repeat, warmup=1),
+        'serialize (compiled)': timed(fast, repeat=args.repeat, warmup=1),
+        'query + serialize (DRF)': timed(
+            lambda: BlogPostListSerializer(list(queryset), many=True, context=context).data,
+            repeat=args.repeat, warmup=1
+        ),
+        'query + serialize (compiled)': timed(
+            lambda: compiled.serialize(queryset.values(*compiled.lookups), context),
+            repeat=args.repeat, warmup=1
+        ),
+    }
+    print_table(results, title=f'BlogPostListSerializer over {len(rows)} posts')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+ASGI application for load benchmarks, with a fake-latency database.
+
+Every SQL statement sleeps for ``BENCH_LATENCY_MS`` milliseconds before it
+runs. This stands in for the network round trip to a real database server,
+which the local SQLite file does not have. The database is ``BENCH_DB``,
+prepared by the benchmark script that starts the server::
+
+    BENCH_DB=/tmp/bench.sqlite3 BENCH_LATENCY_MS=5 \\
+        uvicorn benchmarks.latency_asgi:application
+"""
+
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog_api.settings')
+
+from django.conf import settings  # noqa: E402
+
+settings.DATABASES['default']['NAME'] = os.environ['BENCH_DB']
+settings.ALLOWED_HOSTS = ['*']
+settings.DEBUG = False
+settings.BLOG_RESPONSE_CACHE = {**settings.BLOG_RESPONSE_CACHE, 'ENABLED': False}
+
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+
+LATENCY = float(os.environ.get('BENCH_LATENCY_MS', '5')) / 1000
+
+
+def fake_latency(execute, sql, params, many, context):
+    # Block the calling thread, as a sync driver waiting on the server would
+    time.sleep(LATENCY)
+    return execute(sql, params, many, context)
+
+
+def install_latency(sender, connection, **kwargs):
+    if fake_latency not in connection.execute_wrappers:
+        connection.execute_wrappers.append(fake_latency)
+
+
+connection_created.connect(install_latency)
+
+application = get_asgi_application()
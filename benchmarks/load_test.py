@@ -0,0 +1,466 @@
+"""
+Mixed-workload load test reporting throughput and latency per endpoint.
+
+Virtual users log in, then loop over a weighted mix of feed pages,
+searches, post details, comment lists, like toggles and fresh logins. Hot
+posts get picked more often than cold ones. Targets:
+
+* ``--target wsgi`` (default) and ``--target asgi`` run the Django
+  application in-process against a throwaway database. ``seed_blog --size``
+  fills it, or ``--db`` reuses a seeded one. WSGI runs every virtual user in
+  its own thread; ASGI runs them as tasks on one event loop, as under uvicorn.
+* ``--url http://127.0.0.1:8000`` drives a running server. Seed it with
+  ``manage.py seed_blog`` so the seeded users can log in.
+
+``--save`` writes the results as JSON. ``--compare`` prints the change per
+endpoint against a saved run, and exits with status 1 when any p95 got more
+than ``--threshold`` percent slower, or throughput or the success rate
+dropped by more than that. A release pipeline can gate on it::
+
+    python -m benchmarks.load_test --size small --users 50 --duration 30 --save baseline.json
+    python -m benchmarks.load_test --size small --users 50 --duration 30 --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import bisect
+import io
+import itertools
+import json
+import random
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.utils import setup_django
+
+
+# endpoint: share of the actions a signed-in virtual user takes
+WORKLOAD = {
+    'feed': 30,
+    'search': 10,
+    'detail': 25,
+    'comments': 18,
+    'like': 15,
+    'login': 2,
+}
+# Anonymous virtual users only read
+READS = ('feed', 'search', 'detail', 'comments')
+
+
+class WSGITransport:
+    """Calls the WSGI application in-process, one thread per virtual user"""
+
+    def __init__(self, workers):
+        from django.core.wsgi import get_wsgi_application
+
+        self.application = get_wsgi_application()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    async def __call__(self, method, path, headers, body):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.call, method, path, headers, body
+        )
+
+    def call(self, method, path, headers, body):
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in headers.items():
+            key = name.upper().replace('-', '_')
+            environ[key if key == 'CONTENT_TYPE' else f'HTTP_{key}'] = value
+        status = []
+        result = self.application(environ, lambda line, response_headers, exc_info=None: status.append(line))
+        try:
+            content = b''.join(result)
+        finally:
+            result.close()
+        return int(status[0].split(' ', 1)[0]), content
+
+    def close(self):
+        self.executor.shutdown()
+
+
+class ASGITransport:
+    """Calls the ASGI application in-process on the running event loop"""
+
+    def __init__(self, workers):
+        from django.core.asgi import get_asgi_application
+
+        self.application = get_asgi_application()
+
+    async def __call__(self, method, path, headers, body):
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'headers': [(b'host', b'testserver'), (b'content-length', str(len(body)).encode())] + [
+                (name.lower().encode(), value.encode()) for name, value in headers.items()
+            ],
+            'server': ('testserver', 80),
+            'client': ('127.0.0.1', 0),
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        disconnected = asyncio.Event()
+        status = None
+        chunks = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body'):
+                    disconnected.set()
+
+        await self.application(scope, receive, send)
+        return status, b''.join(chunks)
+
+    def close(self):
+        pass
+
+
+class HTTPTransport:
+    """Sends HTTP/1.1 requests to a running server, one connection per request"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+
+    async def __call__(self, method, path, headers, body):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            lines = [f'{method} {self.prefix}{path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'Connection: close']
+            lines += [f'{name}: {value}' for name, value in headers.items()]
+            lines.append(f'Content-Length: {len(body)}')
+            writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        head, _, content = response.partition(b'\r\n\r\n')
+        if re.search(rb'(?im)^transfer-encoding:\s*chunked', head):
+            content = dechunk(content)
+        return int(head.split(b' ', 2)[1]), content
+
+    def close(self):
+        pass
+
+
+def dechunk(content):
+    chunks = []
+    while content:
+        size, _, content = content.partition(b'\r\n')
+        size = int(size.split(b';')[0], 16)
+        if not size:
+            break
+        chunks.append(content[:size])
+        content = content[size + 2:]
+    return b''.join(chunks)
+
+
+class Recorder:
+    """Latencies and failures per endpoint, counted once the warmup is over"""
+
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, endpoint, started, ok):
+        if started < self.measure_from:
+            return
+        if ok:
+            self.latencies.setdefault(endpoint, []).append((time.perf_counter() - started) * 1000)
+        else:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        everything = []
+        for endpoint in sorted(self.latencies.keys() | self.errors.keys()):
+            latencies = sorted(self.latencies.get(endpoint, []))
+            everything += latencies
+            endpoints[endpoint] = stats(latencies, self.errors.get(endpoint, 0), elapsed)
+        endpoints['total'] = stats(sorted(everything), sum(self.errors.values()), elapsed)
+        return endpoints
+
+
+def stats(latencies, errors, elapsed):
+    def percentile(share):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * share))] if latencies else None
+
+    return {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(0.5),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+    }
+
+
+class VirtualUser:
+    """One simulated client working through the mix until the deadline"""
+
+    def __init__(self, client, recorder, pool, rng, credentials):
+        self.client = client
+        self.recorder = recorder
+        self.pool = pool
+        self.rng = rng
+        self.credentials = credentials
+        self.token = None
+
+    async def request(self, endpoint, method, path, data=None, expect=(200,)):
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        body = b''
+        if data is not None:
+            headers['Content-Type'] = 'application/json'
+            body = json.dumps(data).encode()
+        started = time.perf_counter()
+        try:
+            status, content = await self.client(method, path, headers, body)
+        except Exception:
+            status, content = None, b''
+        self.recorder.record(endpoint, started, status in expect)
+        return status, content
+
+    async def run(self, deadline):
+        if self.credentials:
+            await self.login()
+        endpoints = list(WORKLOAD) if self.token else list(READS)
+        weights = list(itertools.accumulate(WORKLOAD[endpoint] for endpoint in endpoints))
+        while time.perf_counter() < deadline:
+            endpoint = endpoints[bisect.bisect(weights, self.rng.random() * weights[-1])]
+            await getattr(self, endpoint)()
+
+    def post(self):
+        return self.pool.posts[bisect.bisect(self.pool.weights, self.rng.random() * self.pool.weights[-1])]
+
+    async def feed(self):
+        # Most readers stay on the first pages
+        page = min(int(self.rng.expovariate(0.7)) + 1, self.pool.pages)
+        await self.request('feed', 'GET', f'/api/blog/posts/?page={page}')
+
+    async def search(self):
+        await self.request('search', 'GET', '/api/blog/posts/?' + urlencode({'search': self.rng.choice(self.pool.terms)}))
+
+    async def detail(self):
+        await self.request('detail', 'GET', f'/api/blog/posts/{self.post()}/')
+
+    async def comments(self):
+        await self.request('comments', 'GET', f'/api/blog/posts/{self.post()}/comments/')
+
+    async def like(self):
+        await self.request('like', 'POST', f'/api/blog/posts/{self.post()}/like/', expect=(200, 201))
+
+    async def login(self):
+        email, password = self.credentials
+        status, content = await self.request('login', 'POST', '/api/auth/login/', {'email': email, 'password': password})
+        if status == 200:
+            self.token = json.loads(content)['token']
+
+
+class Pool:
+    """Posts, search terms and logins discovered through the public feed"""
+
+    def __init__(self, posts, terms, emails, pages, exponent=1.1):
+        self.posts = posts
+        self.terms = terms
+        self.emails = emails
+        self.pages = pages
+        # Zipf over the discovery order, so a few posts take most of the traffic
+        self.weights = list(itertools.accumulate((rank + 1) ** -exponent for rank in range(len(posts))))
+
+
+async def discover(client, pages):
+    posts, terms, emails = [], set(), set()
+    found = 0
+    for page in range(1, pages + 1):
+        status, content = await client('GET', f'/api/blog/posts/?page={page}', {'Accept': 'application/json'}, b'')
+        if status != 200:
+            break
+        found = page
+        for post in json.loads(content)['results']:
+            posts.append(post['slug'])
+            terms.update(word for word in re.findall(r'[a-z]{4,}', post['title'].lower()))
+            emails.add(post['author']['email'])
+    if not posts:
+        raise SystemExit('The feed is empty; seed the database with "manage.py seed_blog" first.')
+    random.Random(0).shuffle(posts)
+    return Pool(posts, sorted(terms) or ['post'], sorted(emails), found)
+
+
+async def run_load(client, users, duration, warmup, anonymous, password, seed, discover_pages):
+    pool = await discover(client, discover_pages)
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    recorder = Recorder(started + warmup)
+    virtual_users = [
+        VirtualUser(
+            client, recorder, pool, random.Random(rng.random()),
+            None if index < users * anonymous else (pool.emails[index % len(pool.emails)], password),
+        )
+        for index in range(users)
+    ]
+    deadline = started + warmup + duration
+    await asyncio.gather(*(user.run(deadline) for user in virtual_users))
+    return recorder.summary(time.perf_counter() - recorder.measure_from)
+
+
+def print_results(endpoints):
+    print(f"{'endpoint':<12}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}  (ms)")
+    for endpoint, result in endpoints.items():
+        print(
+            f"{endpoint:<12}{result['requests']:>10}{result['errors']:>8}{result['rps']:>10.1f}"
+            + ''.join(f'{result[name]:>10.1f}' if result[name] is not None else f"{'-':>10}" for name in ('p50', 'p95', 'p99'))
+        )
+
+
+def success_rate(result):
+    return 1 - result['errors'] / result['requests'] if result['requests'] else 1
+
+
+def compare(baseline, current, threshold):
+    """Print the change per endpoint; returns the endpoints that regressed beyond ``threshold`` percent"""
+    regressions = []
+    print(f"\n{'endpoint':<12}{'req/s':>18}{'p95 (ms)':>22}{'success':>18}")
+    for endpoint, result in current['endpoints'].items():
+        before = baseline['endpoints'].get(endpoint)
+        if before is None:
+            continue
+        rps_change = change(before['rps'], result['rps'])
+        p95_change = change(before['p95'], result['p95'])
+        success_drop = (success_rate(before) - success_rate(result)) * 100
+        regressed = (
+            (p95_change is not None and p95_change > threshold)
+            or (rps_change is not None and rps_change < -threshold)
+            or success_drop > threshold
+        )
+        if regressed:
+            regressions.append(endpoint)
+        print(
+            f"{endpoint:<12}{format_change(rps_change):>18}{format_change(p95_change):>22}"
+            f"{success_rate(result):>17.1%}{'  REGRESSED' if regressed else ''}"
+        )
+    return regressions
+
+
+def change(before, after):
+    if before is None or after is None or not before:
+        return None
+    return (after - before) / before * 100
+
+
+def format_change(value):
+    return '-' if value is None else f'{value:+.1f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', choices=('wsgi', 'asgi'), default='wsgi', help='In-process interface to drive.')
+    parser.add_argument('--url', help='Drive a running server at this URL instead.')
+    parser.add_argument('--db', help='Reuse a seeded database instead of seeding a throwaway one (in-process).')
+    parser.add_argument('--size', default='tiny', help='seed_blog size profile for the throwaway database.')
+    parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users.')
+    parser.add_argument('--duration', type=float, default=20, help='Measured seconds.')
+    parser.add_argument('--warmup', type=float, default=3, help='Seconds run before measuring.')
+    parser.add_argument('--anonymous', type=float, default=0.3, help='Share of virtual users that only read.')
+    parser.add_argument('--password', default='seed-pass-123', help='Password of the seeded users.')
+    parser.add_argument('--discover-pages', type=int, default=10, help='Feed pages read to find posts and users.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='Write the results to this JSON file.')
+    parser.add_argument('--compare', help='Compare with the results saved in this JSON file.')
+    parser.add_argument('--load', help='Compare these saved results instead of running the load test.')
+    parser.add_argument('--threshold', type=float, default=10, help='Regression threshold in percent (default 10).')
+    args = parser.parse_args()
+
+    if args.load:
+        with open(args.load) as file:
+            results = json.load(file)
+    else:
+        if args.url:
+            client = HTTPTransport(args.url)
+        else:
+            setup_django(args.db)
+            from django.conf import settings
+            from django.core.management import call_command
+
+            # DEBUG would keep every query in memory
+            settings.DEBUG = False
+            if not args.db:
+                print(f'Seeding a {args.size} dataset...')
+                call_command('seed_blog', '--size', args.size, '--seed', str(args.seed), verbosity=0)
+            client = (ASGITransport if args.target == 'asgi' else WSGITransport)(args.users)
+        print(f'{args.users} virtual users, {args.warmup:g}s warmup + {args.duration:g}s measured...')
+        try:
+            endpoints = asyncio.run(run_load(
+                client, args.users, args.duration, args.warmup, args.anonymous, args.password, args.seed,
+                args.discover_pages,
+            ))
+        finally:
+            client.close()
+        results = {
+            'meta': {
+                'target': args.url or args.target,
+                'size': None if args.url or args.db else args.size,
+                'users': args.users,
+                'duration': args.duration,
+                'anonymous': args.anonymous,
+                'workload': WORKLOAD,
+                'finished_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            },
+            'endpoints': endpoints,
+        }
+    print_results(results['endpoints'])
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f'Saved to {args.save}')
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"Regressed beyond {args.threshold:g}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
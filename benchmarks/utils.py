@@ -0,0 +1,64 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite database so they never touch
+``db.sqlite3``. Run them from the project root, e.g.::
+
+    python -m benchmarks.bench_pagination --rows 1000000
+"""
+
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def setup_django(db_path=None):
+    """Configure Django against ``db_path`` (a temporary file by default) and migrate it"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog_api.settings')
+    if db_path is None:
+        db_path = Path(tempfile.mkdtemp(prefix='blog-bench-')) / 'bench.sqlite3'
+
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = str(db_path)
+    settings.ALLOWED_HOSTS = ['*']
+    # Measure the views, not the response cache in front of them
+    settings.BLOG_RESPONSE_CACHE = {**settings.BLOG_RESPONSE_CACHE, 'ENABLED': False}
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return db_path
+
+
+def timed(func, repeat=20, warmup=2):
+    """Run ``func`` and return latency stats in milliseconds"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'min': samples[0],
+        'p50': statistics.median(samples),
+        'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'max': samples[-1],
+    }
+
+
+def print_table(rows, title=None):
+    """Print ``{name: stats}`` as an aligned table"""
+    if title:
+        print(title)
+    print(f"{'case':<32}{'min':>10}{'p50':>10}{'p95':>10}{'max':>10}  (ms)")
+    for name, stats in rows.items():
+        print(
+            f"{name:<32}{stats['min']:>10.2f}{stats['p50']:>10.2f}"
+            f"{stats['p95']:>10.2f}{stats['max']:>10.2f}"
+        )
@@ -1,5 +1,43 @@
+from collections import Counter
+
+from django.conf import settings
 from django.contrib import admin
+from django.db import transaction
+from django.db.models.deletion import Collector
+
+from blog.cache import POSTS, bump_generations, category_generation, post_generation
 from blog.models import Category, BlogPost, Like, Comment
+from blog.signals import refresh_activity_counters
+from blog.trending import add_scores
+
+
+class PostActivityAdmin(admin.ModelAdmin):
+    """Admin for rows that feed a post's counters, score and cached pages
+    
+    Queryset deletes send post_delete without the per-row work (see
+    blog.signals), so the bulk delete action updates the posts and parent
+    comments here.
+    """
+    
+    def delete_queryset(self, request, queryset):
+        collector = Collector(using=queryset.db, origin=queryset)
+        collector.collect(queryset)
+        # Includes the replies deleted along with the selected comments
+        scores = Counter()
+        for model in (Like, Comment):
+            weight = settings.BLOG_TRENDING['LIKE_WEIGHT' if model is Like else 'COMMENT_WEIGHT']
+            for row in collector.data.get(model, ()):
+                scores[row.blog_post_id] -= weight
+        parents = {row.parent_id for row in collector.data.get(Comment, ())}
+        slugs = BlogPost.objects.filter(pk__in=scores).values_list('slug', 'category__slug')
+        with transaction.atomic():
+            collector.delete()
+            refresh_activity_counters(scores, parents)
+            add_scores(scores)
+            bump_generations(POSTS, *{
+                name for slug, category_slug in slugs
+                for name in (post_generation(slug), category_generation(category_slug))
+            })
 
 
 @admin.register(Category)
@@ -30,7 +68,7 @@ class BlogPostAdmin(admin.ModelAdmin):
 
 
 @admin.register(Like)
-class LikeAdmin(admin.ModelAdmin):
+class LikeAdmin(PostActivityAdmin):
     """Like admin"""
     list_display = ('user', 'blog_post', 'created_at')
     list_filter = ('created_at',)
@@ -40,7 +78,7 @@ class LikeAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(PostActivityAdmin):
     """Comment admin"""
     list_display = ('user', 'blog_post', 'parent', 'created_at')
     list_filter = ('created_at',)
@@ -0,0 +1,138 @@
+"""
+Versioned response cache for the public blog endpoints.
+
+Cached responses are keyed on the request plus the current value of the
+generation counters the response depends on. Writes never delete cached
+entries; they bump the counters, so every key built afterwards is new and
+stale entries simply age out of the cache.
+"""
+
+import hashlib
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import parse_http_date
+from rest_framework.response import Response
+
+from blog.conditional import check_conditions, set_validators
+
+
+POSTS = 'posts'
+CATEGORIES = 'categories'
+USERS = 'users'
+
+
+def get_cache():
+    return caches[settings.BLOG_RESPONSE_CACHE['ALIAS']]
+
+
+def post_generation(slug):
+    return f'post:{slug}' if slug else None
+
+
+def category_generation(slug):
+    return f'category:{slug}' if slug else None
+
+
+def _generation_key(name):
+    return f'blog:generation:{quote(name)}'
+
+
+def get_generations(names):
+    """Current value of each generation counter, starting missing ones from the clock"""
+    cache = get_cache()
+    keys = [_generation_key(name) for name in names]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            # Seeding from the clock rather than 0 means a counter that was
+            # evicted never comes back at a value an old entry was keyed on
+            cache.add(key, time.time_ns(), None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def _bump(names):
+    cache = get_cache()
+    for name in names:
+        key = _generation_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def bump_generations(*names):
+    """Invalidate every cached response that depends on ``names``"""
+    names = [name for name in names if name]
+    _bump(names)
+    # Bump again once the write is visible, so a response cached from the
+    # pre-commit state while the transaction was open is invalidated too
+    transaction.on_commit(lambda: _bump(names))
+
+
+class CachedResponseMixin:
+    """Serve anonymous GET responses from the versioned response cache
+    
+    Views list the query parameters that change their output in
+    ``cache_query_params`` and the generation counters they depend on in
+    ``get_cache_generations``.
+    """
+    cache_query_params = ()
+    
+    def get_cache_generations(self):
+        raise NotImplementedError
+    
+    def is_response_cacheable(self, request):
+        return (
+            settings.BLOG_RESPONSE_CACHE['ENABLED']
+            and request.method == 'GET'
+            and not request.user.is_authenticated
+        )
+    
+    def get_response_cache_key(self, request):
+        params = sorted(
+            (name, value)
+            for name in self.cache_query_params
+            for value in request.query_params.getlist(name)
+            if value
+        )
+        generations = get_generations(self.get_cache_generations())
+        raw = repr((
+            request.scheme,
+            request.get_host(),
+            request.path,
+            request.accepted_renderer.format,
+            params,
+            generations,
+        ))
+        return 'blog:response:' + hashlib.md5(raw.encode()).hexdigest()
+    
+    def get(self, request, *args, **kwargs):
+        if not self.is_response_cacheable(request):
+            return super().get(request, *args, **kwargs)
+        
+        cache = get_cache()
+        key = self.get_response_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            etag, last_modified = entry['etag'], entry['last_modified']
+            response = check_conditions(request, etag, last_modified)
+            if response is None:
+                response = Response(entry['data'])
+                set_validators(response, etag, last_modified)
+            return response
+        
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            last_modified = response.get('Last-Modified')
+            entry = {
+                'data': response.data,
+                'etag': response.get('ETag'),
+                'last_modified': last_modified and parse_http_date(last_modified),
+            }
+            cache.set(key, entry, settings.BLOG_RESPONSE_CACHE['TIMEOUT'])
+        return response
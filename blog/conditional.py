@@ -0,0 +1,64 @@
+import hashlib
+from datetime import datetime
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(parts, weak=False):
+    """Quoted ETag derived from ``parts``"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def validators_for(request, parts, weak=False):
+    """ETag and Last-Modified for a representation that depends on ``parts``
+    
+    The ETag also covers the negotiated format; Last-Modified is the newest
+    datetime among ``parts``.
+    """
+    etag = make_etag((request.accepted_renderer.format, *parts), weak=weak)
+    moments = [part for part in parts if isinstance(part, datetime)]
+    last_modified = int(max(moments).timestamp()) if moments else None
+    return etag, last_modified
+
+
+def check_conditions(request, etag=None, last_modified=None):
+    """304/412 response for a conditional request, or None when the view should run"""
+    if etag is None and last_modified is None:
+        return None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag is not None:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+
+
+class ConditionalGetMixin:
+    """Answer conditional GETs with 304 before the queryset is serialized
+    
+    Views implement ``get_validators`` to return ``(etag, last_modified)``
+    from a cheap query; ``last_modified`` is a POSIX timestamp. Either may be
+    None, and both being None (e.g. the object does not exist) skips the
+    check so the view can answer normally.
+    """
+    
+    def get_validators(self):
+        raise NotImplementedError
+    
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = check_conditions(request, etag, last_modified)
+        if response is not None:
+            return response
+        
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        return response
@@ -0,0 +1,52 @@
+from django.db import connections
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from blog.search import get_search_backend
+
+
+class BlogPostSearchFilter(filters.SearchFilter):
+    """SearchFilter backed by the full-text index, ranking results by relevance
+    
+    Falls back to the stock icontains search when the database has no search
+    backend. Place it after OrderingFilter so relevance wins unless the client
+    asks for an explicit ordering.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        backend = get_search_backend(connections[queryset.db])
+        if not search_terms or backend is None:
+            return super().filter_queryset(request, queryset, view)
+        
+        queryset = backend.search(queryset, search_terms)
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank', '-created_at')
+        return queryset
+
+
+class BlogPostOrderingFilter(filters.OrderingFilter):
+    """OrderingFilter that can also order by ``trending``, the score kept in post_scores
+    
+    Trending lists only the posts that have a score, so the query can walk
+    the score index instead of sorting every post.
+    """
+    
+    def orders_by_trending(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        return bool(ordering) and any(term.lstrip('-') == 'trending' for term in ordering)
+    
+    def filter_queryset(self, request, queryset, view):
+        if not self.orders_by_trending(request, queryset, view):
+            return super().filter_queryset(request, queryset, view)
+        
+        ordering = self.get_ordering(request, queryset, view)
+        terms = []
+        for term in ordering:
+            if term.lstrip('-') == 'trending':
+                descending = term.startswith('-')
+                fields = ['score__score', 'score__blog_post_id']
+                terms.extend(f'-{field}' if descending else field for field in fields)
+            else:
+                terms.append(term)
+        return queryset.filter(score__isnull=False).order_by(*terms)
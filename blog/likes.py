@@ -0,0 +1,280 @@
+"""
+Write-behind buffer for likes.
+
+When ``BLOG_LIKE_BUFFER['ENABLED']`` is set, ``toggle_like`` does not write
+the likes table. It records the user's new state in a cache instead:
+
+* ``state`` keys hold the state each user last asked for, per post;
+* ``delta`` keys hold, per post, the net like count not yet flushed;
+* an append-only log, numbered by an atomic ``incr``, holds every toggle.
+
+The flusher replays the log in batches. Each (user, post) pair collapses
+to its final state, so a like storm on one post becomes one ``bulk_create``
+and one DELETE. The stored counters are then recounted and the flushed
+amounts are taken off the deltas. Readers add the pending delta to
+``likes_count``, and a user's pending state wins over the table.
+
+With no ``SHARED_CACHE_ALIAS`` the buffer lives in process memory, and each
+process flushes its own. With a shared cache (Redis, Memcached) every
+process sees every pending like, and a lock key allows one flush at a time.
+"""
+
+import functools
+import logging
+import operator
+import secrets
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.signals import setting_changed
+from django.db import connections, transaction
+from django.db.models import Q
+from django.dispatch import receiver
+
+from blog.cache import POSTS, bump_generations, category_generation, post_generation
+from blog.models import BlogPost, Like
+from blog.trending import add_scores
+
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+class LikeBuffer:
+    """Pending like/unlike toggles kept in a cache in front of the likes table"""
+    
+    def __init__(self, batch_size=500, flush_interval=1.0, state_ttl=300, lock_timeout=60, shared_alias=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.state_ttl = state_ttl
+        self.lock_timeout = lock_timeout
+        self.shared_alias = shared_alias
+        self._local = None
+        self._gap = None
+        self._flusher = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+    
+    @property
+    def cache(self):
+        if self.shared_alias:
+            return caches[self.shared_alias]
+        if self._local is None:
+            # A private LocMemCache that never culls: an evicted log entry is a lost like
+            self._local = LocMemCache(f'blog-like-buffer-{id(self)}', {'OPTIONS': {'MAX_ENTRIES': 2 ** 62}})
+            # LocMemCache shares storage by name, and ids are reused
+            self._local.clear()
+        return self._local
+    
+    def state_key(self, user_id, post_id):
+        return f'blog:likes:state:{user_id}:{post_id}'
+    
+    def delta_key(self, post_id):
+        return f'blog:likes:delta:{post_id}'
+    
+    def event_key(self, seq):
+        return f'blog:likes:event:{seq}'
+    
+    def toggle(self, user_id, post_id):
+        """Flip the user's like on the post and return the new state"""
+        cache = self.cache
+        state = cache.get(self.state_key(user_id, post_id))
+        if state is None:
+            state = Like.objects.filter(user_id=user_id, blog_post_id=post_id).exists()
+        liked = not state
+        change = 1 if liked else -1
+        
+        cache.set(self.state_key(user_id, post_id), liked, self.state_ttl)
+        self._incr(self.delta_key(post_id), change)
+        seq = self._incr('blog:likes:head', 1)
+        # Outlives any sane flush interval, so a stalled flusher does not leak keys forever
+        cache.set(self.event_key(seq), (user_id, post_id, liked, change), 86400)
+        self.start()
+        return liked
+    
+    def liked(self, user_id, post_ids):
+        """Pending state of ``user_id`` for each of ``post_ids`` that has one"""
+        keys = {self.state_key(user_id, post_id): post_id for post_id in post_ids}
+        return {keys[key]: value for key, value in self.cache.get_many(keys).items()}
+    
+    def deltas(self, post_ids):
+        """Net likes not yet flushed, for each of ``post_ids`` that has any"""
+        keys = {self.delta_key(post_id): post_id for post_id in post_ids}
+        return {keys[key]: value for key, value in self.cache.get_many(keys).items() if value}
+    
+    def delta(self, post_id):
+        return self.deltas([post_id]).get(post_id, 0)
+    
+    def _incr(self, key, change):
+        cache = self.cache
+        cache.add(key, 0, None)
+        return cache.incr(key, change)
+    
+    def flush(self):
+        """Apply every pending toggle to the database; returns the number of toggles applied"""
+        cache = self.cache
+        token = secrets.token_hex(8)
+        if not cache.add('blog:likes:lock', token, self.lock_timeout):
+            return 0
+        try:
+            return self._flush(cache)
+        finally:
+            if cache.get('blog:likes:lock') == token:
+                cache.delete('blog:likes:lock')
+    
+    def _flush(self, cache):
+        flushed = cache.get('blog:likes:flushed', 0)
+        head = cache.get('blog:likes:head', 0)
+        applied = 0
+        while flushed < head:
+            seqs = range(flushed + 1, min(head, flushed + self.batch_size) + 1)
+            events = cache.get_many([self.event_key(seq) for seq in seqs])
+            batch = []
+            for seq in seqs:
+                event = events.get(self.event_key(seq))
+                if event is None and not self._skip_gap(seq):
+                    # The toggle that took this number has not written its event yet
+                    head = seq - 1
+                    break
+                if event is not None:
+                    batch.append(event)
+                flushed = seq
+            if not batch and flushed < seqs[0]:
+                break
+            
+            self.apply(batch)
+            cache.set('blog:likes:flushed', flushed, None)
+            cache.delete_many([self.event_key(seq) for seq in range(seqs[0], flushed + 1)])
+            deltas = {}
+            for _, post_id, _, change in batch:
+                deltas[post_id] = deltas.get(post_id, 0) + change
+            for post_id, change in deltas.items():
+                if change:
+                    self._incr(self.delta_key(post_id), -change)
+            applied += len(batch)
+        return applied
+    
+    def _skip_gap(self, seq):
+        """Whether a missing event is old enough to treat as lost"""
+        now = time.monotonic()
+        if self._gap is None or self._gap[0] != seq:
+            self._gap = (seq, now)
+        return now - self._gap[1] > self.lock_timeout
+    
+    def apply(self, events):
+        """Write the final state of each (user, post) pair in ``events``"""
+        final = {}
+        for user_id, post_id, liked, _ in events:
+            final[user_id, post_id] = liked
+        posts = {
+            pk: (slug, category_slug) for pk, slug, category_slug in BlogPost.objects.filter(
+                pk__in={post_id for _, post_id in final}
+            ).values_list('pk', 'slug', 'category__slug')
+        }
+        users = set(User.objects.filter(pk__in={user_id for user_id, _ in final}).values_list('pk', flat=True))
+        # Posts and users deleted since the toggle have taken their likes with them
+        final = {key: liked for key, liked in final.items() if key[0] in users and key[1] in posts}
+        if not final:
+            return
+        
+        unliked = [Q(user_id=user_id, blog_post_id=post_id) for (user_id, post_id), liked in final.items() if not liked]
+        with transaction.atomic():
+            Like.objects.bulk_create(
+                [Like(user_id=user_id, blog_post_id=post_id) for (user_id, post_id), liked in final.items() if liked],
+                batch_size=self.batch_size,
+                ignore_conflicts=True
+            )
+            for start in range(0, len(unliked), self.batch_size):
+                # Receivers skip queryset deletes; the scores and generations are updated below
+                Like.objects.filter(functools.reduce(operator.or_, unliked[start:start + self.batch_size])).delete()
+            touched = {post_id for _, post_id in final}
+            BlogPost.objects.filter(pk__in=touched).refresh_counters()
+            weight = settings.BLOG_TRENDING['LIKE_WEIGHT']
+            scores = Counter()
+            for (_, post_id), liked in final.items():
+                scores[post_id] += weight if liked else -weight
+            add_scores(scores)
+            # Nothing above ran the per-row receivers
+            bump_generations(POSTS, *{
+                name for pk in touched
+                for name in (post_generation(posts[pk][0]), category_generation(posts[pk][1]))
+            })
+    
+    def start(self):
+        """Start the background flusher unless it is running or disabled"""
+        if self.flush_interval is None:
+            return
+        with self._lock:
+            if self._flusher is None and not self._stopped.is_set():
+                self._flusher = threading.Thread(target=self._run, name='like-buffer', daemon=True)
+                self._flusher.start()
+    
+    def stop(self):
+        self._stopped.set()
+    
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # Pending toggles stay in the log and are retried next time
+                logger.exception('Flushing buffered likes failed')
+            finally:
+                connections.close_all()
+
+
+_like_buffer = None
+
+
+def get_like_buffer():
+    """The configured ``LikeBuffer``, or None when likes are written directly"""
+    global _like_buffer
+    options = settings.BLOG_LIKE_BUFFER
+    if not options['ENABLED']:
+        return None
+    if _like_buffer is None:
+        _like_buffer = LikeBuffer(
+            batch_size=options['BATCH_SIZE'],
+            flush_interval=options['FLUSH_INTERVAL'],
+            state_ttl=options['STATE_TTL'],
+            shared_alias=options.get('SHARED_CACHE_ALIAS'),
+        )
+    return _like_buffer
+
+
+@receiver(setting_changed)
+def reset_like_buffer(setting, **kwargs):
+    global _like_buffer
+    if setting == 'BLOG_LIKE_BUFFER' and _like_buffer is not None:
+        _like_buffer.stop()
+        _like_buffer = None
+
+
+def pending_likes(post_id):
+    """Net likes of the post still in the buffer"""
+    buffer = get_like_buffer()
+    return buffer.delta(post_id) if buffer is not None else 0
+
+
+def merge_pending_likes(posts, user_id=None):
+    """Add buffered likes to the ``likes_count`` of each serialized post in ``posts``
+    
+    With ``user_id``, their buffered state also replaces each post's ``is_liked``.
+    """
+    buffer = get_like_buffer()
+    if buffer is None or not posts:
+        return posts
+    post_ids = [post['id'] for post in posts]
+    deltas = buffer.deltas(post_ids)
+    liked = buffer.liked(user_id, post_ids) if user_id is not None else {}
+    for post in posts:
+        post['likes_count'] += deltas.get(post['id'], 0)
+        if post['id'] in liked:
+            post['is_liked'] = liked[post['id']]
+    return posts
@@ -0,0 +1,53 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.models import BlogPost
+
+
+class Command(BaseCommand):
+    """Remove stored images and renditions that no row points at any more"""
+    help = (
+        'Delete post images, and their renditions, whose content no post uses: the images of '
+        'deleted posts and the images replaced by newer uploads. Files newer than --min-age '
+        'are kept, since an upload is stored before its row is saved.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=60,
+            help='Only delete files at least this many minutes old (default 60).',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='List the files without deleting them.')
+    
+    def handle(self, *args, **options):
+        field = BlogPost._meta.get_field('image')
+        storage = field.storage
+        referenced = storage.referenced_names()
+        cutoff = timezone.now() - timedelta(minutes=options['min_age'])
+        removed = 0
+        for name in self.walk(storage, field.upload_to.strip('/')):
+            if name in referenced or storage.get_modified_time(name) > cutoff:
+                continue
+            if options['verbosity'] > 1 or options['dry_run']:
+                self.stdout.write(name)
+            if not options['dry_run']:
+                # Not storage.delete(): that asks the database about each file again
+                FileSystemStorage.delete(storage, name)
+            removed += 1
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {removed} unreferenced file(s).'))
+    
+    def walk(self, storage, directory):
+        if not storage.exists(directory):
+            return
+        directories, files = storage.listdir(directory)
+        for name in files:
+            yield posixpath.join(directory, name)
+        for child in directories:
+            yield from self.walk(storage, posixpath.join(directory, child))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from blog.trending import decay_scores, rebuild_scores
+
+
+class Command(BaseCommand):
+    """Decay the trending scores for the time passed since the last run"""
+    help = (
+        'Scale every trending score down by the time since it was last decayed '
+        '(BLOG_TRENDING["HALF_LIFE"]) and drop the ones that fell below MIN_SCORE. '
+        'Run it periodically, e.g. hourly from cron.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute every score from the likes and comments on record instead.',
+        )
+    
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            posts = rebuild_scores()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt trending scores from activity on {posts} post(s).'))
+            return
+        
+        decayed, dropped = decay_scores()
+        self.stdout.write(self.style.SUCCESS(f'Decayed {decayed} trending score(s) and dropped {dropped}.'))
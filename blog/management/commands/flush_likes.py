@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.likes import get_like_buffer
+
+
+class Command(BaseCommand):
+    """Apply likes waiting in the write-behind buffer"""
+    help = (
+        'Write buffered likes and unlikes to the database. Only a buffer in a shared '
+        'cache (BLOG_LIKE_BUFFER["SHARED_CACHE_ALIAS"]) is visible to this command.'
+    )
+    
+    def handle(self, *args, **options):
+        buffer = get_like_buffer()
+        if buffer is None:
+            raise CommandError('The like buffer is disabled (BLOG_LIKE_BUFFER["ENABLED"]).')
+        if not buffer.shared_alias:
+            self.stderr.write('The like buffer is in-process; each server process flushes its own.')
+        applied = buffer.flush()
+        self.stdout.write(self.style.SUCCESS(f'Applied {applied} buffered like toggle(s).'))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import BlogPost, Comment
+
+
+class Command(BaseCommand):
+    """Recompute denormalized like/comment/reply counters and repair drift"""
+    help = 'Recompute stored like, comment and reply counters from the related rows.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted rows without repairing them.',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rewrite every counter instead of only the drifted ones.',
+        )
+    
+    def handle(self, *args, **options):
+        drifted_posts = BlogPost.objects.with_counter_drift()
+        drifted_comments = Comment.objects.with_counter_drift()
+        self.stdout.write(
+            f'Found {drifted_posts.count()} blog post(s) and '
+            f'{drifted_comments.count()} comment(s) with counter drift.'
+        )
+        if options['dry_run']:
+            return
+        
+        posts = BlogPost.objects.all()
+        comments = Comment.objects.all()
+        if not options['all']:
+            posts = posts.filter(pk__in=drifted_posts.values('pk'))
+            comments = comments.filter(pk__in=drifted_comments.values('pk'))
+        
+        with transaction.atomic():
+            repaired_posts = posts.refresh_counters()
+            repaired_comments = comments.refresh_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted {repaired_posts} blog post(s) and {repaired_comments} comment(s).'
+        ))
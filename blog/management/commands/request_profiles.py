@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog_api.profiling import list_profiles, profile_dir, self_times
+
+
+class Command(BaseCommand):
+    """List and compare the saved request profiles"""
+    help = (
+        'List the request profiles saved by staff X-Blog-Profile requests, or diff two of them '
+        'by the share of time spent in each function.'
+    )
+    
+    def add_arguments(self, parser):
+        actions = parser.add_subparsers(dest='action', required=True)
+        actions.add_parser('list', help='Saved profiles, newest first.')
+        diff = actions.add_parser('diff', help='Functions whose share of the profile changed the most.')
+        diff.add_argument('before', help='Profile file name, a unique prefix of one, or its number in "list".')
+        diff.add_argument('after', help='Profile file name, a unique prefix of one, or its number in "list".')
+        diff.add_argument('--limit', type=int, default=20, help='Number of functions to show (default 20).')
+    
+    def handle(self, *args, **options):
+        if options['action'] == 'list':
+            self.list_profiles()
+        else:
+            self.diff(self.find(options['before']), self.find(options['after']), options['limit'])
+    
+    def list_profiles(self):
+        profiles = list_profiles()
+        if not profiles:
+            self.stdout.write(f'No profiles in {profile_dir()}.')
+        for number, path in enumerate(profiles, 1):
+            stat = path.stat()
+            created = datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+            self.stdout.write(f'{number:>3}  {created}  {stat.st_size / 1024:>8.1f} KiB  {path.name}')
+    
+    def find(self, name):
+        profiles = list_profiles()
+        if name.isdigit() and 0 < int(name) <= len(profiles):
+            return profiles[int(name) - 1]
+        matches = [path for path in profiles if path.name.startswith(name)]
+        if len(matches) != 1:
+            raise CommandError(f'{len(matches)} profiles match "{name}"; run "request_profiles list".')
+        return matches[0]
+    
+    def diff(self, before, after, limit):
+        shares_before = self_times(before)
+        shares_after = self_times(after)
+        changes = sorted(
+            ((shares_after.get(function, 0) - shares_before.get(function, 0), function)
+             for function in shares_before.keys() | shares_after.keys()),
+            key=lambda change: (-abs(change[0]), change[1]),
+        )[:limit]
+        self.stdout.write(f'Share of own time, {before.name} -> {after.name}')
+        for change, function in changes:
+            self.stdout.write(
+                f'{shares_before.get(function, 0):>7.1%} -> {shares_after.get(function, 0):>7.1%}  '
+                f'({change:+.1%})  {function}'
+            )
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.seeding import SIZE_PROFILES, BlogSeeder
+
+
+class Command(BaseCommand):
+    """Fill the database with a skewed synthetic dataset for scale testing"""
+    help = (
+        'Generate users, categories, posts, likes and nested comments with realistic skew. '
+        'The same --seed and sizes give the same rows. Rows are added next to existing data; '
+        'seed an empty database for repeatable numbers.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size',
+            choices=SIZE_PROFILES,
+            default='small',
+            help='Size profile: ' + ', '.join(
+                f'{name} ({sizes["posts"]:,} posts)' for name, sizes in SIZE_PROFILES.items()
+            ) + '. Default: small.',
+        )
+        for table in ('users', 'categories', 'posts', 'likes', 'comments'):
+            parser.add_argument(f'--{table}', type=int, help=f'Number of {table}, overriding the profile.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default 0).')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create (default 5000).')
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Spread posts over this many days up to now (default 365).',
+        )
+        parser.add_argument(
+            '--password',
+            default='seed-pass-123',
+            help='Password of every seeded user; they log in as seed<id>@example.com.',
+        )
+    
+    def handle(self, *args, **options):
+        sizes = {
+            table: options[table] if options[table] is not None else count
+            for table, count in SIZE_PROFILES[options['size']].items()
+        }
+        seeder = BlogSeeder(
+            **sizes,
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            days=options['days'],
+            password=options['password'],
+            log=self.progress if options['verbosity'] > 1 else None,
+        )
+        self.started = time.perf_counter()
+        try:
+            written = seeder.run()
+        except ValueError as error:
+            raise CommandError(error)
+        summary = ', '.join(f'{count:,} {table}' for table, count in written.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {summary} in {time.perf_counter() - self.started:.1f}s.'
+        ))
+    
+    def progress(self, step):
+        self.stdout.write(f'[{time.perf_counter() - self.started:7.1f}s] {step}')
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field):
+    counts = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def backfill_counters(apps, schema_editor):
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    Like = apps.get_model('blog', 'Like')
+    Comment = apps.get_model('blog', 'Comment')
+    BlogPost.objects.update(
+        likes_count=count_subquery(Like, 'blog_post'),
+        comments_count=count_subquery(Comment, 'blog_post'),
+    )
+    Comment.objects.update(replies_count=count_subquery(Comment, 'parent'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
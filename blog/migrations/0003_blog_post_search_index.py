@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from blog.search import get_search_backend
+
+
+def install_search_index(apps, schema_editor):
+    backend = get_search_backend(schema_editor.connection)
+    if backend is not None:
+        backend.install()
+
+
+def uninstall_search_index(apps, schema_editor):
+    backend = get_search_backend(schema_editor.connection)
+    if backend is not None:
+        backend.uninstall()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_blogpost_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
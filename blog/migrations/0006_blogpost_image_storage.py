@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:25
+
+import blog_api.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_blogpost_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blogpost',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=blog_api.uploads.ContentAddressedStorage(), upload_to='blog_images/'),
+        ),
+    ]
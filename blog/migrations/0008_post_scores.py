@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_export_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostScore',
+            fields=[
+                ('blog_post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='blog.blogpost')),
+                ('score', models.FloatField(default=0)),
+                ('decayed_at', models.FloatField()),
+                ('category', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.category')),
+            ],
+            options={
+                'db_table': 'post_scores',
+                'indexes': [models.Index(fields=['-score', '-blog_post'], name='post_scores_trending_idx'), models.Index(fields=['category', '-score', '-blog_post'], name='post_scores_category_idx')],
+            },
+        ),
+    ]
@@ -1,12 +1,16 @@
 from django.db import models
+from django.db.models import Count, Exists, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
-from django.utils.text import slugify
+
+from blog.slugs import UniqueSlugMixin
+from blog_api.uploads import ContentAddressedStorage
 
 
 User = get_user_model()
 
 
-class Category(models.Model):
+class Category(UniqueSlugMixin, models.Model):
     """Category model for blog posts"""
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(unique=True, blank=True)
@@ -14,10 +18,7 @@ class Category(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+    slug_source = 'name'
     
     def __str__(self):
         return self.name
@@ -29,51 +30,136 @@ class Category(models.Model):
         ordering = ['name']
 
 
-class BlogPost(models.Model):
+def _count_subquery(model, field, **filters):
+    """Correlated COUNT(*) subquery over ``model`` rows pointing at the outer post"""
+    counts = (
+        model.objects.filter(**{field: OuterRef('pk')}, **filters)
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+class BlogPostQuerySet(models.QuerySet):
+    """QuerySet for blog posts"""
+    
+    def feed(self):
+        """Join author and category so list and detail pages need a single query"""
+        return self.select_related('author', 'category')
+    
+    def with_freshness(self):
+        """Annotate the latest comment and commenter changes, for cheap HTTP validators"""
+        comments = Comment.objects.filter(blog_post=OuterRef('pk')).order_by()
+        return self.annotate(
+            last_comment_at=Subquery(
+                comments.values('blog_post').annotate(latest=Max('updated_at')).values('latest')
+            ),
+            last_commenter_at=Subquery(
+                comments.values('blog_post').annotate(latest=Max('user__updated_at')).values('latest')
+            ),
+        )
+    
+    def with_viewer_state(self, user):
+        """Annotate whether ``user`` likes each post and how many comments they left on it"""
+        return self.annotate(
+            is_liked=Exists(Like.objects.filter(user=user, blog_post=OuterRef('pk'))),
+            my_comment_count=_count_subquery(Comment, 'blog_post', user=user),
+        )
+    
+    def with_counter_drift(self):
+        """Posts whose stored like/comment counters disagree with the related rows"""
+        return self.annotate(
+            actual_likes_count=_count_subquery(Like, 'blog_post'),
+            actual_comments_count=_count_subquery(Comment, 'blog_post'),
+        ).exclude(
+            likes_count=F('actual_likes_count'),
+            comments_count=F('actual_comments_count'),
+        )
+    
+    def refresh_counters(self):
+        """Recompute stored like/comment counters in a single UPDATE"""
+        return self.update(
+            likes_count=_count_subquery(Like, 'blog_post'),
+            comments_count=_count_subquery(Comment, 'blog_post'),
+        )
+
+
+class BlogPost(UniqueSlugMixin, models.Model):
     """Blog post model"""
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, blank=True)
     description = models.TextField()
     content = models.TextField()
-    image = models.ImageField(upload_to='blog_images/', blank=True, null=True)
-    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blog_posts')
+    image = models.ImageField(
+        upload_to='blog_images/',
+        storage=ContentAddressedStorage(),
+        blank=True,
+        null=True
+    )
+    # Built in the background by blog_api.images
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    # Indexed by blog_posts_author_feed_idx
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blog_posts', db_index=False)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='blog_posts')
     is_published = models.BooleanField(default=False)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+    objects = BlogPostQuerySet.as_manager()
+    slug_source = 'title'
     
     def __str__(self):
         return self.title
     
-    @property
-    def likes_count(self):
-        return self.likes.count()
-    
-    @property
-    def comments_count(self):
-        return self.comments.count()
-    
     class Meta:
         db_table = 'blog_posts'
         verbose_name = 'Blog Post'
         verbose_name_plural = 'Blog Posts'
         ordering = ['-created_at']
+        indexes = [
+            # Public feed, newest first, with the keyset tie-breaker
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_published=True),
+                name='blog_posts_published_feed_idx'
+            ),
+            # Public feed filtered by category
+            models.Index(
+                fields=['category', '-created_at'],
+                condition=models.Q(is_published=True),
+                name='blog_posts_category_feed_idx'
+            ),
+            # An author's own posts and the feed filtered by author
+            models.Index(fields=['author', '-created_at'], name='blog_posts_author_feed_idx'),
+            # Incremental exports, oldest change first
+            models.Index(
+                fields=['updated_at', 'id'],
+                condition=models.Q(is_published=True),
+                name='blog_posts_export_idx'
+            ),
+        ]
 
 
 class Like(models.Model):
     """Like model for blog posts"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='likes')
-    blog_post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='likes')
+    # Indexed by likes_post_user_idx
+    blog_post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='likes', db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         db_table = 'likes'
         unique_together = ['user', 'blog_post']
+        indexes = [
+            # Likes of a post; the unique constraint only leads with user
+            models.Index(fields=['blog_post', 'user'], name='likes_post_user_idx'),
+            # Incremental exports, oldest first
+            models.Index(fields=['created_at', 'id'], name='likes_export_idx'),
+        ]
         verbose_name = 'Like'
         verbose_name_plural = 'Likes'
     
@@ -81,24 +167,71 @@ class Like(models.Model):
         return f"{self.user.username} likes {self.blog_post.title}"
 
 
+class CommentQuerySet(models.QuerySet):
+    """QuerySet for comments"""
+    
+    def with_counter_drift(self):
+        """Comments whose stored reply counter disagrees with the reply rows"""
+        return self.annotate(
+            actual_replies_count=_count_subquery(Comment, 'parent'),
+        ).exclude(replies_count=F('actual_replies_count'))
+    
+    def refresh_counters(self):
+        """Recompute stored reply counters in a single UPDATE"""
+        return self.update(replies_count=_count_subquery(Comment, 'parent'))
+
+
 class Comment(models.Model):
     """Comment model for blog posts"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comments')
-    blog_post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='comments')
+    # Indexed by comments_post_thread_idx
+    blog_post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='comments', db_index=False)
     content = models.TextField()
     parent = models.ForeignKey('self', on_delete=models.CASCADE, blank=True, null=True, related_name='replies')
+    replies_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CommentQuerySet.as_manager()
+    
     class Meta:
         db_table = 'comments'
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
         ordering = ['-created_at']
+        indexes = [
+            # Root comments of a post newest first, and the replies of a post
+            models.Index(fields=['blog_post', 'parent', '-created_at'], name='comments_post_thread_idx'),
+            # Incremental exports, oldest change first
+            models.Index(fields=['updated_at', 'id'], name='comments_export_idx'),
+        ]
     
     def __str__(self):
         return f"Comment by {self.user.username} on {self.blog_post.title}"
+
+
+class PostScore(models.Model):
+    """Time-decayed activity score of a post, for the trending ordering
+    
+    Maintained by blog.trending: likes and comments add to ``score`` as they
+    happen, and ``decay_trending_scores`` scales it down for the time passed
+    since ``decayed_at``.
+    """
+    blog_post = models.OneToOneField(BlogPost, on_delete=models.CASCADE, primary_key=True, related_name='score')
+    # Copied from the post so category feeds can walk post_scores_category_idx
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+', db_index=False)
+    score = models.FloatField(default=0)
+    # Unix time the score was last decayed to
+    decayed_at = models.FloatField()
     
-    @property
-    def replies_count(self):
-        return self.replies.count()
+    class Meta:
+        db_table = 'post_scores'
+        indexes = [
+            # Trending feed, hottest first, newest post first on ties
+            models.Index(fields=['-score', '-blog_post'], name='post_scores_trending_idx'),
+            # Trending feed filtered by category
+            models.Index(fields=['category', '-score', '-blog_post'], name='post_scores_category_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.blog_post_id}: {self.score:.2f}'
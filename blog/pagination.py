@@ -0,0 +1,171 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+from functools import partial
+
+from django.core.paginator import InvalidPage, Paginator as DjangoPaginator
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only keyset pagination on (created_at, id) with opaque cursors"""
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    mode = 'cursor'
+    invalid_cursor_message = _('Invalid cursor')
+    invalid_ordering_message = _('Cursor pagination only supports ordering by created_at.')
+    
+    @classmethod
+    def is_requested(cls, request):
+        return (
+            cls.cursor_query_param in request.query_params
+            or request.query_params.get(cls.mode_query_param) == cls.mode
+        )
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request, view)))
+    
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, fetching with the async ORM"""
+        return self.set_page([row async for row in self.get_page_queryset(queryset, request, view)])
+    
+    def get_page_queryset(self, queryset, request, view=None):
+        """Unevaluated queryset of the requested page plus one row to detect a next page"""
+        self.request = request
+        self.descending = self.get_descending(request, view)
+        position = self.decode_cursor(request)
+        
+        if position is not None:
+            created_at, pk = position
+            if self.descending:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+                )
+        
+        ordering = ('-created_at', '-pk') if self.descending else ('created_at', 'pk')
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+    
+    def set_page(self, results):
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.next_position = self.get_position(results[-1]) if self.has_next else None
+        return results
+    
+    def get_descending(self, request, view):
+        param = api_settings.ORDERING_PARAM
+        ordering = request.query_params.get(param)
+        if not ordering:
+            return True
+        if ordering.strip() == 'created_at':
+            return False
+        if ordering.strip() == '-created_at':
+            return True
+        raise ValidationError({param: self.invalid_ordering_message})
+    
+    def get_position(self, row):
+        if isinstance(row, dict):
+            # A .values() row from a compiled list view
+            return row['created_at'], row['id']
+        return row.created_at, row.pk
+    
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            decoded = urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            created_at, pk = decoded.rsplit('|', 1)
+            return datetime.fromisoformat(created_at), int(pk)
+        except (BinasciiError, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+    
+    def encode_cursor(self, position):
+        created_at, pk = position
+        raw = f'{created_at.isoformat()}|{pk}'
+        return urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+    
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, PageNumberPagination.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class CountedPaginator(DjangoPaginator):
+    """Django paginator that can reuse a row count the view already knows"""
+    
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.__dict__['count'] = count
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """Page-number pagination that switches to keyset pagination on request
+    
+    Views that have already counted the filtered queryset can set
+    ``paginator_count`` to spare the paginator its own COUNT(*).
+    """
+    keyset_class = KeysetPagination
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.is_requested(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.django_paginator_class = partial(
+            CountedPaginator,
+            count=getattr(view, 'paginator_count', None)
+        )
+        return super().paginate_queryset(queryset, request, view)
+    
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, counting and fetching with the async ORM"""
+        self.keyset = None
+        if self.keyset_class.is_requested(request):
+            self.keyset = self.keyset_class()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+        
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        count = getattr(view, 'paginator_count', None)
+        if count is None:
+            count = await queryset.acount()
+        paginator = CountedPaginator(queryset, page_size, count=count)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        
+        # Paginator.page() only slices the queryset; fetch the slice here
+        self.page.object_list = [row async for row in self.page.object_list]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+    
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,129 @@
+"""
+JSON renderer for the blog API.
+
+``BlogJSONRenderer`` renders the same JSON as DRF's ``JSONRenderer``.
+It encodes with orjson when that is installed. Datetimes and other
+non-JSON types still go through DRF's encoder. A document orjson cannot
+encode (e.g. an integer above 64 bits) falls back to the stdlib encoder.
+
+With orjson the bytes differ in two places. Floats in exponent form are
+written the shortest way (``1e16`` rather than ``1e+16``, ``1e-7`` rather
+than ``1e-07``); they parse to the same value. NaN and infinity are written
+as ``null``, where ``JSONRenderer`` in strict mode raises ``ValueError``.
+The API serializes no floats of its own, so only custom payloads see this.
+
+``FragmentJSONRenderer`` also caches the author and category objects that
+repeat from post to post. Each is encoded once per request, keyed by kind,
+id and ``updated_at``, and spliced into the output wherever it appears.
+Marking those objects means copying the data in Python, and that costs
+more than encoding them again with either encoder. So it is not the
+default (see ``benchmarks/bench_renderers.py``). It pays off only when the
+repeated objects are large compared to the rest of the page.
+
+Indented output is left entirely to ``JSONRenderer``. So is output with
+non-compact separators.
+"""
+
+import re
+import secrets
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import json as drf_json
+
+from blog_api.metrics import phase
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class BlogJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` that encodes with orjson when it is installed"""
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        with phase('render'):
+            if self.get_indent(accepted_media_type, renderer_context) is not None or not self.compact:
+                return super().render(data, accepted_media_type, renderer_context)
+            return self.encode(data)
+    
+    def encode(self, data):
+        """Compact UTF-8 JSON of ``data``; see the module docstring for how it differs from ``JSONRenderer``"""
+        if orjson is not None and not self.ensure_ascii:
+            try:
+                output = orjson.dumps(
+                    data,
+                    default=self.encoder_class().default,
+                    option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+                )
+            except (orjson.JSONEncodeError, TypeError):
+                pass
+            else:
+                return output.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        
+        output = drf_json.dumps(
+            data, cls=self.encoder_class, ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict, separators=(',', ':')
+        )
+        return output.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+
+
+class FragmentJSONRenderer(BlogJSONRenderer):
+    """``BlogJSONRenderer`` that encodes repeated author/category objects once per request"""
+    # Keys holding a cacheable object, mapped to the kind of object they hold
+    fragment_keys = {'author': 'user', 'user': 'user', 'category': 'category'}
+    # Keys whose values may contain fragments further down
+    container_keys = ('results', 'replies', 'blog_post', 'comment')
+    
+    def __init__(self):
+        self.fragments = {}
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        
+        token = secrets.token_hex(8)
+        spliced = []
+        output = self.encode(self.extract_fragments(data, token, spliced))
+        if not spliced:
+            return output
+        # Placeholders start with a NUL, which both encoders escape as \u0000
+        placeholder = re.compile(rb'"\\u0000' + token.encode() + rb':(\d+)"')
+        return placeholder.sub(lambda match: spliced[int(match[1])], output)
+    
+    def extract_fragments(self, data, token, spliced):
+        """Copy of ``data`` with cacheable objects swapped for placeholders into ``spliced``"""
+        if isinstance(data, list):
+            return [self.extract_fragments(item, token, spliced) for item in data]
+        if not isinstance(data, dict):
+            return data
+        
+        result = dict(data)
+        for key, value in data.items():
+            if not isinstance(value, (dict, list)):
+                continue
+            kind = self.fragment_keys.get(key)
+            if kind is not None and isinstance(value, dict) and 'id' in value and 'updated_at' in value:
+                spliced.append(self.get_fragment(kind, value))
+                result[key] = f'\x00{token}:{len(spliced) - 1}'
+            elif key in self.container_keys:
+                result[key] = self.extract_fragments(value, token, spliced)
+        return result
+    
+    def get_fragment(self, kind, value):
+        key = (kind, value['id'], value['updated_at'])
+        if key not in self.fragments:
+            self.fragments[key] = self.encode(value)
+        return self.fragments[key]
+
+
+class NDJSONRenderer(BlogJSONRenderer):
+    """Lets views that stream NDJSON negotiate it; error bodies render as one JSON line"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
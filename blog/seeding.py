@@ -0,0 +1,325 @@
+"""
+Synthetic data for scale testing (``manage.py seed_blog``).
+
+Rows come from a seeded ``random.Random``. The same seed and sizes give the
+same users, posts, likes and comments; timestamps are relative to when the
+command runs. Activity is skewed the way real blogs are:
+
+* posts per author, posts per category, and likes and comments per post
+  follow a Zipf distribution over a random ranking;
+* most replies answer the comment just before them, which builds deep
+  reply chains on busy posts.
+
+Primary keys are assigned here, so replies can point at their parents and
+the stored counters are filled in before the rows are written with batched
+``bulk_create``. No signal handler or recount runs per row; the search
+index and trending scores are rebuilt once at the end.
+"""
+
+import bisect
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from blog.cache import CATEGORIES, POSTS, USERS, bump_generations, category_generation
+from blog.models import BlogPost, Category, Comment, Like
+from blog.search import get_search_backend
+from blog.slugs import base_slug
+from blog.trending import rebuild_scores
+
+
+User = get_user_model()
+
+# name: row counts
+SIZE_PROFILES = {
+    'tiny': {'users': 50, 'categories': 5, 'posts': 500, 'likes': 2000, 'comments': 1500},
+    'small': {'users': 1000, 'categories': 10, 'posts': 10000, 'likes': 50000, 'comments': 30000},
+    'medium': {'users': 20000, 'categories': 25, 'posts': 100000, 'likes': 500000, 'comments': 300000},
+    'large': {'users': 200000, 'categories': 50, 'posts': 1000000, 'likes': 5000000, 'comments': 3000000},
+}
+
+WORDS = (
+    'api', 'async', 'batch', 'benchmark', 'build', 'cache', 'cloud', 'code', 'data', 'database',
+    'debug', 'deploy', 'design', 'django', 'edge', 'error', 'feature', 'feed', 'index', 'latency',
+    'library', 'memory', 'model', 'network', 'open', 'pattern', 'performance', 'python', 'query',
+    'queue', 'release', 'request', 'scale', 'schema', 'search', 'server', 'service', 'source',
+    'stack', 'storage', 'stream', 'system', 'test', 'thread', 'tool', 'traffic', 'update', 'web',
+)
+FIRST_NAMES = ('Ada', 'Alan', 'Barbara', 'Dennis', 'Edsger', 'Grace', 'Guido', 'Ken', 'Linus', 'Margaret')
+LAST_NAMES = ('Hopper', 'Knuth', 'Lamport', 'Liskov', 'Lovelace', 'Ritchie', 'Rossum', 'Thompson', 'Turing')
+
+
+def zipf_weights(count, exponent):
+    """Cumulative weights of ``count`` ranks under Zipf's law, for ``random.choices``"""
+    return list(itertools.accumulate((rank + 1) ** -exponent for rank in range(count)))
+
+
+def zipf_counts(rng, total, slots, exponent, cap=None):
+    """Split about ``total`` over ``slots``, the slot ranked r getting a share proportional to r**-exponent
+    
+    With ``cap``, the top ranks are held at the cap and what they cannot take
+    is spread over the rest the same way.
+    """
+    if not slots:
+        return []
+    weights = [(rank + 1) ** -exponent for rank in range(slots)]
+    remaining = sum(weights)
+    capped = 0
+    scale = total / remaining
+    if cap is not None:
+        while capped < slots and weights[capped] * scale > cap:
+            remaining -= weights[capped]
+            capped += 1
+            scale = max(total - capped * cap, 0) / remaining if remaining else 0
+    ranks = list(range(slots))
+    rng.shuffle(ranks)
+    counts = []
+    for rank in ranks:
+        expected = cap if rank < capped else scale * weights[rank]
+        # Round up with the probability of the fraction, so the total holds
+        counts.append(int(expected) + (rng.random() < expected % 1))
+    return counts
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let ``bulk_create`` keep the given ``auto_now``/``auto_now_add`` values instead of now"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def next_pk(model):
+    return (model._default_manager.aggregate(highest=Max('pk'))['highest'] or 0) + 1
+
+
+def unique_slug(model, value, pk):
+    """Slug of ``value`` made unique by the primary key the row is about to get"""
+    suffix = f'-{pk}'
+    max_length = model._meta.get_field('slug').max_length
+    return base_slug(model, value)[:max_length - len(suffix)].strip('-') + suffix
+
+
+class BlogSeeder:
+    """Generates and writes one synthetic dataset"""
+    
+    def __init__(
+        self, users, categories, posts, likes, comments, seed=0, batch_size=5000,
+        exponent=1.1, reply_rate=0.7, chain_rate=0.85, published_rate=0.9, days=365,
+        password='seed-pass-123', log=None,
+    ):
+        self.sizes = {'users': users, 'categories': categories, 'posts': posts, 'likes': likes, 'comments': comments}
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.exponent = exponent
+        self.reply_rate = reply_rate
+        self.chain_rate = chain_rate
+        self.published_rate = published_rate
+        self.password = password
+        self.log = log or (lambda message: None)
+        self.now = timezone.now().replace(microsecond=0)
+        self.start = self.now - timedelta(days=days)
+    
+    def run(self):
+        """Write the dataset; returns the number of rows written per table"""
+        if self.sizes['users'] < 1 or self.sizes['categories'] < 1:
+            raise ValueError('At least one user and one category are needed.')
+        written = {}
+        with explicit_timestamps(User, Category, BlogPost, Like, Comment):
+            for table, seed in (
+                ('users', self.seed_users),
+                ('categories', self.seed_categories),
+                ('posts', self.seed_posts),
+                ('likes', self.seed_likes),
+                ('comments', self.seed_comments),
+            ):
+                with transaction.atomic():
+                    written[table] = seed()
+                self.log(f'{table}: {written[table]}')
+        self.finish()
+        return written
+    
+    def write(self, model, rows):
+        """``bulk_create`` the instances from ``rows`` ``batch_size`` at a time"""
+        written = 0
+        iterator = iter(rows)
+        while batch := list(itertools.islice(iterator, self.batch_size)):
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+            written += len(batch)
+        return written
+    
+    def moment(self, after, skew=1):
+        """A time between ``after`` and now, ``skew`` > 1 favouring the start"""
+        return after + (self.now - after) * self.rng.random() ** skew
+    
+    def words(self, low, high):
+        return ' '.join(self.rng.choices(WORDS, k=self.rng.randint(low, high)))
+    
+    def seed_users(self):
+        first = self.first_user = next_pk(User)
+        # Hashing once keeps the seed fast; every seeded user shares the password
+        password = make_password(self.password)
+        
+        def rows():
+            for pk in range(first, first + self.sizes['users']):
+                # Everyone joined before the first post
+                joined = self.start - timedelta(days=30) * self.rng.random()
+                yield User(
+                    pk=pk,
+                    username=f'seed{pk}',
+                    email=f'seed{pk}@example.com',
+                    password=password,
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    date_joined=joined,
+                    created_at=joined,
+                    updated_at=joined,
+                )
+        return self.write(User, rows())
+    
+    def seed_categories(self):
+        first = self.first_category = next_pk(Category)
+        
+        def rows():
+            for pk in range(first, first + self.sizes['categories']):
+                name = f'{self.rng.choice(WORDS).title()} {pk}'
+                yield Category(
+                    pk=pk,
+                    name=name,
+                    slug=unique_slug(Category, name, pk),
+                    description=self.words(5, 15),
+                    created_at=self.start,
+                    updated_at=self.start,
+                )
+        return self.write(Category, rows())
+    
+    def seed_posts(self):
+        posts = self.sizes['posts']
+        first = self.first_post = next_pk(BlogPost)
+        self.published = [self.rng.random() < self.published_rate for _ in range(posts)]
+        published = [index for index, flag in enumerate(self.published) if flag]
+        # Likes and comments only reach published posts, as through the API
+        self.likes = [0] * posts
+        self.comments = [0] * posts
+        like_counts = zipf_counts(self.rng, self.sizes['likes'], len(published), self.exponent, self.sizes['users'])
+        comment_counts = zipf_counts(self.rng, self.sizes['comments'], len(published), self.exponent)
+        for index, likes, comments in zip(published, like_counts, comment_counts):
+            self.likes[index] = likes
+            self.comments[index] = comments
+        self.created = []
+        
+        authors = zipf_weights(self.sizes['users'], self.exponent)
+        categories = zipf_weights(self.sizes['categories'], self.exponent)
+        
+        def rows():
+            for index in range(posts):
+                pk = first + index
+                # Newer posts get higher ids, as when they are written one by one
+                created_at = self.start + (self.now - self.start) * (index / posts)
+                self.created.append(created_at)
+                title = self.words(3, 8).capitalize()
+                yield BlogPost(
+                    pk=pk,
+                    title=title,
+                    slug=unique_slug(BlogPost, title, pk),
+                    description=self.words(10, 25),
+                    content=self.words(40, 120),
+                    author_id=self.first_user + self.pick(authors),
+                    category_id=self.first_category + self.pick(categories),
+                    is_published=self.published[index],
+                    likes_count=self.likes[index],
+                    comments_count=self.comments[index],
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+        return self.write(BlogPost, rows())
+    
+    def pick(self, cumulative_weights):
+        """Index drawn from ``cumulative_weights``"""
+        return bisect.bisect(cumulative_weights, self.rng.random() * cumulative_weights[-1])
+    
+    def seed_likes(self):
+        users = self.sizes['users']
+        
+        def rows():
+            for index, count in enumerate(self.likes):
+                for user in self.rng.sample(range(users), count):
+                    yield Like(
+                        user_id=self.first_user + user,
+                        blog_post_id=self.first_post + index,
+                        created_at=self.moment(self.created[index], skew=3),
+                    )
+        return self.write(Like, rows())
+    
+    def seed_comments(self):
+        users = self.sizes['users']
+        first = next_pk(Comment)
+        
+        def rows():
+            pk = first
+            for index, count in enumerate(self.comments):
+                if not count:
+                    continue
+                parents = []
+                for position in range(count):
+                    parent = None
+                    if position and self.rng.random() < self.reply_rate:
+                        # Mostly answer the latest comment, which grows long chains
+                        parent = position - 1 if self.rng.random() < self.chain_rate else self.rng.randrange(position)
+                    parents.append(parent)
+                replies = [0] * count
+                for parent in parents:
+                    if parent is not None:
+                        replies[parent] += 1
+                # Sorted, so every reply comes after its parent
+                moments = sorted(self.moment(self.created[index], skew=3) for _ in range(count))
+                for position, parent in enumerate(parents):
+                    yield Comment(
+                        pk=pk + position,
+                        user_id=self.first_user + self.rng.randrange(users),
+                        blog_post_id=self.first_post + index,
+                        content=self.words(5, 30).capitalize(),
+                        parent_id=None if parent is None else pk + parent,
+                        replies_count=replies[position],
+                        created_at=moments[position],
+                        updated_at=moments[position],
+                    )
+                pk += count
+        return self.write(Comment, rows())
+    
+    def finish(self):
+        """Rebuild what the skipped signals would have maintained
+        
+        The rows were written with explicit primary keys, which sequences
+        (PostgreSQL, Oracle) do not see; they are moved past the seeded ids.
+        """
+        statements = connection.ops.sequence_reset_sql(no_style(), [User, Category, BlogPost, Like, Comment])
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+        backend = get_search_backend()
+        if backend is not None:
+            self.log('search index')
+            backend.install()
+        self.log('trending scores')
+        rebuild_scores()
+        slugs = Category.objects.filter(pk__gte=self.first_category).values_list('slug', flat=True)
+        bump_generations(POSTS, CATEGORIES, USERS, *(category_generation(slug) for slug in slugs))
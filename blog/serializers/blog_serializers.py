@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from blog.models import Category, BlogPost, Like, Comment
 from authentication.serializers.user_serializers import UserProfileSerializer
+from blog_api.images import RenditionsField
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -16,6 +17,7 @@ class BlogPostListSerializer(serializers.ModelSerializer):
     """Serializer for BlogPost list view"""
     author = UserProfileSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
+    image_renditions = RenditionsField('image')
     likes_count = serializers.ReadOnlyField()
     comments_count = serializers.ReadOnlyField()
     
@@ -23,15 +25,25 @@ class BlogPostListSerializer(serializers.ModelSerializer):
         model = BlogPost
         fields = (
             'id', 'title', 'slug', 'description', 'image', 
-            'author', 'category', 'is_published', 'likes_count', 
-            'comments_count', 'created_at', 'updated_at'
+            'image_renditions', 'author', 'category', 'is_published',
+            'likes_count', 'comments_count', 'created_at', 'updated_at'
         )
 
 
+class ViewerBlogPostListSerializer(BlogPostListSerializer):
+    """``BlogPostListSerializer`` plus the requesting user's state, from ``with_viewer_state``"""
+    is_liked = serializers.BooleanField(read_only=True)
+    my_comment_count = serializers.IntegerField(read_only=True)
+    
+    class Meta(BlogPostListSerializer.Meta):
+        fields = BlogPostListSerializer.Meta.fields + ('is_liked', 'my_comment_count')
+
+
 class BlogPostDetailSerializer(serializers.ModelSerializer):
     """Serializer for BlogPost detail view"""
     author = UserProfileSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
+    image_renditions = RenditionsField('image')
     likes_count = serializers.ReadOnlyField()
     comments_count = serializers.ReadOnlyField()
     
@@ -39,8 +51,8 @@ class BlogPostDetailSerializer(serializers.ModelSerializer):
         model = BlogPost
         fields = (
             'id', 'title', 'slug', 'description', 'content', 'image',
-            'author', 'category', 'is_published', 'likes_count',
-            'comments_count', 'created_at', 'updated_at'
+            'image_renditions', 'author', 'category', 'is_published',
+            'likes_count', 'comments_count', 'created_at', 'updated_at'
         )
 
 
@@ -72,7 +84,7 @@ class LikeSerializer(serializers.ModelSerializer):
 class CommentSerializer(serializers.ModelSerializer):
     """Serializer for Comment model"""
     user = UserProfileSerializer(read_only=True)
-    replies_count = serializers.ReadOnlyField()
+    replies_count = serializers.SerializerMethodField()
     replies = serializers.SerializerMethodField()
     
     class Meta:
@@ -83,10 +95,22 @@ class CommentSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('id', 'created_at', 'updated_at')
     
+    def get_replies_count(self, obj):
+        tree = self.context.get('comment_tree')
+        if tree is None:
+            return obj.replies_count
+        return tree.replies_count(obj)
+    
     def get_replies(self, obj):
-        if obj.replies.exists():
-            return CommentSerializer(obj.replies.all(), many=True).data
-        return []
+        tree = self.context.get('comment_tree')
+        if tree is None:
+            if obj.replies.exists():
+                return CommentSerializer(obj.replies.all(), many=True).data
+            return []
+        
+        depth = self.context.get('comment_depth', 0) + 1
+        context = {**self.context, 'comment_depth': depth}
+        return CommentSerializer(tree.replies(obj, depth), many=True, context=context).data
     
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
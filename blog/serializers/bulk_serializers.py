@@ -0,0 +1,234 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from blog.cache import POSTS, bump_generations, category_generation, post_generation
+from blog.models import Category, BlogPost, Like, Comment
+from blog.search import get_search_backend
+from blog.slugs import SAVE_ATTEMPTS, allocate_slugs, is_slug_collision
+from blog.trending import add_scores
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField resolved from one lookup for the whole batch"""
+    
+    def prefetch(self, values):
+        pks = set()
+        for value in values:
+            if isinstance(value, bool):
+                continue
+            try:
+                pks.add(int(value))
+            except (TypeError, ValueError):
+                pass
+        self._prefetched = self.get_queryset().in_bulk(pks)
+    
+    def to_internal_value(self, data):
+        prefetched = getattr(self, '_prefetched', None)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return prefetched[pk]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """ListSerializer that keeps valid items when others fail validation
+    
+    Per-item errors are collected in ``item_errors`` (keyed by position) and
+    ``validated_data`` only holds the valid items, whose positions are in
+    ``valid_indexes``. Related objects are loaded once for the whole batch.
+    """
+    
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            message = self.error_messages['not_a_list'].format(input_type=type(data).__name__)
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [message]
+            }, code='not_a_list')
+        
+        if not self.allow_empty and len(data) == 0:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [self.error_messages['empty']]
+            }, code='empty')
+        
+        if self.max_length is not None and len(data) > self.max_length:
+            message = self.error_messages['max_length'].format(max_length=self.max_length)
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [message]
+            }, code='max_length')
+        
+        for name, field in self.child.fields.items():
+            if isinstance(field, PrefetchedPrimaryKeyRelatedField) and not field.read_only:
+                field.prefetch(item.get(name) for item in data if isinstance(item, dict))
+        
+        self.item_errors = {}
+        self.valid_indexes = []
+        validated = []
+        for index, item in enumerate(data):
+            try:
+                validated.append(self.run_child_validation(item))
+            except serializers.ValidationError as exc:
+                self.item_errors[index] = exc.detail
+            else:
+                self.valid_indexes.append(index)
+        return validated
+    
+    def create(self, validated_data):
+        return self.child.bulk_create(validated_data, batch_size=self.context.get('batch_size'))
+    
+    def results(self, instances):
+        """Per-item outcome in input order, without echoing the payloads back"""
+        results = [
+            {'index': index, 'status': 'invalid', 'errors': errors}
+            for index, errors in self.item_errors.items()
+        ]
+        results.extend(
+            {'index': index, **self.child.result(instance)}
+            for index, instance in zip(self.valid_indexes, instances)
+        )
+        return sorted(results, key=lambda result: result['index'])
+
+
+class BlogPostBulkSerializer(serializers.ModelSerializer):
+    """Serializer for bulk-creating BlogPost"""
+    category = PrefetchedPrimaryKeyRelatedField(queryset=Category.objects.all())
+    
+    class Meta:
+        model = BlogPost
+        fields = ('title', 'description', 'content', 'category', 'is_published')
+        list_serializer_class = BulkListSerializer
+    
+    def bulk_create(self, validated_data, batch_size=None):
+        author = self.context['request'].user
+        titles = [attrs['title'] for attrs in validated_data]
+        for attempt in range(SAVE_ATTEMPTS):
+            slugs = allocate_slugs(BlogPost, titles)
+            try:
+                with transaction.atomic(using=router.db_for_write(BlogPost)):
+                    posts = BlogPost.objects.bulk_create(
+                        [BlogPost(author=author, slug=slug, **attrs) for attrs, slug in zip(validated_data, slugs)],
+                        batch_size=batch_size
+                    )
+                break
+            except IntegrityError:
+                # A concurrent writer took one of the slugs; allocate the batch again
+                if attempt == SAVE_ATTEMPTS - 1 or not is_slug_collision(BlogPost, slugs):
+                    raise
+        
+        # bulk_create sends no signals, so index and invalidate here
+        backend = get_search_backend(connections[router.db_for_write(BlogPost)])
+        if backend is not None:
+            backend.index(posts)
+        bump_generations(POSTS, *{category_generation(post.category.slug) for post in posts})
+        return posts
+    
+    def result(self, post):
+        return {'status': 'created', 'id': post.pk, 'slug': post.slug}
+
+
+class CommentBulkSerializer(serializers.ModelSerializer):
+    """Serializer for bulk-creating Comment"""
+    blog_post = PrefetchedPrimaryKeyRelatedField(
+        queryset=BlogPost.objects.filter(is_published=True).select_related('category')
+    )
+    parent = PrefetchedPrimaryKeyRelatedField(
+        queryset=Comment.objects.all(), required=False, allow_null=True
+    )
+    
+    class Meta:
+        model = Comment
+        fields = ('content', 'blog_post', 'parent')
+        list_serializer_class = BulkListSerializer
+    
+    def validate(self, attrs):
+        parent = attrs.get('parent')
+        if parent is not None and parent.blog_post_id != attrs['blog_post'].pk:
+            raise serializers.ValidationError({'parent': 'Parent comment belongs to another post.'})
+        return attrs
+    
+    def bulk_create(self, validated_data, batch_size=None):
+        user = self.context['request'].user
+        comments = Comment.objects.bulk_create(
+            [Comment(user=user, **attrs) for attrs in validated_data],
+            batch_size=batch_size
+        )
+        
+        posts = {attrs['blog_post'].pk: attrs['blog_post'] for attrs in validated_data}
+        parent_ids = {attrs['parent'].pk for attrs in validated_data if attrs.get('parent')}
+        BlogPost.objects.filter(pk__in=posts).refresh_counters()
+        if parent_ids:
+            Comment.objects.filter(pk__in=parent_ids).refresh_counters()
+        weight = settings.BLOG_TRENDING['COMMENT_WEIGHT']
+        counts = Counter(attrs['blog_post'].pk for attrs in validated_data)
+        add_scores({pk: count * weight for pk, count in counts.items()})
+        bump_generations(POSTS, *_post_generations(posts.values()))
+        return comments
+    
+    def result(self, comment):
+        return {'status': 'created', 'id': comment.pk}
+
+
+class LikeBulkSerializer(serializers.ModelSerializer):
+    """Serializer for bulk-creating Like; posts already liked are left as they are"""
+    blog_post = PrefetchedPrimaryKeyRelatedField(
+        queryset=BlogPost.objects.filter(is_published=True).select_related('category')
+    )
+    
+    class Meta:
+        model = Like
+        fields = ('blog_post',)
+        list_serializer_class = BulkListSerializer
+    
+    def bulk_create(self, validated_data, batch_size=None):
+        user = self.context['request'].user
+        posts = {attrs['blog_post'].pk: attrs['blog_post'] for attrs in validated_data}
+        liked = set(
+            Like.objects.filter(user=user, blog_post__in=posts).values_list('blog_post_id', flat=True)
+        )
+        
+        likes = []
+        new_posts = set()
+        for attrs in validated_data:
+            like = Like(user=user, blog_post=attrs['blog_post'])
+            like.created = like.blog_post_id not in liked and like.blog_post_id not in new_posts
+            if like.created:
+                new_posts.add(like.blog_post_id)
+            likes.append(like)
+        
+        if new_posts:
+            # Conflicts can only come from a concurrent like; the counters
+            # are recomputed from the rows either way
+            Like.objects.bulk_create(
+                [like for like in likes if like.created],
+                batch_size=batch_size,
+                ignore_conflicts=True
+            )
+            BlogPost.objects.filter(pk__in=new_posts).refresh_counters()
+            add_scores(dict.fromkeys(new_posts, settings.BLOG_TRENDING['LIKE_WEIGHT']))
+            bump_generations(POSTS, *_post_generations(posts[pk] for pk in new_posts))
+        return likes
+    
+    def result(self, like):
+        return {
+            'status': 'created' if like.created else 'unchanged',
+            'blog_post': like.blog_post_id,
+        }
+
+
+def _post_generations(posts):
+    generations = set()
+    for post in posts:
+        generations.add(post_generation(post.slug))
+        generations.add(category_generation(post.category.slug))
+    return generations
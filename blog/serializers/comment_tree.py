@@ -0,0 +1,70 @@
+from collections import defaultdict
+
+from blog.models import Comment
+
+
+class CommentTree:
+    """Reply tree for a blog post, loaded in one query and assembled in memory"""
+    
+    def __init__(self, replies, max_depth=None, max_replies=None):
+        self.max_depth = max_depth
+        self.max_replies = max_replies
+        self._children = defaultdict(list)
+        for reply in replies:
+            self._children[self.parent_of(reply)].append(reply)
+    
+    @staticmethod
+    def parent_of(comment):
+        return comment.parent_id
+    
+    @staticmethod
+    def key_of(comment):
+        return comment.pk
+    
+    @staticmethod
+    def replies_queryset(blog_post):
+        """Every reply on ``blog_post`` with its user joined"""
+        return Comment.objects.filter(
+            blog_post=blog_post,
+            parent__isnull=False
+        ).select_related('user')
+    
+    @classmethod
+    def for_post(cls, blog_post, **kwargs):
+        return cls(cls.replies_queryset(blog_post), **kwargs)
+    
+    @classmethod
+    async def afor_post(cls, blog_post, **kwargs):
+        return cls([reply async for reply in cls.replies_queryset(blog_post)], **kwargs)
+    
+    def replies_count(self, comment):
+        return len(self._children.get(self.key_of(comment), ()))
+    
+    def replies(self, comment, depth):
+        """Direct replies to ``comment`` rendered at ``depth``, honouring the limits"""
+        if self.max_depth is not None and depth > self.max_depth:
+            return []
+        replies = self._children.get(self.key_of(comment), [])
+        if self.max_replies is not None:
+            replies = replies[:self.max_replies]
+        return replies
+
+
+class CommentRowTree(CommentTree):
+    """``CommentTree`` over ``.values()`` rows, for compiled serializers"""
+    
+    @staticmethod
+    def parent_of(row):
+        return row['parent']
+    
+    @staticmethod
+    def key_of(row):
+        return row['id']
+    
+    @classmethod
+    def for_post(cls, blog_post, lookups, **kwargs):
+        return cls(cls.replies_queryset(blog_post).values(*lookups), **kwargs)
+    
+    @classmethod
+    async def afor_post(cls, blog_post, lookups, **kwargs):
+        return cls([row async for row in cls.replies_queryset(blog_post).values(*lookups)], **kwargs)
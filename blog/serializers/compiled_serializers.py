@@ -0,0 +1,38 @@
+from blog.serializers.blog_serializers import (
+    BlogPostListSerializer,
+    CategorySerializer,
+    CommentSerializer,
+    ViewerBlogPostListSerializer,
+)
+from blog_api.compiled_serializers import CompiledSerializer
+
+
+class CompiledCategorySerializer(CompiledSerializer):
+    """Compiled ``CategorySerializer``"""
+    serializer_class = CategorySerializer
+
+
+class CompiledBlogPostListSerializer(CompiledSerializer):
+    """Compiled ``BlogPostListSerializer``"""
+    serializer_class = BlogPostListSerializer
+
+
+class CompiledViewerBlogPostListSerializer(CompiledSerializer):
+    """Compiled ``ViewerBlogPostListSerializer``"""
+    serializer_class = ViewerBlogPostListSerializer
+
+
+class CompiledCommentSerializer(CompiledSerializer):
+    """Compiled ``CommentSerializer``; needs a ``CommentRowTree`` as ``comment_tree``"""
+    serializer_class = CommentSerializer
+    
+    def get_replies_count(self, row, context):
+        return context['comment_tree'].replies_count(row)
+    
+    def get_replies(self, row, context):
+        depth = context.get('comment_depth', 0) + 1
+        context = {**context, 'comment_depth': depth}
+        return [
+            self.to_representation(reply, context)
+            for reply in context['comment_tree'].replies(row, depth)
+        ]
@@ -0,0 +1,52 @@
+from rest_framework import serializers
+
+from blog.models import BlogPost, Comment, Like
+from blog_api.compiled_serializers import CompiledSerializer
+
+
+class BlogPostExportSerializer(serializers.ModelSerializer):
+    """Flat BlogPost record for the NDJSON export
+    
+    Only columns whose changes move ``updated_at`` are exported, so an
+    incremental pull never misses one. The stored counters change through
+    ``UPDATE ... SET count = count + 1``, which leaves ``updated_at`` alone;
+    consumers count the like and comment exports instead.
+    """
+    
+    class Meta:
+        model = BlogPost
+        fields = (
+            'id', 'title', 'slug', 'description', 'content', 'image', 'author',
+            'category', 'is_published', 'created_at', 'updated_at'
+        )
+
+
+class CommentExportSerializer(serializers.ModelSerializer):
+    """Flat Comment record for the NDJSON export; ``replies_count`` is left out as on posts"""
+    
+    class Meta:
+        model = Comment
+        fields = ('id', 'user', 'blog_post', 'parent', 'content', 'created_at', 'updated_at')
+
+
+class LikeExportSerializer(serializers.ModelSerializer):
+    """Like record for the NDJSON export"""
+    
+    class Meta:
+        model = Like
+        fields = ('id', 'user', 'blog_post', 'created_at')
+
+
+class CompiledBlogPostExportSerializer(CompiledSerializer):
+    """Compiled ``BlogPostExportSerializer``"""
+    serializer_class = BlogPostExportSerializer
+
+
+class CompiledCommentExportSerializer(CompiledSerializer):
+    """Compiled ``CommentExportSerializer``"""
+    serializer_class = CommentExportSerializer
+
+
+class CompiledLikeExportSerializer(CompiledSerializer):
+    """Compiled ``LikeExportSerializer``"""
+    serializer_class = LikeExportSerializer
@@ -0,0 +1,201 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router, connections
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from blog.cache import (
+    CATEGORIES,
+    POSTS,
+    USERS,
+    bump_generations,
+    category_generation,
+    post_generation,
+)
+from blog.models import Category, BlogPost, Like, Comment, PostScore
+from blog.search import get_search_backend
+from blog.trending import add_scores
+from blog_api.images import renditions_ready, sync_renditions
+
+
+User = get_user_model()
+
+
+def _search_backend(instance):
+    return get_search_backend(connections[router.db_for_write(BlogPost, instance=instance)])
+
+
+@receiver(post_save, sender=BlogPost)
+def index_blog_post(sender, instance, **kwargs):
+    """Keep the full-text index in step with saved posts"""
+    backend = _search_backend(instance)
+    if backend is not None:
+        backend.index([instance])
+
+
+@receiver(post_delete, sender=BlogPost)
+def unindex_blog_post(sender, instance, **kwargs):
+    """Drop deleted posts from the full-text index"""
+    backend = _search_backend(instance)
+    if backend is not None:
+        backend.remove([instance.pk])
+
+
+@receiver(post_save, sender=BlogPost)
+def process_blog_post_image(sender, instance, **kwargs):
+    sync_renditions(instance, 'image', 'image_renditions')
+
+
+@receiver(renditions_ready, sender=BlogPost)
+def invalidate_blog_post_renditions(sender, instance_pk, **kwargs):
+    """Renditions are stored with an UPDATE, which sends no post_save"""
+    slugs = BlogPost.objects.filter(pk=instance_pk).values_list('slug', 'category__slug').first()
+    if slugs is not None:
+        bump_generations(POSTS, post_generation(slugs[0]), category_generation(slugs[1]))
+
+
+@receiver(renditions_ready, sender=User)
+def invalidate_author_renditions(sender, **kwargs):
+    bump_generations(USERS)
+
+
+@receiver(pre_save, sender=BlogPost)
+def remember_previous_category(sender, instance, **kwargs):
+    """Note the category a post is leaving so its cached lists get invalidated too"""
+    instance._previous_category_slug = None
+    if instance.pk is not None:
+        instance._previous_category_slug = (
+            BlogPost.objects.filter(pk=instance.pk)
+            .values_list('category__slug', flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+def invalidate_blog_post(sender, instance, **kwargs):
+    try:
+        category_slug = instance.category.slug
+    except Category.DoesNotExist:
+        category_slug = None
+    bump_generations(
+        POSTS,
+        post_generation(instance.slug),
+        category_generation(category_slug),
+        category_generation(getattr(instance, '_previous_category_slug', None)),
+    )
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_blog_post_counters(sender, instance, origin=None, **kwargs):
+    """Likes and comments change the counters shown on list and detail pages
+    
+    Only for rows saved or deleted on their own. Deleting a post, category,
+    user or parent comment invalidates everything its cascade touches from
+    its own receiver, and queryset deletes bump the generations themselves.
+    """
+    if origin is not None and origin is not instance:
+        return
+    if sender._meta.get_field('blog_post').is_cached(instance):
+        post = instance.blog_post
+        slugs = (post.slug, post.category.slug)
+    else:
+        slugs = (
+            BlogPost.objects.filter(pk=instance.blog_post_id)
+            .values_list('slug', 'category__slug')
+            .first()
+        )
+    if slugs is not None:
+        bump_generations(POSTS, post_generation(slugs[0]), category_generation(slugs[1]))
+
+
+def _activity_weight(sender):
+    return settings.BLOG_TRENDING['LIKE_WEIGHT' if sender is Like else 'COMMENT_WEIGHT']
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+def score_activity(sender, instance, created, **kwargs):
+    """Likes and comments heat a post up for the trending ordering"""
+    if created:
+        add_scores({instance.blog_post_id: _activity_weight(sender)})
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+def unscore_activity(sender, instance, origin=None, **kwargs):
+    """Cool the post down again, unless its score row goes in the same cascade
+    
+    Queryset deletes adjust the scores themselves, as the like buffer does.
+    """
+    if isinstance(origin, (BlogPost, Category, QuerySet)):
+        return
+    add_scores({instance.blog_post_id: -_activity_weight(sender)})
+
+
+def refresh_activity_counters(post_ids, parent_ids=()):
+    """Recount the posts and parent comments that lost likes or comments"""
+    BlogPost.objects.filter(pk__in=post_ids).refresh_counters()
+    parent_ids = {pk for pk in parent_ids if pk is not None}
+    if parent_ids:
+        Comment.objects.filter(pk__in=parent_ids).refresh_counters()
+
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+def uncount_activity(sender, instance, origin=None, **kwargs):
+    """Keep the stored counters in step with every delete
+    
+    A like or comment deleted on its own recounts its post and parent
+    straight away, replies included. Rows deleted along with a user are
+    recounted once the user is gone (see recount_author_activity). Deleting
+    a post or category takes the counters with it, and queryset deletes of
+    likes and comments recount themselves, as the like buffer and the admin do.
+    """
+    if origin is None or origin is instance:
+        refresh_activity_counters([instance.blog_post_id], [getattr(instance, 'parent_id', None)])
+        return
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if issubclass(model, User):
+        posts, parents = origin.__dict__.setdefault('_deleted_activity', (set(), set()))
+        posts.add(instance.blog_post_id)
+        parents.add(getattr(instance, 'parent_id', None))
+
+
+@receiver(post_delete, sender=User)
+def recount_author_activity(sender, instance, origin=None, **kwargs):
+    """Recount the posts and comments a deleted user's likes and comments were on
+    
+    Their rows are deleted, and noted by uncount_activity, before the user
+    is; one recount covers every user of a queryset delete.
+    """
+    deleted = getattr(origin, '__dict__', {}).pop('_deleted_activity', None)
+    if deleted is not None:
+        refresh_activity_counters(*deleted)
+
+
+@receiver(post_save, sender=BlogPost)
+def move_post_score(sender, instance, created, **kwargs):
+    """Scores keep a copy of the category for the per-category trending index"""
+    previous = getattr(instance, '_previous_category_slug', None)
+    if not created and previous is not None and previous != instance.category.slug:
+        PostScore.objects.filter(pk=instance.pk).update(category_id=instance.category_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    bump_generations(CATEGORIES, POSTS, category_generation(instance.slug))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_author(sender, instance, update_fields=None, **kwargs):
+    """Authors are embedded in post payloads; logins only touch last_login"""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_generations(USERS)
@@ -0,0 +1,129 @@
+import re
+
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Count, IntegerField, Max, Q
+from django.db.models.functions import Cast, Substr
+from django.utils.text import slugify
+
+
+# Room kept at the end of a slug field for a "-<n>" collision suffix
+SUFFIX_LENGTH = 6
+
+# Distinct slugs looked up per query; SQLite caps the depth of an expression
+# (a chain of ORs) at 1000
+LOOKUP_BATCH_SIZE = 250
+
+# Attempts at inserting a row before a slug collision is given up on
+SAVE_ATTEMPTS = 3
+
+
+def base_slug(model, value, field_name='slug'):
+    """Slugified ``value`` truncated so a collision suffix still fits the field"""
+    max_length = model._meta.get_field(field_name).max_length
+    base = slugify(value)[:max_length - SUFFIX_LENGTH].strip('-')
+    return base or model._meta.model_name
+
+
+def prefix_filter(model, prefix, field_name='slug'):
+    """``<field>__startswith=prefix`` in a form the index on the field can serve
+    
+    SQLite only searches an index for LIKE on NOCASE columns, so there the
+    prefix is also given as the equivalent range of binary strings.
+    """
+    condition = Q(**{f'{field_name}__startswith': prefix})
+    if connections[router.db_for_read(model)].vendor == 'sqlite':
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        condition &= Q(**{f'{field_name}__gte': prefix, f'{field_name}__lt': upper})
+    return condition
+
+
+def allocate_slug(model, value, field_name='slug'):
+    """Unique slug for ``value`` from a single query
+    
+    The query checks whether the bare slug is taken and finds the highest
+    numeric suffix in use, so the result is either the bare slug or one
+    past that suffix.
+    """
+    base = base_slug(model, value, field_name)
+    suffixed = Q(**{f'{field_name}__regex': f'^{re.escape(base)}-[0-9]+$'})
+    taken = model._default_manager.filter(prefix_filter(model, base, field_name)).aggregate(
+        bare=Count('pk', filter=Q(**{field_name: base})),
+        highest=Max(
+            Cast(Substr(field_name, len(base) + 2), IntegerField()),
+            filter=suffixed
+        ),
+    )
+    if not taken['bare']:
+        return base
+    return f"{base}-{max(taken['highest'] or 1, 1) + 1}"
+
+
+def allocate_slugs(model, values, field_name='slug'):
+    """Unique slugs for ``values``, resolved against the table in one query per ``LOOKUP_BATCH_SIZE``
+    
+    A slug that is already taken, in the table or earlier in the batch, gets
+    the next free numeric suffix: ``my-post``, ``my-post-2``, ``my-post-3``.
+    """
+    bases = [base_slug(model, value, field_name) for value in values]
+    if not bases:
+        return []
+    
+    wanted = set(bases)
+    unique_bases = sorted(wanted)
+    used = set()
+    highest = {}
+    for start in range(0, len(unique_bases), LOOKUP_BATCH_SIZE):
+        batch = unique_bases[start:start + LOOKUP_BATCH_SIZE]
+        # The bare slugs and everything under "<base>-", each an index lookup
+        candidates = Q(**{f'{field_name}__in': batch})
+        for base in batch:
+            candidates |= prefix_filter(model, f'{base}-', field_name)
+        for slug in model._default_manager.filter(candidates).values_list(field_name, flat=True):
+            if slug in wanted:
+                used.add(slug)
+            base, _, suffix = slug.rpartition('-')
+            # "<base>-<text>" belongs to another title
+            if base in wanted and suffix.isdigit():
+                used.add(slug)
+                highest[base] = max(highest.get(base, 1), int(suffix))
+    
+    slugs = []
+    for base in bases:
+        slug = base
+        while slug in used:
+            highest[base] = highest.get(base, 1) + 1
+            slug = f'{base}-{highest[base]}'
+        used.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def is_slug_collision(model, slugs, field_name='slug'):
+    """Whether an IntegrityError was caused by one of ``slugs`` being taken meanwhile"""
+    return model._default_manager.filter(**{f'{field_name}__in': slugs}).exists()
+
+
+class UniqueSlugMixin:
+    """Fill an empty ``slug`` from ``slug_source`` on save, never colliding
+    
+    Two writers can allocate the same slug concurrently; the loser's INSERT
+    fails on the unique constraint inside a savepoint and is retried with a
+    freshly allocated slug.
+    """
+    slug_source = None
+    
+    def save(self, *args, **kwargs):
+        if self.slug:
+            return super().save(*args, **kwargs)
+        
+        model = type(self)
+        using = kwargs.get('using') or router.db_for_write(model, instance=self)
+        for attempt in range(SAVE_ATTEMPTS):
+            self.slug = allocate_slug(model, getattr(self, self.slug_source))
+            try:
+                with transaction.atomic(using=using):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SAVE_ATTEMPTS - 1 or not is_slug_collision(model, [self.slug]):
+                    self.slug = ''
+                    raise
@@ -1,3 +1,1889 @@
-from django.test import TestCase
+import gc
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+from urllib.parse import urlencode
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings as django_settings
+from django.contrib import admin as django_admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, reset_queries, transaction
+from django.db.models import F, Max, Min
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.http import HttpResponse
+from django.urls import get_resolver, resolve, reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.throttling import AnonRateThrottle
+
+from blog.likes import get_like_buffer
+from blog.models import Category, BlogPost, Like, Comment, PostScore
+from blog.seeding import BlogSeeder
+from blog.renderers import BlogJSONRenderer, FragmentJSONRenderer, orjson
+from authentication.serializers.user_serializers import CompiledUserProfileSerializer, UserProfileSerializer
+from blog.serializers.blog_serializers import (
+    BlogPostListSerializer,
+    CategorySerializer,
+    CommentSerializer,
+    ViewerBlogPostListSerializer,
+)
+from blog.serializers.comment_tree import CommentRowTree, CommentTree
+from blog.serializers.compiled_serializers import (
+    CompiledBlogPostListSerializer,
+    CompiledCategorySerializer,
+    CompiledCommentSerializer,
+    CompiledViewerBlogPostListSerializer,
+)
+from blog.slugs import allocate_slug, allocate_slugs
+from blog.trending import decay_scores
+from blog.views.async_views import AsyncBlogPostListView
+from blog.views.blog_views import BlogPostListView, CommentListCreateView
+from blog.views.export_views import BlogPostExportView, CommentExportView, LikeExportView
+from blog_api import metrics, profiling
+from blog_api.compiled_serializers import CompiledSerializer
+from blog_api.images import process_renditions
+from blog_api.uploads import ImageUploadHandler
+
+
+User = get_user_model()
+
+
+class BlogTestMixin:
+    """Shared fixtures for blog API tests"""
+    
+    def create_user(self, username='author', **kwargs):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            password='testpass123',
+            first_name='Test',
+            last_name='User',
+            **kwargs
+        )
+    
+    def create_posts(self, count, author, category, **kwargs):
+        kwargs.setdefault('is_published', True)
+        start = BlogPost.objects.count()
+        return [
+            BlogPost.objects.create(
+                title=f'Post {index}',
+                description='Description',
+                content='Content',
+                author=author,
+                category=category,
+                **kwargs
+            )
+            for index in range(start, start + count)
+        ]
+
+
+class BlogPostFeedQueryTests(BlogTestMixin, TestCase):
+    """Query-count regression tests for the post feed"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.reader = self.create_user('reader')
+        self.category = Category.objects.create(name='Technology')
+    
+    def populate(self, count):
+        for post in self.create_posts(count, self.author, self.category):
+            Like.objects.create(user=self.reader, blog_post=post)
+            comment = Comment.objects.create(user=self.reader, blog_post=post, content='Nice')
+            Comment.objects.create(user=self.author, blog_post=post, content='Thanks', parent=comment)
+        BlogPost.objects.refresh_counters()
+    
+    def test_post_list_query_count_is_independent_of_page_size(self):
+        self.populate(2)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('blog:post-list'))
+        self.assertEqual(len(response.data['results']), 2)
+        
+        self.populate(8)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('blog:post-list'))
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(response.data['results'][0]['likes_count'], 1)
+        self.assertEqual(response.data['results'][0]['comments_count'], 2)
+    
+    def test_user_posts_query_count_is_independent_of_page_size(self):
+        self.client.force_authenticate(self.author)
+        self.populate(3)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('blog:user-posts'))
+        
+        self.populate(7)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('blog:user-posts'))
+        self.assertEqual(len(response.data['results']), 10)
+    
+    def test_post_detail_uses_single_query(self):
+        self.populate(1)
+        post = BlogPost.objects.get()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('blog:post-detail', args=[post.slug]))
+        self.assertEqual(response.data['likes_count'], 1)
+        self.assertEqual(response.data['comments_count'], 2)
+
+
+class CommentTreeTests(BlogTestMixin, TestCase):
+    """Tests for the single-query threaded comment loader"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = self.create_user()
+        self.category = Category.objects.create(name='Technology')
+        self.post = self.create_posts(1, self.user, self.category)[0]
+        self.url = reverse('blog:comment-list', args=[self.post.slug])
+    
+    def build_thread(self, roots, depth, fanout):
+        level = [
+            Comment.objects.create(user=self.user, blog_post=self.post, content='Root')
+            for _ in range(roots)
+        ]
+        for _ in range(depth):
+            level = [
+                Comment.objects.create(user=self.user, blog_post=self.post, content='Reply', parent=parent)
+                for parent in level
+                for _ in range(fanout)
+            ]
+        Comment.objects.refresh_counters()
+    
+    def test_matches_recursive_serializer_output(self):
+        self.build_thread(roots=2, depth=3, fanout=2)
+        roots = Comment.objects.filter(blog_post=self.post, parent=None)
+        expected = CommentSerializer(roots, many=True).data
+        
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['results'], expected)
+    
+    def test_query_count_is_independent_of_thread_size(self):
+        self.build_thread(roots=1, depth=1, fanout=1)
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+        
+        self.build_thread(roots=3, depth=4, fanout=2)
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+    
+    def test_depth_and_reply_limits(self):
+        self.build_thread(roots=1, depth=3, fanout=3)
+        response = self.client.get(self.url, {'max_depth': 1, 'max_replies': 2})
+        root = response.data['results'][0]
+        self.assertEqual(root['replies_count'], 3)
+        self.assertEqual(len(root['replies']), 2)
+        self.assertEqual(root['replies'][0]['replies_count'], 3)
+        self.assertEqual(root['replies'][0]['replies'], [])
+    
+    def test_rejects_invalid_limits(self):
+        response = self.client.get(self.url, {'max_depth': 'deep'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CounterTests(BlogTestMixin, TestCase):
+    """Tests for the denormalized like/comment/reply counters"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = self.create_user()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name='Technology')
+        self.post = self.create_posts(1, self.user, self.category)[0]
+    
+    def comment(self, parent=None):
+        data = {'content': 'Hello', 'blog_post': self.post.pk}
+        if parent is not None:
+            data['parent'] = parent
+        response = self.client.post(reverse('blog:comment-list', args=[self.post.slug]), data)
+        self.assertEqual(response.status_code, 201)
+        return response.data['comment']['id']
+    
+    def test_toggle_like_updates_counter(self):
+        url = reverse('blog:post-like', args=[self.post.slug])
+        response = self.client.post(url)
+        self.assertEqual(response.data['likes_count'], 1)
+        response = self.client.post(url)
+        self.assertEqual(response.data['likes_count'], 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+    
+    def test_toggle_like_query_count(self):
+        url = reverse('blog:post-like', args=[self.post.slug])
+        self.client.post(url)
+        self.client.post(url)
+        # Post with its category, the like, the write, the score, the counter
+        # and its new value, plus the savepoints of the transaction
+        with self.assertNumQueries(10):
+            self.client.post(url)
+        with self.assertNumQueries(8):
+            self.client.post(url)
+    
+    def test_comment_create_and_delete_update_counters(self):
+        root = self.comment()
+        reply = self.comment(parent=root)
+        self.comment(parent=reply)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 3)
+        self.assertEqual(Comment.objects.get(pk=root).replies_count, 1)
+        
+        self.client.delete(reverse('blog:comment-detail', args=[reply]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(Comment.objects.get(pk=root).replies_count, 0)
+    
+    def assertNoDrift(self, likes, comments):
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (likes, comments))
+        self.assertFalse(BlogPost.objects.with_counter_drift().exists())
+        self.assertFalse(Comment.objects.with_counter_drift().exists())
+    
+    def test_deleting_a_user_updates_counters(self):
+        root = self.comment()
+        reader = self.create_user('reader')
+        self.client.force_authenticate(reader)
+        self.client.post(reverse('blog:post-like', args=[self.post.slug]))
+        self.comment(parent=root)
+        self.assertNoDrift(1, 2)
+        
+        reader.delete()
+        self.assertNoDrift(0, 1)
+        self.assertEqual(Comment.objects.get(pk=root).replies_count, 0)
+        
+        # Every user of a queryset delete is recounted at once
+        readers = [self.create_user(f'reader{index}') for index in range(2)]
+        for reader in readers:
+            self.client.force_authenticate(reader)
+            self.client.post(reverse('blog:post-like', args=[self.post.slug]))
+            self.comment(parent=root)
+        self.assertNoDrift(2, 3)
+        User.objects.filter(pk__in=[reader.pk for reader in readers]).delete()
+        self.assertNoDrift(0, 1)
+    
+    def test_admin_deletes_update_counters(self):
+        root = self.comment()
+        reply = self.comment(parent=root)
+        self.client.post(reverse('blog:post-like', args=[self.post.slug]))
+        admin_site = django_admin.site
+        
+        Comment.objects.get(pk=reply).delete()
+        self.assertNoDrift(1, 1)
+        self.comment(parent=root)
+        admin_site._registry[Comment].delete_queryset(None, Comment.objects.filter(parent=root))
+        admin_site._registry[Like].delete_queryset(None, Like.objects.all())
+        self.assertNoDrift(0, 1)
+    
+    def test_recount_command_repairs_drift(self):
+        root = Comment.objects.create(user=self.user, blog_post=self.post, content='Root')
+        Comment.objects.create(user=self.user, blog_post=self.post, content='Reply', parent=root)
+        Like.objects.create(user=self.user, blog_post=self.post)
+        
+        out = StringIO()
+        call_command('recount_blog_counters', stdout=out)
+        self.assertIn('Found 1 blog post(s) and 1 comment(s)', out.getvalue())
+        self.post.refresh_from_db()
+        root.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (1, 2))
+        self.assertEqual(root.replies_count, 1)
+        self.assertFalse(BlogPost.objects.with_counter_drift().exists())
+
+
+class KeysetPaginationTests(BlogTestMixin, TestCase):
+    """Tests for the opt-in cursor pagination mode"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.category = Category.objects.create(name='Technology')
+        self.other_category = Category.objects.create(name='Travel')
+        self.posts = self.create_posts(15, self.author, self.category)
+        self.create_posts(5, self.author, self.other_category)
+        # Force ties on created_at so the id tiebreaker is exercised
+        BlogPost.objects.filter(pk__in=[post.pk for post in self.posts[:6]]).update(
+            created_at=self.posts[0].created_at
+        )
+    
+    def walk(self, url, params):
+        seen = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(post['id'] for post in response.data['results'])
+            if response.data['next'] is None:
+                return seen
+            response = self.client.get(response.data['next'])
+    
+    def test_walks_filtered_feed_without_gaps_or_duplicates(self):
+        seen = self.walk(reverse('blog:post-list'), {'pagination': 'cursor', 'category': 'technology'})
+        expected = list(
+            BlogPost.objects.filter(category=self.category)
+            .order_by('-created_at', '-pk')
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
+    
+    def test_ascending_order(self):
+        seen = self.walk(reverse('blog:post-list'), {'pagination': 'cursor', 'ordering': 'created_at'})
+        expected = list(BlogPost.objects.order_by('created_at', 'pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+    
+    def test_invalid_cursor_and_ordering(self):
+        url = reverse('blog:post-list')
+        self.assertEqual(self.client.get(url, {'cursor': 'not-a-cursor'}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'pagination': 'cursor', 'ordering': 'title'}).status_code, 400)
+    
+    def test_page_number_mode_is_default(self):
+        response = self.client.get(reverse('blog:post-list'))
+        self.assertEqual(response.data['count'], 20)
+    
+    def test_comment_cursor_pagination(self):
+        post = self.posts[0]
+        for _ in range(12):
+            Comment.objects.create(user=self.author, blog_post=post, content='Hello')
+        seen = self.walk(reverse('blog:comment-list', args=[post.slug]), {'pagination': 'cursor'})
+        self.assertEqual(len(set(seen)), 12)
+
+
+class SearchTests(BlogTestMixin, TestCase):
+    """Tests for the full-text post search"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.category = Category.objects.create(name='Technology')
+        self.url = reverse('blog:post-list')
+    
+    def create_post(self, title, description='Description', content='Content', **kwargs):
+        return BlogPost.objects.create(
+            title=title,
+            description=description,
+            content=content,
+            author=self.author,
+            category=self.category,
+            is_published=True,
+            **kwargs
+        )
+    
+    def search(self, term, **params):
+        response = self.client.get(self.url, {'search': term, **params})
+        self.assertEqual(response.status_code, 200)
+        return [post['title'] for post in response.data['results']]
+    
+    def test_ranks_title_matches_first(self):
+        self.create_post('Cooking pasta', content='Nothing about django here, just django')
+        self.create_post('Django tips')
+        self.create_post('Gardening')
+        self.assertEqual(self.search('django'), ['Django tips', 'Cooking pasta'])
+    
+    def test_prefix_and_multiple_terms(self):
+        self.create_post('Djangonaut weekly', description='Python news')
+        self.create_post('Django internals', description='Deep dive')
+        self.assertEqual(self.search('djang python'), ['Djangonaut weekly'])
+    
+    def test_explicit_ordering_overrides_relevance(self):
+        self.create_post('Alpha', content='django')
+        self.create_post('Zulu django')
+        self.assertEqual(self.search('django', ordering='title'), ['Alpha', 'Zulu django'])
+    
+    def test_index_follows_save_and_delete(self):
+        post = self.create_post('Draft title')
+        post.title = 'Final headline'
+        post.save()
+        self.assertEqual(self.search('draft'), [])
+        self.assertEqual(self.search('headline'), ['Final headline'])
+        
+        post.delete()
+        self.assertEqual(self.search('headline'), [])
+    
+    def test_operator_characters_are_literal(self):
+        self.create_post('Django tips')
+        self.assertEqual(self.search('django OR "'), [])
+        self.assertEqual(self.search('!!!'), [])
+
+
+class ResponseCacheTests(BlogTestMixin, TestCase):
+    """Tests for the versioned response cache"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.category = Category.objects.create(name='Technology')
+        self.other_category = Category.objects.create(name='Travel')
+        self.post = self.create_posts(1, self.author, self.category)[0]
+        self.other_post = self.create_posts(1, self.author, self.other_category)[0]
+    
+    def test_repeated_anonymous_reads_skip_the_database(self):
+        for url in (
+            reverse('blog:post-list'),
+            reverse('blog:post-detail', args=[self.post.slug]),
+            reverse('blog:category-list'),
+        ):
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(first.data, second.data)
+    
+    def test_like_invalidates_list_and_detail(self):
+        list_url = reverse('blog:post-list')
+        detail_url = reverse('blog:post-detail', args=[self.post.slug])
+        self.client.get(list_url)
+        self.client.get(detail_url)
+        
+        liker = APIClient()
+        liker.force_authenticate(self.author)
+        liker.post(reverse('blog:post-like', args=[self.post.slug]))
+        
+        results = {post['id']: post for post in self.client.get(list_url).data['results']}
+        self.assertEqual(results[self.post.pk]['likes_count'], 1)
+        self.assertEqual(self.client.get(detail_url).data['likes_count'], 1)
+    
+    def test_writes_only_invalidate_their_category(self):
+        url = reverse('blog:post-list')
+        self.client.get(url, {'category': self.category.slug})
+        self.client.get(url, {'category': self.other_category.slug})
+        
+        Comment.objects.create(user=self.author, blog_post=self.other_post, content='Hi')
+        with self.assertNumQueries(0):
+            self.client.get(url, {'category': self.category.slug})
+        with self.assertNumQueries(2):
+            self.client.get(url, {'category': self.other_category.slug})
+    
+    def test_moving_a_post_invalidates_its_old_category(self):
+        url = reverse('blog:post-list')
+        self.client.get(url, {'category': self.category.slug})
+        self.post.category = self.other_category
+        self.post.save()
+        response = self.client.get(url, {'category': self.category.slug})
+        self.assertEqual(response.data['results'], [])
+    
+    def test_author_and_category_changes_invalidate_embedded_copies(self):
+        detail_url = reverse('blog:post-detail', args=[self.post.slug])
+        self.client.get(detail_url)
+        self.author.first_name = 'Renamed'
+        self.author.save()
+        self.category.description = 'Updated'
+        self.category.save()
+        response = self.client.get(detail_url)
+        self.assertEqual(response.data['author']['first_name'], 'Renamed')
+        self.assertEqual(response.data['category']['description'], 'Updated')
+    
+    def test_deleting_a_post_costs_the_same_however_busy_it_is(self):
+        deleter = APIClient()
+        deleter.force_authenticate(self.author)
+        queries = []
+        for activity in (2, 40):
+            post = self.create_posts(1, self.author, self.category)[0]
+            users = [self.create_user(f'fan{len(queries)}-{index}') for index in range(activity)]
+            Like.objects.bulk_create(Like(user=user, blog_post=post) for user in users)
+            root = Comment.objects.create(user=self.author, blog_post=post, content='Root')
+            Comment.objects.bulk_create(
+                Comment(user=user, blog_post=post, parent=root, content='Reply') for user in users
+            )
+            list_url = reverse('blog:post-list')
+            self.client.get(list_url, {'category': self.category.slug})
+            reset_queries()
+            with CaptureQueriesContext(connection) as captured:
+                response = deleter.delete(reverse('blog:post-delete', args=[post.slug]))
+            self.assertEqual(response.status_code, 204)
+            queries.append(len(captured))
+            slugs = [item['slug'] for item in self.client.get(list_url, {'category': self.category.slug}).data['results']]
+            self.assertNotIn(post.slug, slugs)
+        self.assertEqual(queries[0], queries[1])
+    
+    def test_query_params_are_normalized(self):
+        url = reverse('blog:post-list')
+        self.client.get(url, {'category': self.category.slug, 'search': '', 'utm_source': 'mail'})
+        with self.assertNumQueries(0):
+            self.client.get(url, {'utm_source': 'feed', 'category': self.category.slug})
+    
+    def test_authenticated_requests_bypass_the_cache(self):
+        self.client.force_authenticate(self.author)
+        url = reverse('blog:post-list')
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            self.client.get(url)
+    
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            caches = {
+                'default': {
+                    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': location,
+                }
+            }
+            with override_settings(CACHES=caches):
+                url = reverse('blog:post-detail', args=[self.post.slug])
+                self.client.get(url)
+                with self.assertNumQueries(0):
+                    self.client.get(url)
+                self.post.title = 'Changed'
+                self.post.save()
+                self.assertEqual(self.client.get(url).data['title'], 'Changed')
+
+
+class ConditionalGetTests(BlogTestMixin, TestCase):
+    """Tests for ETag / Last-Modified handling"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.category = Category.objects.create(name='Technology')
+        self.post = self.create_posts(1, self.author, self.category)[0]
+        self.urls = [
+            reverse('blog:post-list'),
+            reverse('blog:post-detail', args=[self.post.slug]),
+            reverse('blog:comment-list', args=[self.post.slug]),
+        ]
+    
+    def test_matching_etag_returns_not_modified(self):
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Last-Modified', response)
+            cache.clear()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b'')
+    
+    def test_detail_etag_is_strong_and_list_etag_is_weak(self):
+        self.assertTrue(self.client.get(self.urls[0])['ETag'].startswith('W/'))
+        self.assertFalse(self.client.get(self.urls[1])['ETag'].startswith('W/'))
+    
+    def test_not_modified_skips_serialization(self):
+        etag = self.client.get(self.urls[1])['ETag']
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.urls[1], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+    
+    def test_cached_responses_keep_their_validators(self):
+        etag = self.client.get(self.urls[1])['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.urls[1], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.urls[1])['ETag'], etag)
+    
+    def test_etags_change_with_counters_and_comments(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        Comment.objects.create(user=self.author, blog_post=self.post, content='Hi')
+        BlogPost.objects.filter(pk=self.post.pk).refresh_counters()
+        cache.clear()
+        for url, etag in zip(self.urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+    
+    def test_if_modified_since(self):
+        response = self.client.get(self.urls[1])
+        cache.clear()
+        response = self.client.get(self.urls[1], HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+
+class BulkCreateTests(BlogTestMixin, TestCase):
+    """Tests for the bulk create endpoints"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = self.create_user()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name='Technology')
+    
+    def post_items(self, name, items, batch_size=None):
+        url = reverse(name)
+        if batch_size is not None:
+            url += f'?batch_size={batch_size}'
+        return self.client.post(url, items, format='json')
+    
+    def test_posts_get_unique_slugs_and_partial_failures_are_reported(self):
+        BlogPost.objects.create(
+            title='Same Title', description='D', content='C', author=self.user, category=self.category
+        )
+        item = {'title': 'Same Title', 'description': 'D', 'content': 'C', 'category': self.category.pk}
+        response = self.post_items('blog:post-bulk-create', [item, item, {**item, 'category': 999}, item])
+        
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data['succeeded'], response.data['failed']), (3, 1))
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], ['created', 'created', 'invalid', 'created'])
+        self.assertIn('category', results[2]['errors'])
+        self.assertEqual(
+            [results[index]['slug'] for index in (0, 1, 3)],
+            ['same-title-2', 'same-title-3', 'same-title-4']
+        )
+        self.assertNotIn('content', results[0])
+    
+    def test_query_count_is_independent_of_batch_size(self):
+        def create(count):
+            items = [
+                {'title': f'Post {index}', 'description': 'D', 'content': 'C', 'category': self.category.pk}
+                for index in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post_items('blog:post-bulk-create', items, batch_size=1000)
+            self.assertEqual(response.status_code, 201)
+            return len(queries)
+        
+        self.assertEqual(create(2), create(50))
+        self.assertEqual(self.client.get(reverse('blog:post-list'), {'search': 'post'}).data['count'], 0)
+        BlogPost.objects.update(is_published=True)
+        self.assertEqual(self.client.get(reverse('blog:post-list'), {'search': 'post'}).data['count'], 52)
+    
+    def test_comments_update_counters(self):
+        post = self.create_posts(1, self.user, self.category)[0]
+        root = Comment.objects.create(user=self.user, blog_post=post, content='Root')
+        other = self.create_posts(1, self.user, self.category)[0]
+        items = [
+            {'content': 'One', 'blog_post': post.pk},
+            {'content': 'Two', 'blog_post': post.pk, 'parent': root.pk},
+            {'content': 'Wrong post', 'blog_post': other.pk, 'parent': root.pk},
+        ]
+        response = self.post_items('blog:comment-bulk-create', items)
+        
+        self.assertEqual(response.status_code, 207)
+        post.refresh_from_db()
+        root.refresh_from_db()
+        self.assertEqual(post.comments_count, 3)
+        self.assertEqual(root.replies_count, 1)
+    
+    def test_likes_skip_existing(self):
+        posts = self.create_posts(2, self.user, self.category)
+        Like.objects.create(user=self.user, blog_post=posts[0])
+        items = [{'blog_post': posts[0].pk}, {'blog_post': posts[1].pk}, {'blog_post': posts[1].pk}]
+        response = self.post_items('blog:like-bulk-create', items)
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['unchanged', 'created', 'unchanged']
+        )
+        posts[1].refresh_from_db()
+        self.assertEqual(posts[1].likes_count, 1)
+    
+    def test_rejects_invalid_requests(self):
+        self.assertEqual(self.post_items('blog:like-bulk-create', {'blog_post': 1}).status_code, 400)
+        self.assertEqual(self.post_items('blog:like-bulk-create', [], batch_size=0).status_code, 400)
+        response = self.post_items('blog:like-bulk-create', [{'blog_post': 'x'}])
+        self.assertEqual((response.status_code, response.data['failed']), (400, 1))
+
+
+class SlugTests(BlogTestMixin, TestCase):
+    """Tests for slug allocation"""
+    
+    def setUp(self):
+        self.user = self.create_user()
+        self.category = Category.objects.create(name='Technology')
+    
+    def create_post(self, title):
+        return BlogPost.objects.create(
+            title=title, description='D', content='C', author=self.user, category=self.category
+        )
+    
+    def test_duplicate_titles_get_numbered_suffixes(self):
+        slugs = [self.create_post('Hello World').slug for _ in range(3)]
+        self.assertEqual(slugs, ['hello-world', 'hello-world-2', 'hello-world-3'])
+        self.assertEqual(self.create_post('Hello World 2').slug, 'hello-world-2-2')
+        self.assertEqual(Category.objects.create(name='C++').slug, 'c')
+        self.assertEqual(Category.objects.create(name='C').slug, 'c-2')
+    
+    def test_allocation_is_a_single_query(self):
+        for _ in range(5):
+            self.create_post('Hello World')
+        with self.assertNumQueries(1):
+            self.assertEqual(allocate_slug(BlogPost, 'Hello World'), 'hello-world-6')
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                allocate_slugs(BlogPost, ['Hello World', 'Hello World', 'New']),
+                ['hello-world-6', 'hello-world-7', 'new']
+            )
+    
+    def test_large_batches_are_looked_up_by_index(self):
+        self.create_post('Hello World')
+        self.create_post('Hello World Tour')
+        titles = [f'Title {index}' for index in range(600)] + ['Hello World']
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            slugs = allocate_slugs(BlogPost, titles)
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(slugs[-1], 'hello-world-2')
+        self.assertEqual(len(set(slugs)), len(titles))
+        if connection.vendor == 'sqlite':
+            for query in queries.captured_queries:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+                    plan = ' '.join(row[-1] for row in cursor.fetchall())
+                self.assertNotIn('SCAN blog_posts', plan)
+    
+    def test_long_titles_leave_room_for_a_suffix(self):
+        max_length = BlogPost._meta.get_field('slug').max_length
+        slugs = [self.create_post('word ' * 40).slug for _ in range(2)]
+        self.assertTrue(all(len(slug) <= max_length for slug in slugs))
+        self.assertEqual(slugs[1], slugs[0] + '-2')
+    
+    def test_save_retries_when_a_concurrent_writer_takes_the_slug(self):
+        self.create_post('Hello World')
+        with mock.patch('blog.slugs.allocate_slug', side_effect=['hello-world', 'hello-world-2']):
+            self.assertEqual(self.create_post('Hello World').slug, 'hello-world-2')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class QueryPlanTests(BlogTestMixin, TestCase):
+    """Every query behind the main read endpoints must be served by an index"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.category = Category.objects.create(name='Technology')
+        self.posts = self.create_posts(3, self.author, self.category)
+        root = Comment.objects.create(user=self.author, blog_post=self.posts[0], content='Root')
+        Comment.objects.create(user=self.author, blog_post=self.posts[0], content='Reply', parent=root)
+        Like.objects.create(user=self.author, blog_post=self.posts[0])
+    
+    def plan_problems(self, url, presorted=True):
+        """Full scans, and sorts when the rows should come out of an index in order"""
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        # "SCAN <table>" without "USING ... INDEX" reads every row
+        pattern = r'SCAN \w+|USE TEMP B-TREE FOR ORDER BY' if presorted else r'SCAN \w+'
+        problems = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                problems.extend(
+                    (query['sql'], row[3]) for row in cursor.fetchall()
+                    if re.fullmatch(pattern, row[3])
+                )
+        return problems
+    
+    def test_main_endpoints_use_indexes(self):
+        post_list = reverse('blog:post-list')
+        slug = self.posts[0].slug
+        urls = [
+            post_list,
+            post_list + '?category=technology',
+            post_list + '?author=author',
+            post_list + '?pagination=cursor',
+            reverse('blog:post-detail', args=[slug]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.plan_problems(url), [])
+        
+        # Relevance order and reply trees are sorted after the index lookup
+        urls = [
+            post_list + '?search=post',
+            reverse('blog:comment-list', args=[slug]),
+            reverse('blog:comment-list', args=[slug]) + '?pagination=cursor',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.plan_problems(url, presorted=False), [])
+        
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.plan_problems(reverse('blog:user-posts')), [])
+
+
+IMAGE_PIPELINE = {
+    'ENABLED': True,
+    'EAGER': True,
+    'WORKERS': 1,
+    'FORMATS': ['webp'],
+    'QUALITY': 80,
+    'SIZES': {
+        'thumbnail': {'size': (16, 16), 'crop': True},
+        'medium': {'size': (40, 40)},
+    },
+}
+
+
+def make_image(size=(80, 60), orientation=None, fmt='JPEG'):
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    exif[0x010f] = 'Camera Maker'
+    if orientation is not None:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    image.save(buffer, fmt, exif=exif)
+    return SimpleUploadedFile(f'photo.{fmt.lower()}', buffer.getvalue(), content_type=f'image/{fmt.lower()}')
+
+
+class ImagePipelineTests(BlogTestMixin, TestCase):
+    """Tests for the background image renditions"""
+    
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=self.media_root.name, IMAGE_PIPELINE=IMAGE_PIPELINE)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        
+        self.client = APIClient()
+        self.user = self.create_user()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name='Technology')
+    
+    def create_post(self, image):
+        response = self.client.post(reverse('blog:post-create'), {
+            'title': 'Photo', 'description': 'D', 'content': 'C',
+            'category': self.category.pk, 'is_published': True, 'image': image,
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        return BlogPost.objects.get(pk=response.data['blog_post']['id'])
+    
+    def test_renditions_are_resized_rotated_and_stripped(self):
+        post = self.create_post(make_image(orientation=6))
+        renditions = post.image_renditions
+        self.assertEqual(renditions['source'], post.image.name)
+        # Orientation 6 is a quarter turn, so the 80x60 original is 60x80 upright
+        self.assertEqual((renditions['medium']['width'], renditions['medium']['height']), (30, 40))
+        self.assertEqual((renditions['thumbnail']['width'], renditions['thumbnail']['height']), (16, 16))
+        with post.image.storage.open(renditions['medium']['webp']) as file:
+            rendition = Image.open(file)
+            self.assertEqual(rendition.format, 'WEBP')
+            self.assertEqual(dict(rendition.getexif()), {})
+        
+        data = self.client.get(reverse('blog:post-detail', args=[post.slug])).data['image_renditions']
+        self.assertTrue(data['thumbnail']['webp'].startswith('http://testserver/media/'))
+        self.assertEqual(data['srcset'], {'webp': f"{data['medium']['webp']} 30w"})
+    
+    def test_replacing_the_image_replaces_its_renditions(self):
+        post = self.create_post(make_image())
+        old = post.image_renditions['medium']['webp']
+        self.client.patch(
+            reverse('blog:post-update', args=[post.slug]), {'image': make_image(fmt='PNG')}, format='multipart'
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.image_renditions['source'], post.image.name)
+        self.assertNotEqual(post.image_renditions['medium']['webp'], old)
+        
+        post.image = None
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.image_renditions, {'source': ''})
+    
+    def test_renditions_are_deleted_with_the_last_post_using_them(self):
+        first, second = self.create_post(make_image()), self.create_post(make_image())
+        storage = first.image.storage
+        shared = first.image_renditions['medium']['webp']
+        self.assertEqual(second.image_renditions['medium']['webp'], shared)
+        # One exact-match query per check, without scanning JSON as text
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(storage.is_referenced(shared))
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('LIKE', queries[0]['sql'])
+        
+        for post in (first, second):
+            self.client.patch(
+                reverse('blog:post-update', args=[post.slug]), {'image': make_image(fmt='PNG')}, format='multipart'
+            )
+            # Kept while the other post still shows it
+            self.assertEqual(storage.exists(shared), post is first)
+        
+        # The replaced originals are swept up once they are old enough
+        self.assertTrue(storage.exists(first.image.name))
+        out = StringIO()
+        call_command('cleanup_images', stdout=out)
+        self.assertIn('Deleted 0', out.getvalue())
+        call_command('cleanup_images', '--min-age', '-1', stdout=out)
+        self.assertFalse(storage.exists(first.image.name))
+        second.refresh_from_db()
+        self.assertTrue(storage.exists(second.image.name))
+        self.assertTrue(storage.exists(second.image_renditions['medium']['webp']))
+    
+    def test_background_mode_runs_after_commit(self):
+        post = self.create_posts(1, self.user, self.category)[0]
+        post.image = make_image()
+        with override_settings(IMAGE_PIPELINE={**IMAGE_PIPELINE, 'EAGER': False}):
+            with mock.patch('blog_api.images.get_executor') as get_executor:
+                with self.captureOnCommitCallbacks(execute=True):
+                    post.save()
+                    get_executor.assert_not_called()
+        task = get_executor.return_value.submit.call_args.args[1:]
+        self.assertEqual(process_renditions(*task)['source'], post.image.name)
+        post.refresh_from_db()
+        self.assertIn('medium', post.image_renditions)
+
+
+class ImageUploadTests(BlogTestMixin, TestCase):
+    """Tests for streaming image uploads and content-addressed storage"""
+    
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(
+            MEDIA_ROOT=media_root.name, IMAGE_PIPELINE={**IMAGE_PIPELINE, 'ENABLED': False}
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        
+        self.client = APIClient()
+        self.user = self.create_user()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name='Technology')
+    
+    def upload(self, image):
+        return self.client.post(reverse('blog:post-create'), {
+            'title': 'Photo', 'description': 'D', 'content': 'C',
+            'category': self.category.pk, 'image': image,
+        }, format='multipart')
+    
+    def test_identical_uploads_share_one_file(self):
+        names = [
+            self.upload(make_image()).data['blog_post']['image'].split('/media/')[1]
+            for _ in range(2)
+        ]
+        self.assertEqual(names[0], names[1])
+        digest = os.path.splitext(os.path.basename(names[0]))[0]
+        self.assertEqual(names[0], f'blog_images/{digest[:2]}/{digest}.jpeg')
+        with BlogPost.objects.first().image.open('rb') as file:
+            self.assertEqual(hashlib.sha256(file.read()).hexdigest(), digest)
+    
+    def test_rejects_files_that_are_not_images(self):
+        fake = SimpleUploadedFile('photo.jpg', b'<?php echo 1; ?>' * 10, content_type='image/jpeg')
+        response = self.upload(fake)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('not a supported image format', response.data['detail'])
+        self.assertFalse(BlogPost.objects.exists())
+    
+    def test_rejects_oversized_images_from_the_header(self):
+        uploads = {**django_settings.IMAGE_UPLOADS, 'MAX_PIXELS': 1000, 'CHUNK_SIZE': 1024}
+        with override_settings(IMAGE_UPLOADS=uploads):
+            spy = mock.patch.object(
+                ImageUploadHandler, 'receive_data_chunk',
+                autospec=True, side_effect=ImageUploadHandler.receive_data_chunk
+            )
+            with spy as receive:
+                response = self.upload(make_image(size=(400, 300)))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('dimensions are too large', response.data['detail'])
+        # Rejected on the first chunk, without reading the rest of the file
+        self.assertEqual(receive.call_count, 1)
+    
+    def test_rejects_oversized_files(self):
+        with override_settings(IMAGE_UPLOADS={**django_settings.IMAGE_UPLOADS, 'MAX_SIZE': 100}):
+            response = self.upload(make_image())
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('too large', response.data['detail'])
+
+
+class AsyncViewTests(BlogTestMixin, TestCase):
+    """The async read endpoints must answer exactly like their sync counterparts"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.category = Category.objects.create(name='Technology')
+        self.posts = self.create_posts(12, self.author, self.category)
+        root = Comment.objects.create(user=self.author, blog_post=self.posts[0], content='Root')
+        Comment.objects.create(user=self.author, blog_post=self.posts[0], content='Reply', parent=root)
+        Comment.objects.refresh_counters()
+    
+    async def assert_same_response(self, sync_name, async_name, args=(), query=''):
+        sync_url = reverse(sync_name, args=args)
+        async_url = reverse(async_name, args=args)
+        expected = await sync_to_async(self.client.get)(sync_url + query, HTTP_ACCEPT='application/json')
+        response = await self.async_client.get(async_url + query)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        # Pagination links differ only in the path they point at
+        self.assertEqual(response.content.decode().replace(async_url, sync_url), expected.content.decode())
+    
+    async def test_post_list(self):
+        for query in ('', '?page=2', '?category=technology&ordering=title', '?pagination=cursor', '?page=9'):
+            with self.subTest(query=query):
+                await self.assert_same_response('blog:post-list', 'blog:async-post-list', query=query)
+    
+    async def test_post_detail(self):
+        for slug in (self.posts[0].slug, 'missing'):
+            with self.subTest(slug=slug):
+                await self.assert_same_response('blog:post-detail', 'blog:async-post-detail', args=[slug])
+    
+    async def test_comment_list(self):
+        slug = self.posts[0].slug
+        for query in ('', '?max_depth=0', '?max_depth=x', '?pagination=cursor'):
+            with self.subTest(query=query):
+                await self.assert_same_response('blog:comment-list', 'blog:async-comment-list', args=[slug], query=query)
+    
+    async def test_permissions_and_throttles_are_checked(self):
+        class Closed(AnonRateThrottle):
+            def allow_request(self, request, view):
+                return False
+            
+            def wait(self):
+                return 30
+        
+        with mock.patch.object(BlogPostListView, 'permission_classes', [IsAuthenticated]):
+            await self.assert_same_response('blog:post-list', 'blog:async-post-list')
+        with mock.patch.object(CommentListCreateView, 'throttle_classes', [Closed]):
+            response = await self.async_client.get(reverse('blog:async-comment-list', args=[self.posts[0].slug]))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+    
+    async def test_unhandled_errors_are_raised_in_debug(self):
+        async def broken(self, view):
+            raise RuntimeError('broken')
+        
+        with override_settings(DEBUG=True), mock.patch.object(AsyncBlogPostListView, 'get_data', broken):
+            with self.assertRaisesMessage(RuntimeError, 'broken'):
+                await self.async_client.get(reverse('blog:async-post-list'))
+
+
+class ViewerStateTests(BlogTestMixin, TestCase):
+    """Tests for the per-user fields on post lists"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.reader = self.create_user('reader')
+        self.category = Category.objects.create(name='Technology')
+        self.posts = self.create_posts(3, self.author, self.category)
+        Like.objects.create(user=self.reader, blog_post=self.posts[1])
+        Like.objects.create(user=self.author, blog_post=self.posts[2])
+        Comment.objects.create(user=self.reader, blog_post=self.posts[2], content='One')
+        Comment.objects.create(user=self.reader, blog_post=self.posts[2], content='Two')
+        Comment.objects.create(user=self.author, blog_post=self.posts[0], content='Mine')
+    
+    def viewer_state(self, response):
+        return {
+            post['id']: (post['is_liked'], post['my_comment_count'])
+            for post in response.data['results']
+        }
+    
+    def test_authenticated_list_includes_viewer_state(self):
+        self.client.force_authenticate(self.reader)
+        response = self.client.get(reverse('blog:post-list'))
+        self.assertEqual(self.viewer_state(response), {
+            self.posts[0].pk: (False, 0),
+            self.posts[1].pk: (True, 0),
+            self.posts[2].pk: (False, 2),
+        })
+        self.client.force_authenticate(self.author)
+        response = self.client.get(reverse('blog:user-posts'))
+        self.assertEqual(self.viewer_state(response)[self.posts[0].pk], (False, 1))
+    
+    def test_anonymous_list_omits_viewer_state(self):
+        response = self.client.get(reverse('blog:post-list'))
+        self.assertNotIn('is_liked', response.data['results'][0])
+        self.assertNotIn('my_comment_count', response.data['results'][0])
+    
+    def test_viewer_state_costs_no_extra_queries(self):
+        self.client.force_authenticate(self.reader)
+        url = reverse('blog:post-list')
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        self.create_posts(10, self.author, self.category)
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(url)
+        self.assertEqual(len(few), len(many))
+    
+    def test_etags_differ_per_user(self):
+        url = reverse('blog:post-list')
+        self.client.force_authenticate(self.reader)
+        etag = self.client.get(url)['ETag']
+        self.client.force_authenticate(self.author)
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+    
+    async def test_async_list_includes_viewer_state(self):
+        token = await sync_to_async(Token.objects.create)(user=self.reader)
+        response = await self.async_client.get(
+            reverse('blog:async-post-list'), headers={'Authorization': f'Token {token.key}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        states = {post['id']: post['is_liked'] for post in json.loads(response.content)['results']}
+        self.assertTrue(states[self.posts[1].pk])
+
+
+class CompiledSerializerTests(BlogTestMixin, TestCase):
+    """Compiled serializers must render byte-identical JSON to the DRF serializers"""
+    
+    def setUp(self):
+        renditions = {
+            'source': 'blog_images/ab/abc.jpg',
+            'thumbnail': {'width': 320, 'height': 320, 'webp': 'blog_images/renditions/abc-thumbnail.webp'},
+            'medium': {'width': 960, 'height': 640, 'webp': 'blog_images/renditions/abc-medium.webp'},
+        }
+        self.author = self.create_user(bio='Writes things')
+        User.objects.filter(pk=self.author.pk).update(
+            # Not a plain name, so it takes the regular URL path
+            profile_picture='profile_pictures/me & you.png',
+            profile_picture_renditions={**renditions, 'source': 'profile_pictures/me & you.png'}
+        )
+        self.other = self.create_user('other')
+        self.category = Category.objects.create(name='Technology', description='Tech')
+        posts = self.create_posts(3, self.author, self.category)
+        self.create_posts(1, self.other, Category.objects.create(name='Travel'))
+        BlogPost.objects.filter(pk=posts[0].pk).update(image='blog_images/ab/abc.jpg', image_renditions=renditions)
+        BlogPost.objects.filter(pk=posts[1].pk).update(image='')
+        
+        root = Comment.objects.create(user=self.author, blog_post=posts[0], content='Root')
+        reply = Comment.objects.create(user=self.other, blog_post=posts[0], content='Reply', parent=root)
+        Comment.objects.create(user=self.author, blog_post=posts[0], content='Nested', parent=reply)
+        Comment.objects.create(user=self.other, blog_post=posts[0], content='Second root')
+        self.post = posts[0]
+        self.request = Request(APIRequestFactory().get('/'))
+    
+    def assert_same_json(self, serializer_class, compiled, queryset, context=None):
+        for request in (None, self.request):
+            with self.subTest(serializer=serializer_class.__name__, request=request is not None):
+                context = {**(context or {}), 'request': request}
+                expected = serializer_class(list(queryset), many=True, context=context).data
+                rows = queryset.values(*compiled.lookups)
+                self.assertEqual(
+                    JSONRenderer().render(compiled.serialize(rows, context)),
+                    JSONRenderer().render(expected)
+                )
+    
+    def test_posts(self):
+        self.assert_same_json(
+            BlogPostListSerializer, CompiledBlogPostListSerializer(), BlogPost.objects.feed()
+        )
+        self.assert_same_json(
+            ViewerBlogPostListSerializer, CompiledViewerBlogPostListSerializer(),
+            BlogPost.objects.feed().with_viewer_state(self.other)
+        )
+    
+    def test_categories_and_users(self):
+        self.assert_same_json(CategorySerializer, CompiledCategorySerializer(), Category.objects.all())
+        self.assert_same_json(UserProfileSerializer, CompiledUserProfileSerializer(), User.objects.order_by('pk'))
+    
+    def test_comment_tree(self):
+        compiled = CompiledCommentSerializer()
+        roots = Comment.objects.filter(blog_post=self.post, parent=None)
+        for limits in ({}, {'max_depth': 1}, {'max_replies': 0}):
+            with self.subTest(**limits):
+                expected = CommentSerializer(
+                    list(roots), many=True, context={'comment_tree': CommentTree.for_post(self.post, **limits)}
+                ).data
+                tree = CommentRowTree.for_post(self.post, compiled.lookups, **limits)
+                data = compiled.serialize(roots.values(*compiled.lookups), {'comment_tree': tree})
+                self.assertEqual(JSONRenderer().render(data), JSONRenderer().render(expected))
+    
+    def test_unsupported_fields_fail_to_compile(self):
+        with self.assertRaises(ImproperlyConfigured):
+            CompiledSerializer(CommentSerializer()).lookups
+
+
+class RendererTests(BlogTestMixin, TestCase):
+    """The blog renderers must render the same bytes as JSONRenderer"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.other = self.create_user('other')
+        self.category = Category.objects.create(name='Technology')
+        self.create_posts(3, self.author, self.category)
+        BlogPost.objects.update(description='Caf\u00e9 \u2028\u2029 "quoted" \x01 </script>')
+        self.create_posts(2, self.other, self.category)
+        post = BlogPost.objects.first()
+        root = Comment.objects.create(user=self.author, blog_post=post, content='Root')
+        Comment.objects.create(user=self.other, blog_post=post, content='Reply', parent=root)
+        self.post = post
+    
+    def payloads(self):
+        yield self.client.get(reverse('blog:post-list'), HTTP_ACCEPT='application/json').data
+        yield self.client.get(reverse('blog:post-detail', args=[self.post.slug])).data
+        yield self.client.get(reverse('blog:comment-list', args=[self.post.slug])).data
+        yield {'author': {'id': 1, 'updated_at': 'x', 'note': f'\x00{"0" * 16}:0'}, 'when': self.post.created_at}
+        yield [{'category': {'id': 1}, 'big': 2 ** 70, 'amount': Decimal('1.50')}]
+    
+    def assert_same_output(self):
+        indented = 'application/json; indent=2'
+        for renderer_class in (BlogJSONRenderer, FragmentJSONRenderer):
+            for data in self.payloads():
+                with self.subTest(renderer=renderer_class.__name__, data=data):
+                    self.assertEqual(renderer_class().render(data), JSONRenderer().render(data))
+                    self.assertEqual(
+                        renderer_class().render(data, indented), JSONRenderer().render(data, indented)
+                    )
+    
+    def test_output_matches_json_renderer(self):
+        self.assert_same_output()
+    
+    def test_output_matches_without_orjson(self):
+        with mock.patch('blog.renderers.orjson', None):
+            self.assert_same_output()
+    
+    @skipUnless(orjson is not None, 'orjson is not installed')
+    def test_floats_differ_only_in_spelling(self):
+        data = {'big': 1e16, 'small': 1e-7}
+        self.assertEqual(BlogJSONRenderer().render(data), b'{"big":1e16,"small":1e-7}')
+        self.assertEqual(json.loads(BlogJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        # Strict JSONRenderer refuses non-finite floats; orjson writes null
+        self.assertEqual(BlogJSONRenderer().render({'score': float('nan')}), b'{"score":null}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'score': float('nan')})
+        with mock.patch('blog.renderers.orjson', None), self.assertRaises(ValueError):
+            BlogJSONRenderer().render({'score': float('inf')})
+    
+    def test_repeated_objects_are_encoded_once(self):
+        data = self.client.get(reverse('blog:post-list'), HTTP_ACCEPT='application/json').data
+        renderer = FragmentJSONRenderer()
+        with mock.patch.object(renderer, 'encode', wraps=renderer.encode) as encode:
+            renderer.render(data)
+        # The page, two authors and one category
+        self.assertEqual(encode.call_count, 4)
+
+
+class ExportTests(BlogTestMixin, TestCase):
+    """Tests for the streaming NDJSON exports"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.client.force_authenticate(self.author)
+        self.category = Category.objects.create(name='Technology')
+        self.posts = self.create_posts(5, self.author, self.category)
+        self.create_posts(1, self.author, self.category, is_published=False)
+        Comment.objects.create(user=self.author, blog_post=self.posts[0], content='Comment')
+        Like.objects.create(user=self.author, blog_post=self.posts[1])
+    
+    def export(self, name, query='', **headers):
+        response = self.client.get(reverse(name) + query, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return response, b''.join(response.streaming_content)
+    
+    def records(self, body):
+        return [json.loads(line) for line in body.decode().splitlines()]
+    
+    def test_exports_published_rows_oldest_change_first(self):
+        _, body = self.export('blog:post-export')
+        records = self.records(body)
+        self.assertEqual([record['id'] for record in records], [post.pk for post in self.posts])
+        self.assertEqual(records[0]['author'], self.author.pk)
+        self.assertEqual(records[0]['category'], self.category.pk)
+        # Counters change without moving updated_at, so since= could not follow them
+        self.assertNotIn('likes_count', records[0])
+        
+        _, body = self.export('blog:comment-export')
+        self.assertEqual([record['content'] for record in self.records(body)], ['Comment'])
+        self.assertNotIn('replies_count', self.records(body)[0])
+        _, body = self.export('blog:like-export')
+        self.assertEqual([record['blog_post'] for record in self.records(body)], [self.posts[1].pk])
+    
+    def test_since_returns_rows_changed_at_or_after(self):
+        self.posts[2].save()
+        since = BlogPost.objects.get(pk=self.posts[2].pk).updated_at
+        _, body = self.export('blog:post-export', '?' + urlencode({'since': since.isoformat()}))
+        self.assertEqual([record['id'] for record in self.records(body)], [self.posts[2].pk])
+        
+        response = self.client.get(reverse('blog:post-export'), {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_rows_stream_in_chunks(self):
+        with override_settings(BLOG_EXPORT={'CHUNK_SIZE': 2}):
+            response = self.client.get(reverse('blog:post-export'))
+            chunks = [chunk for chunk in response.streaming_content if chunk]
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [2, 2, 1])
+    
+    def test_since_is_served_by_an_index(self):
+        for view in (BlogPostExportView, CommentExportView, LikeExportView):
+            with self.subTest(view=view.__name__):
+                queryset = view.queryset.filter(
+                    **{f'{view.since_field}__gte': self.posts[0].created_at}
+                ).order_by(view.since_field, 'pk')
+                self.assertIn('_export_idx', queryset.explain())
+    
+    def test_gzip(self):
+        response, body = self.export('blog:post-export', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(len(self.records(gzip.decompress(body))), 5)
+    
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(reverse('blog:post-export'), HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response.status_code, 403)
+        # The error still negotiates NDJSON, as a single line
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('detail', self.records(response.content)[0])
+    
+    async def test_async_export_streams_asynchronously(self):
+        token = await sync_to_async(Token.objects.create)(user=self.author)
+        response = await self.async_client.get(
+            reverse('blog:post-export'), headers={'Authorization': f'Token {token.key}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(self.records(body)), 5)
+
+
+@override_settings(BLOG_LIKE_BUFFER={**django_settings.BLOG_LIKE_BUFFER, 'ENABLED': True, 'FLUSH_INTERVAL': None})
+class LikeBufferTests(BlogTestMixin, TestCase):
+    """Tests for the write-behind like buffer"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.category = Category.objects.create(name='Technology')
+        self.post = self.create_posts(1, self.author, self.category)[0]
+        self.users = User.objects.bulk_create([
+            User(username=f'fan{index}', email=f'fan{index}@example.com') for index in range(20)
+        ])
+        Like.objects.create(user=self.users[0], blog_post=self.post)
+        BlogPost.objects.refresh_counters()
+        self.buffer = get_like_buffer()
+        self.buffer.cache.clear()
+    
+    def toggle(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post(reverse('blog:post-like', args=[self.post.slug]))
+    
+    def test_toggles_are_buffered_and_reads_include_them(self):
+        response = self.toggle(self.users[0])
+        self.assertEqual((response.status_code, response.data['liked']), (200, False))
+        for user in self.users[1:]:
+            response = self.toggle(user)
+        self.assertEqual((response.status_code, response.data['liked']), (201, True))
+        self.assertEqual(response.data['likes_count'], 19)
+        # Nothing is written until the flush
+        self.assertEqual(Like.objects.filter(blog_post=self.post).count(), 1)
+        
+        response = self.client.get(reverse('blog:post-detail', args=[self.post.slug]))
+        self.assertEqual(response.data['likes_count'], 19)
+        response = self.client.get(reverse('blog:post-list'))
+        self.assertEqual(response.data['results'][0]['likes_count'], 19)
+        self.assertTrue(response.data['results'][0]['is_liked'])
+    
+    def test_flush_applies_net_state_in_bulk(self):
+        for user in self.users:
+            self.toggle(user)
+        # Liked twice over: back where it started
+        self.toggle(self.users[1])
+        self.toggle(self.users[1])
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.buffer.flush(), 22)
+        # One INSERT and one DELETE however many users toggled
+        self.assertLessEqual(len(queries), 9)
+        self.assertEqual(
+            set(Like.objects.filter(blog_post=self.post).values_list('user', flat=True)),
+            {user.pk for user in self.users[1:]}
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 19)
+        self.assertEqual(self.buffer.delta(self.post.pk), 0)
+        self.assertEqual(self.buffer.flush(), 0)
+        
+        response = self.toggle(self.users[2])
+        self.assertEqual((response.data['liked'], response.data['likes_count']), (False, 18))
+    
+    def test_flush_invalidates_cached_responses(self):
+        url = reverse('blog:post-detail', args=[self.post.slug])
+        self.assertEqual(self.client.get(url).data['likes_count'], 1)
+        self.toggle(self.users[1])
+        self.buffer.flush()
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(url).data['likes_count'], 2)
+    
+    def test_toggles_on_deleted_posts_are_dropped(self):
+        self.toggle(self.users[1])
+        self.post.delete()
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertFalse(Like.objects.exists())
+
+
+
+class TrendingTests(BlogTestMixin, TestCase):
+    """Tests for the trending ordering and the post_scores table behind it"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.reader = self.create_user('reader')
+        self.category = Category.objects.create(name='Technology')
+        self.travel = Category.objects.create(name='Travel')
+        self.posts = self.create_posts(3, self.author, self.category)
+        self.trip = self.create_posts(1, self.author, self.travel)[0]
+    
+    def score(self, post):
+        return PostScore.objects.get(pk=post.pk).score
+    
+    def trending(self, query=''):
+        response = self.client.get(reverse('blog:post-list') + '?ordering=-trending' + query)
+        self.assertEqual(response.status_code, 200)
+        return [post['id'] for post in response.data['results']]
+    
+    def test_likes_and_comments_update_scores(self):
+        self.client.force_authenticate(self.reader)
+        self.client.post(reverse('blog:post-like', args=[self.posts[0].slug]))
+        Comment.objects.create(user=self.reader, blog_post=self.posts[0], content='Hot')
+        self.assertEqual(self.score(self.posts[0]), 3.0)
+        
+        self.client.post(reverse('blog:post-like', args=[self.posts[0].slug]))
+        self.assertEqual(self.score(self.posts[0]), 2.0)
+        response = self.client.post(
+            reverse('blog:like-bulk-create'), [{'blog_post': self.posts[1].pk}], format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.score(self.posts[1]), 1.0)
+        
+        # Deleting a post takes its score (and the weight of its comments) with it
+        self.posts[0].delete()
+        self.assertFalse(PostScore.objects.filter(pk=self.posts[0].pk).exists())
+    
+    def test_replies_and_admin_bulk_deletes_cool_posts_down(self):
+        post = self.posts[0]
+        root = Comment.objects.create(user=self.reader, blog_post=post, content='Root')
+        Comment.objects.create(user=self.author, blog_post=post, parent=root, content='Reply')
+        Like.objects.create(user=self.reader, blog_post=post)
+        self.assertEqual(self.score(post), 5.0)
+        # The reply goes in the cascade and takes its weight with it
+        root.delete()
+        self.assertEqual(self.score(post), 1.0)
+        
+        Comment.objects.create(user=self.reader, blog_post=post, content='Again')
+        admin_site = django_admin.site
+        admin_site._registry[Like].delete_queryset(None, Like.objects.filter(blog_post=post))
+        admin_site._registry[Comment].delete_queryset(None, Comment.objects.filter(blog_post=post))
+        self.assertEqual(self.score(post), 0.0)
+    
+    def test_trending_orders_scored_posts_hottest_first(self):
+        Like.objects.create(user=self.reader, blog_post=self.posts[2])
+        Comment.objects.create(user=self.reader, blog_post=self.posts[1], content='Hot')
+        Comment.objects.create(user=self.reader, blog_post=self.trip, content='Far')
+        Like.objects.create(user=self.reader, blog_post=self.trip)
+        
+        self.assertEqual(self.trending(), [self.trip.pk, self.posts[1].pk, self.posts[2].pk])
+        self.assertEqual(self.trending('&category=technology'), [self.posts[1].pk, self.posts[2].pk])
+        
+        # A post moving category takes its score along
+        self.trip.category = self.category
+        self.trip.save()
+        self.assertEqual(self.trending('&category=travel'), [])
+        self.assertEqual(self.trending('&category=technology')[0], self.trip.pk)
+        
+        response = self.client.get(reverse('blog:post-list'), {'ordering': '-trending', 'pagination': 'cursor'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_decay(self):
+        Like.objects.create(user=self.reader, blog_post=self.posts[0])
+        Comment.objects.create(user=self.reader, blog_post=self.posts[1], content='Old')
+        decayed_at = PostScore.objects.get(pk=self.posts[0].pk).decayed_at
+        half_life = django_settings.BLOG_TRENDING['HALF_LIFE']
+        
+        self.assertEqual(decay_scores(now=decayed_at + half_life), (2, 0))
+        self.assertAlmostEqual(self.score(self.posts[0]), 0.5)
+        # Far enough in the future every score falls under MIN_SCORE
+        self.assertEqual(decay_scores(now=decayed_at + 20 * half_life), (2, 2))
+        
+        out = StringIO()
+        call_command('decay_trending_scores', '--rebuild', stdout=out)
+        self.assertIn('2 post(s)', out.getvalue())
+        self.assertAlmostEqual(self.score(self.posts[1]), 2.0, places=3)
+    
+    def test_trending_is_served_by_the_score_index(self):
+        # A feed-shaped table: many posts, few of them with recent activity
+        BlogPost.objects.bulk_create([
+            BlogPost(
+                title=f'Bulk {index}', slug=f'bulk-{index}', description='Description', content='Content',
+                author=self.author, category=self.category, is_published=True
+            )
+            for index in range(2000)
+        ])
+        PostScore.objects.bulk_create([
+            PostScore(blog_post_id=pk, category_id=category_id, score=pk, decayed_at=0)
+            for pk, category_id in BlogPost.objects.values_list('pk', 'category_id')[:200]
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE blog_posts')
+            cursor.execute('ANALYZE post_scores')
+        
+        for query, index in (('', 'post_scores_trending_idx'), ('&category=technology', 'post_scores_category_idx')):
+            with self.subTest(query=query):
+                with CaptureQueriesContext(connection) as queries:
+                    self.trending(query)
+                page_query = next(query['sql'] for query in queries.captured_queries if 'ORDER BY' in query['sql'])
+                with connection.cursor() as cursor:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + page_query)
+                    details = [row[3] for row in cursor.fetchall()]
+                self.assertIn(index, ' '.join(details))
+                self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', details)
+
+
+class MetricsTests(BlogTestMixin, TestCase):
+    """Tests for the per-route request metrics"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.category = Category.objects.create(name='Technology')
+        self.create_posts(3, self.author, self.category)
+        metrics.registry.clear()
+    
+    def scrape(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode()
+    
+    def test_requests_are_recorded_per_route(self):
+        response = self.client.get(reverse('blog:post-list'))
+        self.client.get(reverse('blog:post-list'))
+        self.client.get('/api/blog/no-such-route/')
+        
+        text = self.scrape()
+        route = 'route="blog:post-list"'
+        self.assertIn(f'blog_requests_total{{{route},status="200"}} 2', text)
+        self.assertIn(f'blog_request_duration_seconds_count{{{route}}} 2', text)
+        self.assertIn(f'blog_request_db_queries_count{{{route}}} 2', text)
+        self.assertIn(f'blog_response_bytes_sum{{{route}}} {2 * len(response.content)}', text)
+        self.assertIn(f'blog_request_serialize_seconds_bucket{{{route},le="+Inf"}} 2', text)
+        self.assertIn('blog_requests_total{route="unmatched",status="404"} 1', text)
+        # Scrapes are not recorded
+        self.assertNotIn('route="metrics"', self.scrape())
+    
+    def test_repeated_statements_are_flagged(self):
+        def get_response(request):
+            for post in BlogPost.objects.all():
+                Category.objects.get(pk=post.category_id)
+            return HttpResponse()
+        
+        request = APIRequestFactory().get('/')
+        request.resolver_match = resolve(reverse('blog:post-list'))
+        with self.assertLogs('blog_api.metrics', 'WARNING') as logs:
+            metrics.MetricsMiddleware(get_response)(request)
+        self.assertIn('ran 3 times', logs.output[0])
+        
+        text = self.scrape()
+        self.assertIn('blog_request_duplicate_queries_total{route="blog:post-list"} 2', text)
+        self.assertIn('blog_request_n_plus_one_total{route="blog:post-list"} 1', text)
+    
+    def test_shards_are_summed_across_threads(self):
+        labels = (('route', 'test'),)
+        threads = [
+            threading.Thread(target=metrics.registry.observe, args=('blog_request_db_queries', labels, 4))
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertIn('blog_request_db_queries_bucket{route="test",le="5"} 3', self.scrape())
+    
+    def test_finished_threads_leave_no_shard_behind(self):
+        for _ in range(50):
+            thread = threading.Thread(target=metrics.registry.inc, args=('blog_requests_total', ()))
+            thread.start()
+            thread.join()
+        self.assertIn('blog_requests_total 50\n', self.scrape())
+        self.assertLessEqual(len(metrics.registry._shards), 2)
+    
+    def test_scrapes_need_staff_or_an_allowed_address(self):
+        with self.settings(BLOG_METRICS={**django_settings.BLOG_METRICS, 'ALLOWED_IPS': ['10.0.0.0/8']}):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, 200)
+            self.client.force_login(self.create_user('staff', is_staff=True))
+            self.scrape()
+
+
+class RequestProfilingTests(BlogTestMixin, TestCase):
+    """Tests for on-demand request profiles"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.author = self.create_user()
+        self.staff = self.create_user('staff', is_staff=True)
+        self.category = Category.objects.create(name='Technology')
+        self.post = self.create_posts(1, self.author, self.category)[0]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(BLOG_PROFILING={
+            **django_settings.BLOG_PROFILING, 'DIRECTORY': self.directory, 'MAX_PROFILES': 2,
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+    
+    def test_staff_requests_are_profiled_on_demand(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(reverse('blog:post-list'), HTTP_X_BLOG_PROFILE='sample')
+        self.assertEqual(response.status_code, 200)
+        name = response['X-Blog-Profile']
+        self.assertRegex(name, r'-blog\.post-list\.collapsed$')
+        self.assertEqual(os.listdir(self.directory), [name])
+        
+        url = reverse('blog:comment-list', kwargs={'slug': self.post.slug})
+        response = self.client.get(url, {'_profile': 'cprofile'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['X-Blog-Profile'].endswith('.prof'))
+        self.assertIn('list (blog/views/blog_views.py', ''.join(profiling.self_times(
+            os.path.join(self.directory, response['X-Blog-Profile'])
+        )))
+    
+    def test_other_requests_are_not_profiled(self):
+        response = self.client.get(reverse('blog:post-list'), HTTP_X_BLOG_PROFILE='sample')
+        self.assertNotIn('X-Blog-Profile', response)
+        self.client.force_authenticate(self.author)
+        response = self.client.get(reverse('blog:post-list'), HTTP_X_BLOG_PROFILE='sample')
+        self.assertNotIn('X-Blog-Profile', response)
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(reverse('blog:post-list'), HTTP_X_BLOG_PROFILE='everything')
+        self.assertNotIn('X-Blog-Profile', response)
+        self.assertEqual(os.listdir(self.directory), [])
+    
+    def test_only_the_newest_profiles_are_kept_and_can_be_diffed(self):
+        self.client.force_authenticate(self.staff)
+        names = [
+            self.client.get(reverse('blog:post-list'), HTTP_X_BLOG_PROFILE='cprofile')['X-Blog-Profile']
+            for _ in range(3)
+        ]
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(names[1:]))
+        
+        out = StringIO()
+        call_command('request_profiles', 'list', stdout=out)
+        self.assertEqual([line.split()[-1] for line in out.getvalue().splitlines()], names[:0:-1])
+        
+        out = StringIO()
+        call_command('request_profiles', 'diff', '2', names[2][:22], '--limit', '5', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], f'Share of own time, {names[1]} -> {names[2]}')
+        self.assertEqual(len(lines), 6)
+        with self.assertRaises(CommandError):
+            call_command('request_profiles', 'diff', '1', 'missing')
+
+
+class SeedBlogTests(TestCase):
+    """Tests for the synthetic data generator"""
+    
+    def seed(self, *args):
+        out = StringIO()
+        call_command('seed_blog', '--size', 'tiny', *args, stdout=out)
+        return out.getvalue()
+    
+    def snapshot(self):
+        return {
+            'posts': list(BlogPost.objects.order_by('pk').values_list(
+                'pk', 'slug', 'author_id', 'category_id', 'is_published', 'likes_count', 'comments_count'
+            )),
+            'likes': list(Like.objects.order_by('pk').values_list('user_id', 'blog_post_id')),
+            'comments': list(Comment.objects.order_by('pk').values_list('pk', 'user_id', 'parent_id', 'replies_count')),
+        }
+    
+    def test_rows_are_consistent_and_skewed(self):
+        output = self.seed('--posts', '300', '--likes', '1500', '--comments', '1200')
+        self.assertIn('Seeded 50 users, 5 categories, 300 posts', output)
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(BlogPost.objects.count(), 300)
+        self.assertAlmostEqual(Like.objects.count(), 1500, delta=150)
+        self.assertAlmostEqual(Comment.objects.count(), 1200, delta=120)
+        # Stored counters match the rows, and activity only reaches published posts
+        self.assertFalse(BlogPost.objects.with_counter_drift().exists())
+        self.assertFalse(Comment.objects.with_counter_drift().exists())
+        self.assertFalse(Like.objects.filter(blog_post__is_published=False).exists())
+        self.assertFalse(Comment.objects.filter(parent__isnull=False).exclude(
+            parent__blog_post=F('blog_post')
+        ).exists())
+        self.assertFalse(Comment.objects.filter(parent__created_at__gt=F('created_at')).exists())
+        
+        likes = sorted(BlogPost.objects.values_list('likes_count', flat=True), reverse=True)
+        self.assertGreater(likes[0], 10 * likes[len(likes) // 2])
+        parents = dict(Comment.objects.values_list('pk', 'parent_id'))
+        
+        def depth(pk):
+            return 0 if parents[pk] is None else 1 + depth(parents[pk])
+        self.assertGreaterEqual(max(depth(pk) for pk in parents), 8)
+        # Timestamps are spread out rather than all "now"
+        self.assertGreater(BlogPost.objects.aggregate(Max('created_at'))['created_at__max'] - BlogPost.objects.aggregate(
+            Min('created_at')
+        )['created_at__min'], timedelta(days=300))
+        # Seeded users can log in, and the new posts are searchable and trending
+        self.assertTrue(self.client.login(email='seed1@example.com', password='seed-pass-123'))
+        response = self.client.get(reverse('blog:post-list'), {'search': 'python'})
+        self.assertGreater(response.data['count'], 0)
+        self.assertTrue(PostScore.objects.exists())
+    
+    def test_sequences_are_moved_past_the_seeded_ids(self):
+        with mock.patch.object(connection.ops, 'sequence_reset_sql', return_value=['SELECT 1']) as reset:
+            BlogSeeder(users=2, categories=1, posts=3, likes=2, comments=2).run()
+        seeded = BlogPost.objects.aggregate(Max('pk'))['pk__max']
+        self.assertEqual(reset.call_args.args[1], [User, Category, BlogPost, Like, Comment])
+        # Rows added afterwards, through the API or the ORM, get new ids
+        post = BlogPost.objects.create(
+            title='After', description='D', content='C',
+            author=User.objects.first(), category=Category.objects.first(),
+        )
+        self.assertEqual(post.pk, seeded + 1)
+    
+    def test_the_same_seed_gives_the_same_rows(self):
+        self.seed('--seed', '7')
+        first = self.snapshot()
+        for model in (Comment, Like, BlogPost, Category, User):
+            model.objects.all().delete()
+        self.seed('--seed', '7')
+        self.assertEqual(self.snapshot(), first)
+        for model in (Comment, Like, BlogPost, Category, User):
+            model.objects.all().delete()
+        self.seed('--seed', '8')
+        self.assertNotEqual(self.snapshot()['likes'], first['likes'])
+
+
+class PerformanceBudgetTests(TestCase):
+    """Query, response size and allocation budgets per endpoint
+    
+    The budgets live in ``blog/perf_budgets.json``. After a deliberate
+    change, record new ones with::
+        
+        BLOG_UPDATE_PERF_BUDGETS=1 python manage.py test blog.tests.PerformanceBudgetTests
+    """
+    budgets_path = os.path.join(os.path.dirname(__file__), 'perf_budgets.json')
+    # Allowed growth over the recorded budget; query counts get none
+    tolerance = {'queries': 0, 'bytes': 0.05, 'peak_kib': 0.25}
+    # Allowed growth on top of that, for peaks that differ by one buffer
+    # between processes however the run is set up
+    slack = {'queries': 0, 'bytes': 0, 'peak_kib': 64}
+    # Routes without a budget: their output depends on earlier requests
+    unbudgeted = {'metrics'}
+    # Measured runs per case; the smallest value of each metric counts
+    runs = 3
+    
+    @classmethod
+    def setUpTestData(cls):
+        BlogSeeder(users=20, categories=3, posts=60, likes=400, comments=300, seed=1).run()
+        cls.hot = BlogPost.objects.filter(is_published=True).order_by('-comments_count').first()
+        cls.owner = cls.hot.author
+        cls.reader = User.objects.exclude(pk=cls.owner.pk).order_by('pk').first()
+        cls.comment = Comment.objects.filter(blog_post=cls.hot, parent=None).order_by('pk').first()
+        cls.category = cls.hot.category
+    
+    def setUp(self):
+        metrics.registry.clear()
+    
+    def cases(self):
+        """``(budget name, URL name, method, path arguments, query or body, signed-in user)``"""
+        hot, owner, reader = self.hot, self.owner, self.reader
+        post = {'title': 'Budget post', 'description': 'D', 'content': 'C', 'category': self.category.pk}
+        return [
+            ('categories', 'blog:category-list', 'get', [], None, None),
+            ('category create', 'blog:category-list', 'post', [], {'name': 'Budget'}, reader),
+            ('category detail', 'blog:category-detail', 'get', [self.category.slug], None, None),
+            ('feed', 'blog:post-list', 'get', [], None, None),
+            ('feed signed in', 'blog:post-list', 'get', [], None, reader),
+            ('feed search', 'blog:post-list', 'get', [], {'search': 'python'}, None),
+            ('feed trending', 'blog:post-list', 'get', [], {'ordering': '-trending'}, None),
+            ('feed category', 'blog:post-list', 'get', [], {'category': self.category.slug}, None),
+            ('feed cursor', 'blog:post-list', 'get', [], {'pagination': 'cursor'}, None),
+            ('post create', 'blog:post-create', 'post', [], {**post, 'is_published': True}, reader),
+            ('post bulk create', 'blog:post-bulk-create', 'post', [], [post] * 5, reader),
+            ('post detail', 'blog:post-detail', 'get', [hot.slug], None, None),
+            ('post update', 'blog:post-update', 'patch', [hot.slug], {'title': 'Retitled'}, owner),
+            ('post delete', 'blog:post-delete', 'delete', [hot.slug], None, owner),
+            ('like', 'blog:post-like', 'post', [hot.slug], None, reader),
+            ('my posts', 'blog:user-posts', 'get', [], None, owner),
+            ('comments', 'blog:comment-list', 'get', [hot.slug], None, None),
+            ('comment create', 'blog:comment-list', 'post', [hot.slug], {'content': 'Budget', 'blog_post': hot.pk}, reader),
+            ('comment detail', 'blog:comment-detail', 'get', [self.comment.pk], None, None),
+            ('comment update', 'blog:comment-detail', 'patch', [self.comment.pk], {'content': 'Edited'},
+             self.comment.user),
+            ('comment delete', 'blog:comment-detail', 'delete', [self.comment.pk], None, self.comment.user),
+            ('comment bulk create', 'blog:comment-bulk-create', 'post', [],
+             [{'blog_post': hot.pk, 'content': 'Bulk'}] * 5, reader),
+            ('like bulk create', 'blog:like-bulk-create', 'post', [],
+             [{'blog_post': pk} for pk in BlogPost.objects.filter(is_published=True).values_list('pk', flat=True)[:5]],
+             reader),
+            ('async feed', 'blog:async-post-list', 'get', [], None, None),
+            ('async post detail', 'blog:async-post-detail', 'get', [hot.slug], None, None),
+            ('async comments', 'blog:async-comment-list', 'get', [hot.slug], None, None),
+            ('post export', 'blog:post-export', 'get', [], None, reader),
+            ('comment export', 'blog:comment-export', 'get', [], None, reader),
+            ('like export', 'blog:like-export', 'get', [], None, reader),
+            ('register', 'authentication:register', 'post', [], {
+                'username': 'budget', 'email': 'budget@example.com', 'first_name': 'B', 'last_name': 'B',
+                'password': 'budget-pass-123', 'password_confirm': 'budget-pass-123',
+            }, None),
+            ('login', 'authentication:login', 'post', [], {'email': reader.email, 'password': 'seed-pass-123'}, None),
+            ('logout', 'authentication:logout', 'post', [], None, reader),
+            ('profile', 'authentication:profile', 'get', [], None, reader),
+        ]
+    
+    def request(self, url_name, method, args, data, user):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        response = getattr(client, method)(reverse(url_name, args=args), data, format=None if method == 'get' else 'json')
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, content
+    
+    def measure(self, url_name, method, args, data, user):
+        # A first run, rolled back, fills import and compile caches so the
+        # measured runs only see the endpoint's own work
+        self.run_once(url_name, method, args, data, user)
+        runs = [self.run_once(url_name, method, args, data, user, trace=True) for _ in range(self.runs)]
+        return {metric: min(run[metric] for run in runs) for metric in runs[0]}
+    
+    def run_once(self, url_name, method, args, data, user, trace=False):
+        """Measure one request, rolled back so every run starts from the same rows"""
+        cache.clear()
+        reset_queries()
+        # Garbage left by earlier tests would otherwise be collected at a
+        # point in the request that depends on which tests ran before
+        gc.collect()
+        gc.disable()
+        if trace:
+            tracemalloc.start()
+        try:
+            with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+                response, content = self.request(url_name, method, args, data, user)
+                transaction.set_rollback(True)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            gc.enable()
+        self.assertLess(response.status_code, 300, content[:500])
+        return {'queries': len(queries), 'bytes': len(content), 'peak_kib': round(peak / 1024)}
+    
+    def test_endpoints_stay_within_budget(self):
+        with open(self.budgets_path) as file:
+            budgets = json.load(file)
+        measured = {}
+        for name, url_name, method, args, data, user in self.cases():
+            with self.subTest(name):
+                measured[name] = self.measure(url_name, method, args, data, user)
+        
+        if os.environ.get('BLOG_UPDATE_PERF_BUDGETS'):
+            with open(self.budgets_path, 'w') as file:
+                json.dump(measured, file, indent=2, sort_keys=True)
+                file.write('\n')
+            return
+        for name, actual in measured.items():
+            with self.subTest(name):
+                self.assertIn(name, budgets, 'No budget recorded; set BLOG_UPDATE_PERF_BUDGETS=1 to record one')
+                for metric, value in actual.items():
+                    limit = budgets[name][metric] * (1 + self.tolerance[metric]) + self.slack[metric]
+                    self.assertLessEqual(value, limit, f'{name}: {metric} over budget ({budgets[name][metric]})')
+        self.assertEqual(sorted(budgets), sorted(measured), 'Budgets recorded for cases that no longer exist')
+    
+    def test_every_route_has_a_budget(self):
+        covered = {url_name for _, url_name, *_ in self.cases()} | self.unbudgeted
+        routes = set()
+        for pattern in get_resolver().url_patterns:
+            namespace = getattr(pattern, 'namespace', None)
+            if namespace in ('blog', 'authentication'):
+                routes |= {f'{namespace}:{child.name}' for child in pattern.url_patterns if child.name}
+            elif getattr(pattern, 'name', None):
+                routes.add(pattern.name)
+        self.assertEqual(routes - covered, set())
@@ -0,0 +1,103 @@
+"""
+Trending scores for ``?ordering=-trending``.
+
+Every like and comment adds its weight (``BLOG_TRENDING``) to the post's row
+in ``post_scores`` with a single UPDATE, and unlikes and deleted comments take
+it off again. ``decay_trending_scores`` then halves every score once per
+``HALF_LIFE`` seconds, in one UPDATE, so older activity counts for less. The
+list view orders by the stored score through an index instead of computing
+a decayed sum over likes and comments per request.
+
+Weight added since the last decay is decayed as if it had been there the
+whole time, so run the command well within the half-life (e.g. hourly for a
+day-long half-life).
+"""
+
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest, Power
+
+from blog.cache import POSTS, bump_generations
+from blog.models import BlogPost, Comment, Like, PostScore
+
+
+def add_scores(weights):
+    """Add ``{post_id: weight}`` to the posts' scores, creating rows for new posts
+    
+    Scores never drop below zero, and a negative weight never creates a row
+    (which also keeps cascading deletes from recreating one). One UPDATE per
+    distinct weight when every post already has a row.
+    """
+    by_weight = defaultdict(list)
+    for post_id, weight in weights.items():
+        if weight:
+            by_weight[weight].append(post_id)
+    if not by_weight:
+        return
+    
+    missing = set()
+    for weight, post_ids in by_weight.items():
+        if _add(post_ids, weight) < len(post_ids) and weight > 0:
+            missing.update(post_ids)
+    if not missing:
+        return
+    
+    missing -= set(PostScore.objects.filter(pk__in=missing).values_list('pk', flat=True))
+    now = time.time()
+    # Start new rows at zero and add to them like any other, so a concurrent
+    # insert of the same row cannot swallow a weight
+    PostScore.objects.bulk_create([
+        PostScore(blog_post_id=pk, category_id=category_id, decayed_at=now)
+        for pk, category_id in BlogPost.objects.filter(pk__in=missing).values_list('pk', 'category_id')
+    ], ignore_conflicts=True)
+    for weight, post_ids in by_weight.items():
+        if weight > 0:
+            _add([pk for pk in post_ids if pk in missing], weight)
+
+
+def _add(post_ids, weight):
+    if not post_ids:
+        return 0
+    return PostScore.objects.filter(pk__in=post_ids).update(
+        score=Greatest(F('score') + weight, Value(0.0))
+    )
+
+
+def decay_scores(now=None):
+    """Decay every score to ``now``, drop the ones below ``MIN_SCORE``; returns ``(decayed, dropped)``"""
+    options = settings.BLOG_TRENDING
+    now = time.time() if now is None else now
+    elapsed = Value(now) - F('decayed_at')
+    decayed = PostScore.objects.update(
+        score=F('score') * Power(Value(0.5), elapsed / Value(float(options['HALF_LIFE']))),
+        decayed_at=now,
+    )
+    dropped, _ = PostScore.objects.filter(score__lt=options['MIN_SCORE']).delete()
+    bump_generations(POSTS)
+    return decayed, dropped
+
+
+def rebuild_scores(now=None):
+    """Recompute every score from scratch out of the likes and comments on record"""
+    options = settings.BLOG_TRENDING
+    now = time.time() if now is None else now
+    scores = defaultdict(float)
+    for model, weight in ((Like, options['LIKE_WEIGHT']), (Comment, options['COMMENT_WEIGHT'])):
+        rows = model.objects.order_by().values_list('blog_post_id', 'created_at')
+        for post_id, created_at in rows.iterator(chunk_size=settings.BLOG_EXPORT['CHUNK_SIZE']):
+            scores[post_id] += weight * 0.5 ** ((now - created_at.timestamp()) / options['HALF_LIFE'])
+    
+    posts = BlogPost.objects.order_by().values_list('pk', 'category_id')
+    with transaction.atomic():
+        PostScore.objects.all().delete()
+        PostScore.objects.bulk_create([
+            PostScore(blog_post_id=pk, category_id=category_id, score=scores[pk], decayed_at=now)
+            for pk, category_id in posts.iterator(chunk_size=settings.BLOG_EXPORT['CHUNK_SIZE'])
+            if scores.get(pk, 0) >= options['MIN_SCORE']
+        ], batch_size=settings.BLOG_BULK['BATCH_SIZE'])
+    bump_generations(POSTS)
+    return len(scores)
@@ -12,6 +12,21 @@ from blog.views.blog_views import (
     CommentListCreateView,
     CommentDetailView
 )
+from blog.views.async_views import (
+    AsyncBlogPostListView,
+    AsyncBlogPostDetailView,
+    AsyncCommentListView
+)
+from blog.views.export_views import (
+    BlogPostExportView,
+    CommentExportView,
+    LikeExportView
+)
+from blog.views.bulk_views import (
+    BlogPostBulkCreateView,
+    CommentBulkCreateView,
+    LikeBulkCreateView
+)
 
 app_name = 'blog'
 
@@ -23,6 +38,7 @@ urlpatterns = [
     # Blog Post URLs
     path('posts/', BlogPostListView.as_view(), name='post-list'),
     path('posts/create/', BlogPostCreateView.as_view(), name='post-create'),
+    path('posts/bulk/', BlogPostBulkCreateView.as_view(), name='post-bulk-create'),
     path('posts/<slug:slug>/', BlogPostDetailView.as_view(), name='post-detail'),
     path('posts/<slug:slug>/update/', BlogPostUpdateView.as_view(), name='post-update'),
     path('posts/<slug:slug>/delete/', BlogPostDeleteView.as_view(), name='post-delete'),
@@ -34,4 +50,18 @@ urlpatterns = [
     # Comment URLs
     path('posts/<slug:slug>/comments/', CommentListCreateView.as_view(), name='comment-list'),
     path('comments/<int:pk>/', CommentDetailView.as_view(), name='comment-detail'),
+    path('comments/bulk/', CommentBulkCreateView.as_view(), name='comment-bulk-create'),
+    
+    # Async (ASGI-native) read endpoints
+    path('async/posts/', AsyncBlogPostListView.as_view(), name='async-post-list'),
+    path('async/posts/<slug:slug>/', AsyncBlogPostDetailView.as_view(), name='async-post-detail'),
+    path('async/posts/<slug:slug>/comments/', AsyncCommentListView.as_view(), name='async-comment-list'),
+    
+    # Like URLs
+    path('likes/bulk/', LikeBulkCreateView.as_view(), name='like-bulk-create'),
+    
+    # NDJSON exports
+    path('export/posts/', BlogPostExportView.as_view(), name='post-export'),
+    path('export/comments/', CommentExportView.as_view(), name='comment-export'),
+    path('export/likes/', LikeExportView.as_view(), name='like-export'),
 ]
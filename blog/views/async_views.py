@@ -0,0 +1,134 @@
+"""
+Async (ASGI-native) read endpoints for the blog feed, post detail and comments.
+
+Each view wraps its sync DRF counterpart: the sync view still builds the
+queryset, applies filters and ordering and provides the serializer context.
+None of that touches the database apart from the authentication,
+permission and throttle checks, which run in a worker thread before the
+view does. Only query execution moves to the async ORM (``acount``,
+``aget`` and ``async for``). Serialization then runs on rows that are
+already loaded, so it never queries; Django raises
+``SynchronousOnlyOperation`` if a serializer ever tries.
+
+These endpoints answer JSON only and skip the response cache and HTTP
+validators of the sync views.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.views import View
+
+from blog.likes import pending_likes
+from blog.models import BlogPost
+from blog.renderers import BlogJSONRenderer
+from blog.serializers.comment_tree import CommentRowTree
+from blog.views.blog_views import BlogPostListView, BlogPostDetailView, CommentListCreateView
+
+
+class AsyncReadView(View):
+    """Async GET endpoint backed by the sync DRF view ``view_class``"""
+    view_class = None
+    http_method_names = ['get', 'head', 'options']
+    
+    def get_view(self, request):
+        view = self.view_class()
+        view.setup(request, *self.args, **self.kwargs)
+        view.request = view.initialize_request(request, *self.args, **self.kwargs)
+        view.format_kwarg = None
+        return view
+    
+    def render(self, data, status=200, headers=None):
+        return HttpResponse(
+            BlogJSONRenderer().render(data), status=status, content_type='application/json', headers=headers
+        )
+    
+    def check_request(self, view):
+        """The steps of DRF's ``initial()``; the answer is JSON whatever renderer is negotiated"""
+        request = view.request
+        # handle_exception() reads the accepted renderer
+        request.accepted_renderer, request.accepted_media_type = view.perform_content_negotiation(request)
+        view.perform_authentication(request)
+        view.check_permissions(request)
+        view.check_throttles(request)
+    
+    async def get(self, request, *args, **kwargs):
+        view = self.get_view(request)
+        try:
+            # Authenticators, permissions and throttles may query synchronously;
+            # run them before any view code asks for the user
+            await sync_to_async(self.check_request)(view)
+            data = await self.get_data(view)
+        except Exception as exc:
+            # Adds WWW-Authenticate and turns unauthenticated 401s into 403s as
+            # the sync view does; re-raises what it does not handle
+            response = view.handle_exception(exc)
+            headers = {key: value for key, value in response.items() if key != 'Content-Type'}
+            return self.render(response.data, status=response.status_code, headers=headers)
+        return self.render(data)
+    
+    async def get_data(self, view):
+        raise NotImplementedError
+    
+    async def paginate(self, view, queryset):
+        """``(page, paginator)`` fetched with the async ORM; page is None when unpaginated"""
+        paginator = view.paginator
+        if paginator is None:
+            return [row async for row in queryset], None
+        return await paginator.apaginate_queryset(queryset, view.request, view=view), paginator
+
+
+class AsyncBlogPostListView(AsyncReadView):
+    """Async variant of ``BlogPostListView``"""
+    view_class = BlogPostListView
+    
+    async def get_data(self, view):
+        queryset = view.get_list_queryset()
+        page, paginator = await self.paginate(view, queryset)
+        data = view.serialize_rows(page)
+        if paginator is None:
+            return data
+        return paginator.get_paginated_response(data).data
+
+
+class AsyncBlogPostDetailView(AsyncReadView):
+    """Async variant of ``BlogPostDetailView``"""
+    view_class = BlogPostDetailView
+    
+    async def get_data(self, view):
+        queryset = view.filter_queryset(view.get_queryset())
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        try:
+            post = await queryset.aget(**{view.lookup_field: view.kwargs[lookup_url_kwarg]})
+        except BlogPost.DoesNotExist:
+            raise Http404('No BlogPost matches the given query.')
+        post.likes_count += pending_likes(post.pk)
+        return view.get_serializer(post).data
+
+
+class AsyncCommentListView(AsyncReadView):
+    """Async variant of the GET side of ``CommentListCreateView``"""
+    view_class = CommentListCreateView
+    
+    async def get_data(self, view):
+        try:
+            # Memoized on the sync view, so get_queryset() below does not query
+            view._blog_post = await BlogPost.objects.aget(
+                slug=view.kwargs['slug'], is_published=True
+            )
+        except BlogPost.DoesNotExist:
+            raise Http404('No BlogPost matches the given query.')
+        
+        compiled = view.compiled_serializer
+        queryset = view.filter_queryset(view.get_queryset()).values(*compiled.lookups)
+        page, paginator = await self.paginate(view, queryset)
+        tree = await CommentRowTree.afor_post(
+            view._blog_post,
+            compiled.lookups,
+            max_depth=view.get_limit_param('max_depth'),
+            max_replies=view.get_limit_param('max_replies')
+        )
+        context = {**view.get_serializer_context(), 'comment_tree': tree}
+        data = compiled.serialize(page, context)
+        if paginator is None:
+            return data
+        return paginator.get_paginated_response(data).data
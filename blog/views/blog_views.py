@@ -1,9 +1,25 @@
 from rest_framework import generics, status, filters
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.decorators import api_view, permission_classes
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from blog.models import Category, BlogPost, Like, Comment
+from blog.cache import (
+    CATEGORIES,
+    POSTS,
+    USERS,
+    CachedResponseMixin,
+    category_generation,
+    post_generation,
+)
+from blog.conditional import ConditionalGetMixin, validators_for
+from blog.filters import BlogPostOrderingFilter, BlogPostSearchFilter
+from blog.likes import get_like_buffer, merge_pending_likes, pending_likes
+from blog.pagination import KeysetPagination, OptionalCursorPagination
 from blog.serializers.blog_serializers import (
     CategorySerializer,
     BlogPostListSerializer,
@@ -11,19 +27,35 @@ from blog.serializers.blog_serializers import (
     BlogPostCreateUpdateSerializer,
     LikeSerializer,
     CommentSerializer,
-    CommentCreateUpdateSerializer
+    CommentCreateUpdateSerializer,
+    ViewerBlogPostListSerializer,
+)
+from blog.serializers.comment_tree import CommentRowTree
+from blog.serializers.compiled_serializers import (
+    CompiledBlogPostListSerializer,
+    CompiledCategorySerializer,
+    CompiledCommentSerializer,
+    CompiledViewerBlogPostListSerializer,
 )
+from blog_api.compiled_serializers import CompiledListMixin
+from blog_api.profiling import ProfiledViewMixin
+from blog_api.uploads import StreamingImageUploadMixin
 
 
-class CategoryListCreateView(generics.ListCreateAPIView):
+class CategoryListCreateView(CachedResponseMixin, CompiledListMixin, generics.ListCreateAPIView):
     """View for listing and creating categories"""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    compiled_serializer = CompiledCategorySerializer()
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
+    cache_query_params = ('search', 'ordering', 'page')
+    
+    def get_cache_generations(self):
+        return [CATEGORIES]
 
 
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -34,21 +66,106 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     lookup_field = 'slug'
 
 
-class BlogPostListView(generics.ListAPIView):
+class ViewerPostListMixin:
+    """Post lists that add ``is_liked``/``my_comment_count`` for authenticated users
+    
+    Both come from correlated subqueries on the page query, not a lookup per
+    post. Anonymous requests get the plain list and never pay for them.
+    """
+    viewer_serializer_class = ViewerBlogPostListSerializer
+    viewer_compiled_serializer = CompiledViewerBlogPostListSerializer()
+    
+    def has_viewer(self):
+        return self.request.user.is_authenticated
+    
+    def get_serializer_class(self):
+        return self.viewer_serializer_class if self.has_viewer() else super().get_serializer_class()
+    
+    def get_compiled_serializer(self):
+        return self.viewer_compiled_serializer if self.has_viewer() else super().get_compiled_serializer()
+    
+    def get_list_queryset(self):
+        if not self.has_viewer():
+            return super().get_list_queryset()
+        queryset = self.filter_queryset(self.get_queryset()).with_viewer_state(self.request.user)
+        return queryset.values(*self.get_compiled_serializer().lookups)
+    
+    def serialize_rows(self, rows):
+        user_id = self.request.user.pk if self.has_viewer() else None
+        return merge_pending_likes(super().serialize_rows(rows), user_id)
+
+
+class PostListConditionalMixin(ConditionalGetMixin):
+    """Weak validators for post lists from one aggregate over the filtered set
+    
+    Keyset pages are left unvalidated: aggregating the whole set would undo
+    the point of skipping the COUNT(*). Authenticated users get their own
+    validators, as their lists carry per-user fields.
+    """
+    
+    def get_validators(self):
+        if KeysetPagination.is_requested(self.request):
+            return None, None
+        stats = self.filter_queryset(self.get_queryset()).aggregate(**self.get_validator_aggregates())
+        # The page-number paginator reuses the count instead of running its own
+        self.paginator_count = stats['total']
+        return validators_for(self.request, [self.request.user.pk, *stats.values()], weak=True)
+    
+    def get_validator_aggregates(self):
+        return {
+            'total': Count('pk'),
+            'updated_at': Max('updated_at'),
+            'likes': Sum('likes_count'),
+            'comments': Sum('comments_count'),
+            'authors_updated_at': Max('author__updated_at'),
+            'categories_updated_at': Max('category__updated_at'),
+        }
+
+
+class BlogPostListView(
+    ProfiledViewMixin,
+    CachedResponseMixin,
+    PostListConditionalMixin,
+    ViewerPostListMixin,
+    CompiledListMixin,
+    generics.ListAPIView,
+):
     """View for listing blog posts"""
     serializer_class = BlogPostListSerializer
+    compiled_serializer = CompiledBlogPostListSerializer()
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = OptionalCursorPagination
+    filter_backends = [BlogPostOrderingFilter, BlogPostSearchFilter]
     search_fields = ['title', 'description', 'content']
-    ordering_fields = ['created_at', 'updated_at', 'title']
+    ordering_fields = ['created_at', 'updated_at', 'title', 'trending']
     ordering = ['-created_at']
+    cache_query_params = ('category', 'author', 'search', 'ordering', 'page', 'pagination', 'cursor')
+    
+    def get_cache_generations(self):
+        category = self.request.query_params.get('category')
+        if category:
+            return [category_generation(category), USERS]
+        return [POSTS, USERS]
+    
+    def orders_by_trending(self):
+        return BlogPostOrderingFilter().orders_by_trending(self.request, BlogPost.objects.none(), self)
+    
+    def get_validator_aggregates(self):
+        aggregates = super().get_validator_aggregates()
+        if self.orders_by_trending():
+            # Decay reorders the feed without changing any post
+            aggregates['scores_decayed_at'] = Max('score__decayed_at')
+        return aggregates
     
     def get_queryset(self):
-        queryset = BlogPost.objects.filter(is_published=True)
+        queryset = BlogPost.objects.feed().filter(is_published=True)
         category = self.request.query_params.get('category')
         author = self.request.query_params.get('author')
         
-        if category:
+        if category and self.orders_by_trending():
+            # Lets the trending feed walk post_scores_category_idx
+            queryset = queryset.filter(score__category__slug=category)
+        elif category:
             queryset = queryset.filter(category__slug=category)
         if author:
             queryset = queryset.filter(author__username=author)
@@ -56,7 +173,7 @@ class BlogPostListView(generics.ListAPIView):
         return queryset
 
 
-class BlogPostCreateView(generics.CreateAPIView):
+class BlogPostCreateView(StreamingImageUploadMixin, generics.CreateAPIView):
     """View for creating blog posts"""
     serializer_class = BlogPostCreateUpdateSerializer
     permission_classes = [IsAuthenticated]
@@ -72,15 +189,34 @@ class BlogPostCreateView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
-class BlogPostDetailView(generics.RetrieveAPIView):
+class BlogPostDetailView(CachedResponseMixin, ConditionalGetMixin, generics.RetrieveAPIView):
     """View for blog post detail"""
-    queryset = BlogPost.objects.filter(is_published=True)
+    queryset = BlogPost.objects.feed().with_freshness().filter(is_published=True)
     serializer_class = BlogPostDetailSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
+    
+    def get_cache_generations(self):
+        return [post_generation(self.kwargs['slug']), CATEGORIES, USERS]
+    
+    def get_object(self):
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+            self._object.likes_count += pending_likes(self._object.pk)
+        return self._object
+    
+    def get_validators(self):
+        try:
+            post = self.get_object()
+        except Http404:
+            return None, None
+        return validators_for(self.request, (
+            post.pk, post.updated_at, post.likes_count, post.comments_count,
+            post.author.updated_at, post.category.updated_at, post.last_comment_at
+        ))
 
 
-class BlogPostUpdateView(generics.UpdateAPIView):
+class BlogPostUpdateView(StreamingImageUploadMixin, generics.UpdateAPIView):
     """View for updating blog posts"""
     serializer_class = BlogPostCreateUpdateSerializer
     permission_classes = [IsAuthenticated]
@@ -118,31 +254,47 @@ class BlogPostDeleteView(generics.DestroyAPIView):
         }, status=status.HTTP_204_NO_CONTENT)
 
 
-class UserBlogPostsView(generics.ListAPIView):
+class UserBlogPostsView(PostListConditionalMixin, ViewerPostListMixin, CompiledListMixin, generics.ListAPIView):
     """View for listing user's blog posts"""
     serializer_class = BlogPostListSerializer
+    compiled_serializer = CompiledBlogPostListSerializer()
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = OptionalCursorPagination
+    filter_backends = [filters.OrderingFilter, BlogPostSearchFilter]
     search_fields = ['title', 'description', 'content']
     ordering_fields = ['created_at', 'updated_at', 'title']
     ordering = ['-created_at']
     
     def get_queryset(self):
-        return BlogPost.objects.filter(author=self.request.user)
+        return BlogPost.objects.feed().filter(author=self.request.user)
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def toggle_like(request, slug):
     """Toggle like on a blog post"""
-    blog_post = get_object_or_404(BlogPost, slug=slug, is_published=True)
-    like, created = Like.objects.get_or_create(
-        user=request.user,
-        blog_post=blog_post
-    )
+    # The cache signals need the category slug
+    blog_post = get_object_or_404(BlogPost.objects.select_related('category'), slug=slug, is_published=True)
+    buffer = get_like_buffer()
+    if buffer is not None:
+        # Written behind by blog.likes; report the state the user will see
+        created = buffer.toggle(request.user.pk, blog_post.pk)
+        blog_post.likes_count += buffer.delta(blog_post.pk)
+    else:
+        with transaction.atomic():
+            like, created = Like.objects.get_or_create(
+                user=request.user,
+                blog_post=blog_post
+            )
+            if created:
+                BlogPost.objects.filter(pk=blog_post.pk).update(likes_count=F('likes_count') + 1)
+            else:
+                # blog.signals recounts the post
+                like.blog_post = blog_post
+                like.delete()
+        blog_post.refresh_from_db(fields=['likes_count'])
     
     if not created:
-        like.delete()
         return Response({
             'message': 'Like removed',
             'liked': False,
@@ -156,28 +308,82 @@ def toggle_like(request, slug):
     }, status=status.HTTP_201_CREATED)
 
 
-class CommentListCreateView(generics.ListCreateAPIView):
+class CommentListCreateView(ProfiledViewMixin, ConditionalGetMixin, generics.ListCreateAPIView):
     """View for listing and creating comments"""
     serializer_class = CommentSerializer
+    compiled_serializer = CompiledCommentSerializer()
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = OptionalCursorPagination
+    
+    def get_blog_post(self):
+        if not hasattr(self, '_blog_post'):
+            blog_post_slug = self.kwargs.get('slug')
+            self._blog_post = get_object_or_404(
+                BlogPost.objects.with_freshness(),
+                slug=blog_post_slug,
+                is_published=True
+            )
+        return self._blog_post
+    
+    def get_validators(self):
+        try:
+            post = self.get_blog_post()
+        except Http404:
+            return None, None
+        return validators_for(self.request, (
+            post.pk, post.updated_at, post.likes_count, post.comments_count,
+            post.last_comment_at, post.last_commenter_at
+        ))
     
     def get_queryset(self):
-        blog_post_slug = self.kwargs.get('slug')
-        blog_post = get_object_or_404(BlogPost, slug=blog_post_slug, is_published=True)
-        return Comment.objects.filter(blog_post=blog_post, parent=None)
+        return Comment.objects.filter(
+            blog_post=self.get_blog_post(),
+            parent=None
+        ).select_related('user')
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return CommentCreateUpdateSerializer
         return CommentSerializer
     
+    def get_limit_param(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        try:
+            value = int(value)
+        except ValueError:
+            value = -1
+        if value < 0:
+            raise ValidationError({name: 'Must be a non-negative integer.'})
+        return value
+    
+    def list(self, request, *args, **kwargs):
+        compiled = self.compiled_serializer
+        queryset = self.filter_queryset(self.get_queryset()).values(*compiled.lookups)
+        page = self.paginate_queryset(queryset)
+        tree = CommentRowTree.for_post(
+            self.get_blog_post(),
+            compiled.lookups,
+            max_depth=self.get_limit_param('max_depth'),
+            max_replies=self.get_limit_param('max_replies')
+        )
+        context = {**self.get_serializer_context(), 'comment_tree': tree}
+        
+        if page is not None:
+            return self.get_paginated_response(compiled.serialize(page, context))
+        return Response(compiled.serialize(queryset, context))
+    
     def create(self, request, *args, **kwargs):
-        blog_post_slug = self.kwargs.get('slug')
-        blog_post = get_object_or_404(BlogPost, slug=blog_post_slug, is_published=True)
+        blog_post = self.get_blog_post()
         
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        comment = serializer.save(blog_post=blog_post)
+        with transaction.atomic():
+            comment = serializer.save(blog_post=blog_post)
+            BlogPost.objects.filter(pk=blog_post.pk).update(comments_count=F('comments_count') + 1)
+            if comment.parent_id:
+                Comment.objects.filter(pk=comment.parent_id).update(replies_count=F('replies_count') + 1)
         
         return Response({
             'comment': CommentSerializer(comment).data,
@@ -202,9 +408,18 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
+        previous = (instance.blog_post_id, instance.parent_id)
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        with transaction.atomic():
+            self.perform_update(serializer)
+            if (instance.blog_post_id, instance.parent_id) != previous:
+                BlogPost.objects.filter(
+                    pk__in=[previous[0], instance.blog_post_id]
+                ).refresh_counters()
+                Comment.objects.filter(
+                    pk__in=[previous[1], instance.parent_id]
+                ).refresh_counters()
         
         return Response({
             'comment': CommentSerializer(instance).data,
@@ -213,6 +428,7 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
+        # blog.signals recounts the post and the parent comment
         self.perform_destroy(instance)
         return Response({
             'message': 'Comment deleted successfully'
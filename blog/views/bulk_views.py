@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.db import transaction
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from blog.serializers.bulk_serializers import (
+    BlogPostBulkSerializer,
+    CommentBulkSerializer,
+    LikeBulkSerializer
+)
+
+
+class BulkCreateView(generics.GenericAPIView):
+    """Create a list of objects in batched INSERTs and report the outcome per item
+    
+    Responds 201 when every item was accepted, 207 when only some were and
+    400 when none were.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get_batch_size(self):
+        options = settings.BLOG_BULK
+        value = self.request.query_params.get('batch_size')
+        if value is None:
+            return options['BATCH_SIZE']
+        try:
+            value = int(value)
+        except ValueError:
+            value = 0
+        if not 0 < value <= options['MAX_BATCH_SIZE']:
+            raise ValidationError({
+                'batch_size': f"Must be between 1 and {options['MAX_BATCH_SIZE']}."
+            })
+        return value
+    
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'batch_size': self.get_batch_size()}
+    
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(
+            data=request.data, many=True, max_length=settings.BLOG_BULK['MAX_ITEMS']
+        )
+        serializer.is_valid(raise_exception=True)
+        instances = []
+        if serializer.validated_data:
+            with transaction.atomic():
+                instances = serializer.save()
+        
+        failed = len(serializer.item_errors)
+        if not failed:
+            response_status = status.HTTP_201_CREATED
+        elif instances:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({
+            'succeeded': len(instances),
+            'failed': failed,
+            'results': serializer.results(instances),
+        }, status=response_status)
+
+
+class BlogPostBulkCreateView(BulkCreateView):
+    """View for creating many blog posts at once"""
+    serializer_class = BlogPostBulkSerializer
+
+
+class CommentBulkCreateView(BulkCreateView):
+    """View for creating many comments at once"""
+    serializer_class = CommentBulkSerializer
+
+
+class LikeBulkCreateView(BulkCreateView):
+    """View for liking many blog posts at once"""
+    serializer_class = LikeBulkSerializer
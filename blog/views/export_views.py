@@ -0,0 +1,150 @@
+import re
+import zlib
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+
+from blog.models import BlogPost, Comment, Like
+from blog.renderers import BlogJSONRenderer, NDJSONRenderer
+from blog.serializers.export_serializers import (
+    CompiledBlogPostExportSerializer,
+    CompiledCommentExportSerializer,
+    CompiledLikeExportSerializer
+)
+
+
+# Matched against Accept-Encoding as GZipMiddleware does
+accepts_gzip = re.compile(r'\bgzip\b')
+
+
+class NDJSONEncoder:
+    """Encode records as NDJSON, buffering ``chunk_size`` lines per output chunk
+    
+    With ``gzip`` the output is a single gzip stream, flushed after every
+    chunk so clients can decompress each one as soon as it arrives.
+    """
+    
+    def __init__(self, chunk_size, gzip=False):
+        self.chunk_size = chunk_size
+        self.renderer = BlogJSONRenderer()
+        self.compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if gzip else None
+        self.lines = []
+    
+    def add(self, record):
+        """Buffer ``record``; returns the next chunk once it is full, else b''"""
+        self.lines.append(self.renderer.encode(record))
+        if len(self.lines) < self.chunk_size:
+            return b''
+        return self.drain()
+    
+    def close(self):
+        """Whatever is still buffered, ending the gzip stream"""
+        data = self.drain()
+        if self.compressor is not None:
+            data += self.compressor.flush()
+        return data
+    
+    def drain(self):
+        if not self.lines:
+            return b''
+        data = b'\n'.join(self.lines) + b'\n'
+        self.lines = []
+        if self.compressor is not None:
+            data = self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data
+
+
+class ExportView(generics.GenericAPIView):
+    """Stream every row of ``queryset`` as NDJSON, oldest change first
+    
+    ``?since=<ISO 8601 datetime>`` limits the export to rows changed at or
+    after that moment, for incremental pulls. Rows are read through
+    ``QuerySet.iterator()`` in chunks of ``BLOG_EXPORT['CHUNK_SIZE']``, so
+    memory use does not grow with the table. The body is gzipped as it
+    streams when the client accepts gzip.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [BlogJSONRenderer, NDJSONRenderer]
+    compiled_serializer = None
+    since_field = 'updated_at'
+    content_type = NDJSONRenderer.media_type
+    
+    def get_since(self):
+        value = self.request.query_params.get('since')
+        if not value:
+            return None
+        try:
+            since = parse_datetime(value)
+        except ValueError:
+            since = None
+        if since is None:
+            raise ValidationError({'since': 'Must be an ISO 8601 datetime.'})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        since = self.get_since()
+        if since is not None:
+            queryset = queryset.filter(**{f'{self.since_field}__gte': since})
+        return queryset.order_by(self.since_field, 'pk').values(*self.compiled_serializer.lookups)
+    
+    def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        chunk_size = settings.BLOG_EXPORT['CHUNK_SIZE']
+        gzip = bool(accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        encoder = NDJSONEncoder(chunk_size, gzip=gzip)
+        context = self.compiled_serializer.get_context(self.get_serializer_context())
+        
+        # An ASGI server would buffer a sync iterator whole, so feed it an async one
+        if isinstance(request._request, ASGIRequest):
+            content = self.astream(queryset.aiterator(chunk_size=chunk_size), context, encoder)
+        else:
+            content = self.stream(queryset.iterator(chunk_size=chunk_size), context, encoder)
+        
+        response = StreamingHttpResponse(content, content_type=self.content_type)
+        if gzip:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+    
+    def stream(self, rows, context, encoder):
+        for row in rows:
+            chunk = encoder.add(self.compiled_serializer.to_representation(row, context))
+            if chunk:
+                yield chunk
+        yield encoder.close()
+    
+    async def astream(self, rows, context, encoder):
+        async for row in rows:
+            chunk = encoder.add(self.compiled_serializer.to_representation(row, context))
+            if chunk:
+                yield chunk
+        yield encoder.close()
+
+
+class BlogPostExportView(ExportView):
+    """NDJSON export of published blog posts"""
+    queryset = BlogPost.objects.filter(is_published=True)
+    compiled_serializer = CompiledBlogPostExportSerializer()
+
+
+class CommentExportView(ExportView):
+    """NDJSON export of comments on published blog posts"""
+    queryset = Comment.objects.filter(blog_post__is_published=True)
+    compiled_serializer = CompiledCommentExportSerializer()
+
+
+class LikeExportView(ExportView):
+    """NDJSON export of likes on published blog posts; likes never change, so ``since`` reads ``created_at``"""
+    queryset = Like.objects.filter(blog_post__is_published=True)
+    compiled_serializer = CompiledLikeExportSerializer()
+    since_field = 'created_at'
@@ -0,0 +1,226 @@
+"""
+Compiled read-only serializers for the hot list endpoints.
+
+DRF serializes each row field by field, through ``get_attribute`` and
+``to_representation`` and nested serializers. On a list page that costs
+more CPU than the query does. ``CompiledSerializer`` inspects a
+``ModelSerializer`` once and turns every readable field into an accessor
+over ``.values()`` rows. A page is then built from plain dict lookups plus a
+few converters (datetimes, file URLs and renditions). The output is the
+same as the serializer it was compiled from. A field it cannot reproduce
+raises ``ImproperlyConfigured`` when it is compiled, so it cannot silently
+render differently.
+"""
+
+import re
+from functools import cached_property, partial
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from blog_api.images import RenditionsField, rendition_urls
+from blog_api.metrics import phase
+
+
+# Fields that represent a value loaded from the database as the value itself
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+# Names and base URLs that ``storage.url()`` and ``build_absolute_uri()`` leave
+# as they are: URL-safe characters only, and no '.' or '..' path segments
+PLAIN_NAME = re.compile(r'(?!.*(?:^|/)\.\.?(?:/|$))[\w.-]+(?:/[\w.-]+)*\Z', re.ASCII)
+PLAIN_BASE_URL = re.compile(r'/(?:(?!\.\.?/)[\w.-]+/)*\Z', re.ASCII)
+
+
+class FileURLs:
+    """File URLs for one serialization pass, as ``FileField`` renders them
+    
+    For a plain name under a plain ``FileSystemStorage`` base URL, ``urljoin``
+    and ``build_absolute_uri`` amount to string concatenation. Those names
+    skip both, and every other name takes the regular path.
+    """
+    
+    def __init__(self, request=None):
+        self.request = request
+        self.host = request.build_absolute_uri('/')[:-1] if request is not None else ''
+        self.prefixes = {}
+    
+    def prefix(self, storage):
+        if storage not in self.prefixes:
+            base_url = storage.base_url if isinstance(storage, FileSystemStorage) else None
+            plain = base_url is not None and PLAIN_BASE_URL.match(base_url)
+            self.prefixes[storage] = self.host + base_url if plain else None
+        return self.prefixes[storage]
+    
+    def url(self, storage, name):
+        prefix = self.prefix(storage)
+        if prefix is not None and PLAIN_NAME.match(name):
+            return prefix + name
+        url = storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request is not None else url
+
+
+class CompiledSerializer:
+    """Read-only equivalent of ``serializer_class`` over ``.values(*lookups)`` rows
+    
+    A ``SerializerMethodField`` is served by a ``get_<name>(row, context)``
+    method on the subclass.
+    """
+    serializer_class = None
+    
+    def __init__(self, serializer=None, prefix=''):
+        self.serializer = serializer if serializer is not None else self.serializer_class()
+        self.prefix = prefix
+        self.nested = []
+    
+    @cached_property
+    def accessors(self):
+        """``(name, lookup, convert)`` per readable field, in output order
+        
+        ``convert(value, row, context)`` runs on non-null values, or is None
+        when the value is used as is. A field without a lookup is a method
+        field, called as ``convert(row, context)``.
+        """
+        return [
+            (field.field_name, *self.compile_field(field))
+            for field in self.serializer._readable_fields
+        ]
+    
+    @cached_property
+    def lookups(self):
+        """Lookups to pass to ``QuerySet.values()``"""
+        lookups = [lookup for _, lookup, _ in self.accessors if lookup is not None]
+        for nested in self.nested:
+            lookups.extend(nested.lookups)
+        return tuple(lookups)
+    
+    def serialize(self, rows, context=None):
+        """Representations of ``rows``; ``context`` is the usual serializer context"""
+        with phase('serialize'):
+            return list(self.iterate(rows, context))
+    
+    def iterate(self, rows, context=None):
+        """``serialize`` one row at a time, for rows streamed from ``QuerySet.iterator()``"""
+        context = self.get_context(context)
+        for row in rows:
+            yield self.to_representation(row, context)
+    
+    def get_context(self, context=None):
+        """``context`` plus the per-pass state ``to_representation`` expects"""
+        context = {**(context or {})}
+        context.update(
+            timezone=timezone.get_current_timezone() if settings.USE_TZ else None,
+            file_urls=FileURLs(context.get('request')),
+        )
+        return context
+    
+    def to_representation(self, row, context):
+        data = {}
+        for name, lookup, convert in self.accessors:
+            if lookup is None:
+                data[name] = convert(row, context)
+                continue
+            value = row[lookup]
+            if value is not None and convert is not None:
+                value = convert(value, row, context)
+            data[name] = value
+        return data
+    
+    def compile_field(self, field):
+        """``(lookup, convert)`` reproducing ``field.to_representation``"""
+        if isinstance(field, serializers.SerializerMethodField):
+            method = getattr(self, f'get_{field.field_name}', None)
+            if method is None:
+                raise self.unsupported(field, f'define get_{field.field_name}(row, context)')
+            return None, method
+        if field.source == '*' or isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+            raise self.unsupported(field)
+        
+        lookup = self.prefix + '__'.join(field.source_attrs)
+        if isinstance(field, serializers.BaseSerializer):
+            nested = CompiledSerializer(field, prefix=lookup + '__')
+            self.nested.append(nested)
+            return lookup, lambda value, row, context: nested.to_representation(row, context)
+        if isinstance(field, RenditionsField):
+            storage = self.model_field(field.image_field).storage
+            return lookup, lambda value, row, context: rendition_urls(
+                value, partial(context['file_urls'].url, storage)
+            )
+        if isinstance(field, serializers.FileField):
+            return lookup, self.compile_file(field)
+        if isinstance(field, serializers.DateTimeField):
+            return lookup, self.compile_datetime(field)
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            return lookup, None
+        if isinstance(field, serializers.RelatedField):
+            raise self.unsupported(field)
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            return lookup, None
+        return lookup, lambda value, row, context: field.to_representation(value)
+    
+    def compile_file(self, field):
+        storage = self.model_field(field.source).storage
+        use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+        
+        def convert(value, row, context):
+            if not value:
+                return None
+            if not use_url:
+                return value
+            return context['file_urls'].url(storage, value)
+        return convert
+    
+    def compile_datetime(self, field):
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if (
+            output_format is None or output_format.lower() != ISO_8601
+            or hasattr(field, 'timezone') or not settings.USE_TZ
+        ):
+            return lambda value, row, context: field.to_representation(value)
+        
+        def convert(value, row, context):
+            value = value.astimezone(context['timezone']).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+    
+    def model_field(self, name):
+        return self.serializer.Meta.model._meta.get_field(name)
+    
+    def unsupported(self, field, hint='serialize it with the regular serializer'):
+        return ImproperlyConfigured(
+            f'{type(self).__name__} cannot compile {type(self.serializer).__name__}.'
+            f'{field.field_name} ({type(field).__name__}); {hint}.'
+        )
+
+
+class CompiledListMixin:
+    """List GETs of a generic view served by ``compiled_serializer`` over ``.values()`` rows"""
+    compiled_serializer = None
+    
+    def get_compiled_serializer(self):
+        return self.compiled_serializer
+    
+    def get_list_queryset(self):
+        return self.filter_queryset(self.get_queryset()).values(*self.get_compiled_serializer().lookups)
+    
+    def serialize_rows(self, rows):
+        return self.get_compiled_serializer().serialize(rows, self.get_serializer_context())
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_list_queryset()
+        page = self.paginate_queryset(queryset)
+        
+        if page is not None:
+            return self.get_paginated_response(self.serialize_rows(page))
+        return Response(self.serialize_rows(queryset))
@@ -0,0 +1,198 @@
+"""
+Background image pipeline for uploaded pictures.
+
+Saving a model with an image field schedules the Pillow work on a small
+thread pool once the transaction commits. The worker strips EXIF (after
+applying its orientation), re-encodes to the configured formats and writes
+one file per rendition size. It then stores a map of the results in a JSON
+field next to the image. Serializers read that map through
+``RenditionsField``, so payloads can point at thumbnails instead of the
+multi-MB originals.
+"""
+
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.signals import setting_changed
+from django.db import connections, transaction
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+
+logger = logging.getLogger(__name__)
+
+# Sent with ``sender=<model>, instance_pk, field_name`` once new renditions are stored
+renditions_ready = Signal()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_PIPELINE['WORKERS'],
+                thread_name_prefix='image-pipeline'
+            )
+        return _executor
+
+
+@receiver(setting_changed)
+def reset_executor(setting, **kwargs):
+    global _executor
+    if setting == 'IMAGE_PIPELINE':
+        with _executor_lock:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = None
+
+
+def supported_formats():
+    """Configured output formats this Pillow build can encode"""
+    Image.init()
+    return [fmt for fmt in settings.IMAGE_PIPELINE['FORMATS'] if fmt.upper() in Image.SAVE]
+
+
+def sync_renditions(instance, field_name, renditions_field):
+    """Schedule processing when the image of ``instance`` changed since its renditions were built"""
+    options = settings.IMAGE_PIPELINE
+    if not options['ENABLED']:
+        return
+    name = getattr(instance, field_name).name or ''
+    renditions = getattr(instance, renditions_field) or {}
+    if renditions.get('source', '') == name:
+        return
+    
+    task = (type(instance), instance.pk, field_name, renditions_field, name)
+    if options['EAGER']:
+        process_renditions(*task)
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_run_in_worker, *task))
+
+
+def _run_in_worker(*task):
+    try:
+        process_renditions(*task)
+    except Exception:
+        logger.exception('Image processing failed for %s pk=%s', task[0]._meta.label, task[1])
+    finally:
+        # Worker threads are long-lived; do not keep their connections open
+        connections.close_all()
+
+
+def process_renditions(model, pk, field_name, renditions_field, name):
+    """Build the renditions of image ``name`` and store them unless it was replaced meanwhile"""
+    storage = model._meta.get_field(field_name).storage
+    renditions = {'source': name}
+    if name:
+        with storage.open(name, 'rb') as source:
+            image = Image.open(source)
+            image = ImageOps.exif_transpose(image)
+            image.load()
+        renditions.update(render(image, name, storage))
+    
+    # Only the row still pointing at ``name`` takes the result, and auto_now
+    # fields are bumped as save() would so HTTP validators change too
+    updates = {renditions_field: renditions}
+    updates.update(
+        (field.name, timezone.now())
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+    )
+    current = model._default_manager.filter(pk=pk).values_list(renditions_field, flat=True).first()
+    updated = model._default_manager.filter(pk=pk, **{field_name: name}).update(**updates)
+    if not updated:
+        delete_files(storage, renditions)
+        return None
+    if current:
+        delete_files(storage, current)
+    renditions_ready.send(sender=model, instance_pk=pk, field_name=field_name)
+    return renditions
+
+
+def render(image, name, storage):
+    """Encode every configured size and format of ``image`` into ``storage``"""
+    options = settings.IMAGE_PIPELINE
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    directory = posixpath.join(posixpath.dirname(name), 'renditions')
+    
+    renditions = {}
+    for label, spec in options['SIZES'].items():
+        size = tuple(spec['size'])
+        if spec.get('crop'):
+            resized = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail(size, Image.Resampling.LANCZOS)
+        rendition = {'width': resized.width, 'height': resized.height}
+        for fmt in supported_formats():
+            # A fresh encode carries no EXIF, XMP or ICC metadata over
+            buffer = BytesIO()
+            resized.save(buffer, fmt.upper(), quality=options['QUALITY'])
+            path = posixpath.join(directory, f'{stem}-{label}.{fmt}')
+            rendition[fmt] = storage.save(path, ContentFile(buffer.getvalue()))
+        renditions[label] = rendition
+    return renditions
+
+
+def delete_files(storage, renditions):
+    for label, rendition in renditions.items():
+        if label == 'source':
+            continue
+        for key, path in rendition.items():
+            if key not in ('width', 'height'):
+                storage.delete(path)
+
+
+def rendition_urls(renditions, build_url):
+    """Rendition URLs by size and format, plus a ``srcset`` string per format
+    
+    ``build_url(path)`` turns a stored path into the URL to render. Cropped
+    sizes (fixed-size thumbnails) have a different aspect ratio, so they are
+    left out of ``srcset``.
+    """
+    sizes = settings.IMAGE_PIPELINE['SIZES']
+    result = {}
+    srcset = {}
+    for label, rendition in (renditions or {}).items():
+        if label == 'source':
+            continue
+        entry = {'width': rendition['width'], 'height': rendition['height']}
+        for fmt, path in rendition.items():
+            if fmt in entry:
+                continue
+            entry[fmt] = build_url(path)
+            if not sizes.get(label, {}).get('crop'):
+                srcset.setdefault(fmt, []).append(f"{entry[fmt]} {rendition['width']}w")
+        result[label] = entry
+    if srcset:
+        result['srcset'] = {fmt: ', '.join(candidates) for fmt, candidates in srcset.items()}
+    return result
+
+
+class RenditionsField(serializers.ReadOnlyField):
+    """Renditions map of ``image_field`` rendered by ``rendition_urls``"""
+    
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        super().__init__(**kwargs)
+    
+    def to_representation(self, renditions):
+        storage = self.parent.Meta.model._meta.get_field(self.image_field).storage
+        request = self.context.get('request')
+        
+        def build_url(path):
+            url = storage.url(path)
+            return request.build_absolute_uri(url) if request is not None else url
+        return rendition_urls(renditions, build_url)
@@ -0,0 +1,331 @@
+"""
+Per-route request metrics, served in the Prometheus text format at /metrics.
+
+``MetricsMiddleware`` records, for each resolved URL name: wall time, SQL
+query count and SQL time, time spent in compiled serializers and in the JSON
+renderer, and response size. A request that runs the same SQL statement
+``DUPLICATE_THRESHOLD`` times or more is counted (and logged) as a likely
+N+1. The token cache's hit, miss, eviction and invalidation counts
+(``authentication.backends.TokenCache``) are exported alongside.
+
+Each thread records into its own shard, so the request path takes no locks.
+The shards are only added together when /metrics is scraped, and the shards
+of finished threads are folded into one total. Numbers are per process; the
+scraper adds processes up.
+
+/metrics is served to staff users and to the addresses in
+``BLOG_METRICS['ALLOWED_IPS']``.
+"""
+
+import bisect
+import contextvars
+import ipaddress
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+from authentication.backends import get_token_cache
+
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# name: (help, buckets)
+HISTOGRAMS = {
+    'blog_request_duration_seconds': ('Wall time of the request.', SECONDS_BUCKETS),
+    'blog_request_db_queries': ('SQL statements run by the request.', QUERY_BUCKETS),
+    'blog_request_db_seconds': ('Time spent running SQL.', SECONDS_BUCKETS),
+    'blog_request_serialize_seconds': ('Time spent in compiled serializers.', SECONDS_BUCKETS),
+    'blog_request_render_seconds': ('Time spent rendering JSON.', SECONDS_BUCKETS),
+    'blog_response_bytes': ('Size of non-streaming response bodies.', BYTES_BUCKETS),
+}
+COUNTERS = {
+    'blog_requests_total': 'Requests by route and status code.',
+    'blog_request_duplicate_queries_total': 'SQL statements that repeated one already run by the same request.',
+    'blog_request_n_plus_one_total': 'Requests that ran one SQL statement DUPLICATE_THRESHOLD times or more.',
+    'blog_token_cache_hits_total': 'Authentication tokens served from the token cache, by tier.',
+    'blog_token_cache_misses_total': 'Authentication tokens looked up in the database.',
+    'blog_token_cache_evictions_total': 'Tokens dropped from the local token cache to stay within MAX_SIZE.',
+    'blog_token_cache_invalidations_total': 'Tokens removed from the token cache by logouts and user changes.',
+}
+# Left out of duplicate detection
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+class Registry:
+    """Histograms and counters kept in one shard per thread"""
+    
+    def __init__(self):
+        self._local = threading.local()
+        # (thread, shard) for every thread that has recorded something
+        self._shards = []
+        # What finished threads recorded
+        self._retired = {}
+        # Only taken when a thread adds its shard and when collecting
+        self._lock = threading.Lock()
+    
+    def shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                # Servers may start a thread per connection; keep one shard per live thread
+                self._retire_finished()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+    
+    def _retire_finished(self):
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                add_values(self._retired, shard)
+        self._shards = live
+    
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        shard = self.shard()
+        entry = shard.get((name, labels))
+        if entry is None:
+            # A count per bucket (the last one is +Inf), then the sum
+            entry = shard[name, labels] = [0] * (len(buckets) + 1) + [0]
+        entry[bisect.bisect_left(buckets, value)] += 1
+        entry[-1] += value
+    
+    def inc(self, name, labels, amount=1):
+        shard = self.shard()
+        shard[name, labels] = shard.get((name, labels), 0) + amount
+    
+    def collect(self):
+        """``{(name, labels): value}`` summed over every shard"""
+        with self._lock:
+            self._retire_finished()
+            # dict.copy() runs under the GIL, so a shard never changes mid-copy
+            shards = [shard.copy() for _, shard in self._shards]
+            totals = add_values({}, self._retired)
+        for shard in shards:
+            add_values(totals, shard)
+        return totals
+    
+    def clear(self):
+        with self._lock:
+            for _, shard in self._shards:
+                shard.clear()
+            self._retired.clear()
+    
+    def render(self):
+        """The metrics in the Prometheus text exposition format"""
+        totals = {**self.collect(), **token_cache_totals()}
+        lines = []
+        for name, (help_text, buckets) in HISTOGRAMS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (metric, labels), entry in sorted(totals.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip((*buckets, '+Inf'), entry):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{format_labels(labels, le=bound)} {cumulative}')
+                lines.append(f'{name}_sum{format_labels(labels)} {entry[-1]:g}')
+                lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+        for name, help_text in COUNTERS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            lines.extend(
+                f'{name}{format_labels(labels)} {value}'
+                for (metric, labels), value in sorted(totals.items()) if metric == name
+            )
+        return '\n'.join(lines) + '\n'
+
+
+def add_values(totals, shard):
+    """Add the counters and histogram entries of ``shard`` into ``totals``; returns ``totals``"""
+    for key, value in shard.items():
+        if isinstance(value, list):
+            total = totals.setdefault(key, [0] * len(value))
+            for index, item in enumerate(value):
+                total[index] += item
+        else:
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def token_cache_totals():
+    """The token cache counts for itself; its numbers are read when scraped"""
+    stats = get_token_cache().stats()
+    return {
+        ('blog_token_cache_hits_total', (('tier', 'local'),)): stats['local_hits'],
+        ('blog_token_cache_hits_total', (('tier', 'shared'),)): stats['shared_hits'],
+        ('blog_token_cache_misses_total', ()): stats['misses'],
+        ('blog_token_cache_evictions_total', ()): stats['evictions'],
+        ('blog_token_cache_invalidations_total', ()): stats['invalidations'],
+    }
+
+
+def format_labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in pairs) + '}'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+
+
+class RequestMetrics:
+    """What one request has spent so far"""
+    __slots__ = ('queries', 'db_time', 'statements', 'phases')
+    
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = {}
+        self.phases = {}
+
+
+_current = contextvars.ContextVar('blog_request_metrics', default=None)
+
+
+@contextmanager
+def phase(name):
+    """Add the time spent in the block to the current request's ``name`` phase"""
+    current = _current.get()
+    if current is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.phases[name] = current.phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting and timing the current request's SQL"""
+    current = _current.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        current.db_time += time.perf_counter() - start
+        current.queries += 1
+        # Every transaction runs the same BEGIN; that is no N+1
+        if not (isinstance(sql, str) and sql.startswith(TRANSACTION_STATEMENTS)):
+            current.statements[sql] = current.statements.get(sql, 0) + 1
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # Connections are per thread; this also covers the async ORM's worker thread
+    install_query_recorder(connection)
+
+
+class MetricsMiddleware:
+    """Record per-route metrics for every request; put it first in MIDDLEWARE"""
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        if not settings.BLOG_METRICS['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.duplicate_threshold = settings.BLOG_METRICS['DUPLICATE_THRESHOLD']
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Connections opened before the first request never sent connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, metrics, time.perf_counter() - start)
+        return response
+    
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, metrics, time.perf_counter() - start)
+        return response
+    
+    def record(self, request, response, metrics, duration):
+        match = request.resolver_match
+        route = match.view_name if match is not None else 'unmatched'
+        if route == 'metrics':
+            return
+        labels = (('route', route),)
+        registry.inc('blog_requests_total', (*labels, ('status', response.status_code)))
+        registry.observe('blog_request_duration_seconds', labels, duration)
+        registry.observe('blog_request_db_queries', labels, metrics.queries)
+        registry.observe('blog_request_db_seconds', labels, metrics.db_time)
+        registry.observe('blog_request_serialize_seconds', labels, metrics.phases.get('serialize', 0.0))
+        registry.observe('blog_request_render_seconds', labels, metrics.phases.get('render', 0.0))
+        if not response.streaming:
+            registry.observe('blog_response_bytes', labels, len(response.content))
+        
+        duplicates = sum(count - 1 for count in metrics.statements.values())
+        if duplicates:
+            registry.inc('blog_request_duplicate_queries_total', labels, duplicates)
+            sql, count = max(metrics.statements.items(), key=lambda item: item[1])
+            if count >= self.duplicate_threshold:
+                registry.inc('blog_request_n_plus_one_total', labels)
+                logger.warning('Likely N+1 on %s: ran %d times: %s', route, count, sql)
+
+
+def may_scrape(request):
+    """Staff users, and the scrapers at ``BLOG_METRICS['ALLOWED_IPS']``"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.BLOG_METRICS['ALLOWED_IPS']
+    )
+
+
+def metrics_view(request):
+    """The process's metrics in the Prometheus text format"""
+    # Route names, latencies and token cache counts are not for everyone
+    if not may_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
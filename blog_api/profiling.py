@@ -0,0 +1,223 @@
+"""
+On-demand profiles of single API requests.
+
+A staff user asks for one by sending ``X-Blog-Profile: sample`` (or
+``cprofile``), or ``?_profile=sample``, to a view using
+``ProfiledViewMixin``. The view runs as usual, and rendering is included.
+The response names the saved file in its ``X-Blog-Profile`` header.
+
+* ``sample`` polls the request thread's stack every
+  ``BLOG_PROFILING['SAMPLE_INTERVAL']`` seconds from a helper thread. It
+  writes collapsed stacks (``.collapsed``), which speedscope and
+  flamegraph.pl read.
+* ``cprofile`` traces every call and writes pstats (``.prof``). It is exact
+  but slows the request down.
+
+Files go to ``BLOG_PROFILING['DIRECTORY']``, which keeps the newest
+``MAX_PROFILES`` files. ``manage.py request_profiles`` lists and diffs them.
+Requests that do not ask for a profile pay for one header lookup.
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+
+MODES = {'sample': '.collapsed', 'cprofile': '.prof'}
+
+
+def frame_name(code):
+    """``function (path:line)``, with paths relative to the project"""
+    return f'{code.co_name} ({relative_path(code.co_filename)}:{code.co_firstlineno})'
+
+
+def relative_path(filename):
+    try:
+        return os.path.relpath(filename, settings.BASE_DIR)
+    except ValueError:
+        return filename
+
+
+_switching = {'samplers': 0, 'saved': None}
+_switching_lock = threading.Lock()
+
+
+def switch_interval(interval, change):
+    """Let the sampler take the GIL every ``interval`` while any sampler runs
+    
+    Otherwise a busy request thread holds it for the default 5ms at a time,
+    and few samples get taken.
+    """
+    with _switching_lock:
+        _switching['samplers'] += change
+        if change > 0 and _switching['saved'] is None:
+            _switching['saved'] = sys.getswitchinterval()
+            sys.setswitchinterval(min(interval, _switching['saved']))
+        elif _switching['samplers'] == 0 and _switching['saved'] is not None:
+            sys.setswitchinterval(_switching['saved'])
+            _switching['saved'] = None
+
+
+class StackSampler:
+    """Counts the stacks of one thread, sampled from a helper thread"""
+    
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+    
+    def start(self):
+        switch_interval(self.interval, 1)
+        self._thread.start()
+    
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        switch_interval(self.interval, -1)
+    
+    def _run(self):
+        names = {}
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                if code not in names:
+                    names[code] = frame_name(code).replace(';', ':')
+                stack.append(names[code])
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+    
+    def write(self, path):
+        with open(path, 'w') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f'{stack} {count}\n')
+
+
+class CProfiler:
+    """cProfile with the same start/stop/write interface as ``StackSampler``"""
+    
+    def __init__(self):
+        self.profile = cProfile.Profile()
+    
+    def start(self):
+        self.profile.enable()
+    
+    def stop(self):
+        self.profile.disable()
+    
+    def write(self, path):
+        self.profile.dump_stats(path)
+
+
+def start_profiler(mode):
+    if mode == 'cprofile':
+        profiler = CProfiler()
+    else:
+        profiler = StackSampler(threading.get_ident(), settings.BLOG_PROFILING['SAMPLE_INTERVAL'])
+    profiler.start()
+    return profiler
+
+
+def profile_dir():
+    return Path(settings.BLOG_PROFILING['DIRECTORY'])
+
+
+def save_profile(profiler, mode, label):
+    """Write the profile to the ring buffer, drop the oldest beyond ``MAX_PROFILES``; returns the file name"""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f'{time.strftime("%Y%m%dT%H%M%S")}-{uuid.uuid4().hex[:6]}-{label}{MODES[mode]}'
+    # Write under a temporary name so listing never sees a partial file
+    partial = directory / f'.{name}'
+    profiler.write(partial)
+    os.replace(partial, directory / name)
+    for stale in list_profiles()[settings.BLOG_PROFILING['MAX_PROFILES']:]:
+        stale.unlink(missing_ok=True)
+    return name
+
+
+def list_profiles():
+    """Saved profiles, newest first"""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    paths = [path for path in directory.iterdir() if path.suffix in MODES.values() and not path.name.startswith('.')]
+    return sorted(paths, key=lambda path: (path.stat().st_mtime, path.name), reverse=True)
+
+
+def self_times(path):
+    """``{function: share of the profile}`` for the time spent in each function's own code"""
+    path = Path(path)
+    totals = Counter()
+    if path.suffix == MODES['cprofile']:
+        for (filename, line, function), (_, _, own, _, _) in pstats.Stats(str(path)).stats.items():
+            if filename == '~':
+                # Built-ins: cProfile records no file for them
+                totals[function] += own
+            else:
+                totals[f'{function} ({relative_path(filename)}:{line})'] += own
+    else:
+        with open(path) as file:
+            for line in file:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                totals[stack.rpartition(';')[2]] += int(count)
+    total = sum(totals.values())
+    return {function: value / total for function, value in totals.items()} if total else {}
+
+
+class ProfiledViewMixin:
+    """Profile the request when a staff user asks for it"""
+    profile_header = 'HTTP_X_BLOG_PROFILE'
+    profile_param = '_profile'
+    profiler = None
+    
+    def requested_profile(self, request):
+        mode = request.META.get(self.profile_header) or request.query_params.get(self.profile_param)
+        if mode not in MODES or not settings.BLOG_PROFILING['ENABLED']:
+            return None
+        return mode if request.user.is_staff else None
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # After authentication and permission checks, so only the view is profiled
+        mode = self.requested_profile(request)
+        if mode is not None:
+            self.profile_mode = mode
+            self.profiler = start_profiler(mode)
+    
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.profiler is not None:
+                # An exception escaped the view: nothing worth saving
+                self.profiler.stop()
+                self.profiler = None
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        profiler = self.profiler
+        if profiler is None:
+            return response
+        self.profiler = None
+        try:
+            if not getattr(response, 'is_rendered', True):
+                response.render()
+        finally:
+            profiler.stop()
+        match = request.resolver_match
+        label = match.view_name.replace(':', '.') if match is not None else 'view'
+        response['X-Blog-Profile'] = save_profile(profiler, self.profile_mode, label)
+        return response
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog_api.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -83,6 +84,12 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock at BEGIN. A deferred transaction that reads
+            # first fails with "database is locked" when a concurrent writer
+            # got there in between, instead of waiting for it
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
@@ -139,11 +146,16 @@ AUTH_USER_MODEL = 'authentication.User'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'authentication.backends.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        # JSONRenderer output, encoded with orjson when it is installed
+        'blog.renderers.BlogJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
@@ -152,6 +164,118 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Authenticated tokens kept in-process for TTL seconds. A revoked token stays
+# valid in other worker processes until then, so with more than one process
+# set SHARED_CACHE_ALIAS to a cache alias (e.g. Redis) they all read instead.
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,
+    'SHARED_CACHE_ALIAS': None,
+}
+
+# Versioned cache for anonymous GETs on the public blog endpoints
+BLOG_RESPONSE_CACHE = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+# Bulk create endpoints: items accepted per request, and rows per INSERT
+# (overridable per request with ?batch_size= up to MAX_BATCH_SIZE)
+BLOG_BULK = {
+    'MAX_ITEMS': 5000,
+    'BATCH_SIZE': 500,
+    'MAX_BATCH_SIZE': 2000,
+}
+
+# NDJSON export: rows fetched per round trip by QuerySet.iterator(), which
+# is also the number of lines written per chunk of the streamed response
+BLOG_EXPORT = {
+    'CHUNK_SIZE': 2000,
+}
+
+# Write-behind buffer for likes (blog.likes). Toggles are flushed to the
+# database every FLUSH_INTERVAL seconds (None: only by the flush_likes command)
+# in batches of BATCH_SIZE. Set SHARED_CACHE_ALIAS to a cache alias (e.g.
+# Redis) to share the buffer between worker processes.
+BLOG_LIKE_BUFFER = {
+    'ENABLED': False,
+    'FLUSH_INTERVAL': 1.0,
+    'BATCH_SIZE': 500,
+    'STATE_TTL': 300,
+    'SHARED_CACHE_ALIAS': None,
+}
+
+# Trending ordering (blog.trending): weight a like or comment adds to a post's
+# score, and the half-life in seconds applied by decay_trending_scores, which
+# drops scores that fall below MIN_SCORE
+BLOG_TRENDING = {
+    'LIKE_WEIGHT': 1.0,
+    'COMMENT_WEIGHT': 2.0,
+    'HALF_LIFE': 24 * 60 * 60,
+    'MIN_SCORE': 0.01,
+}
+
+# Per-route request metrics (blog_api.metrics), served at /metrics to staff
+# users and to the addresses or networks in ALLOWED_IPS (matched against
+# REMOTE_ADDR). A request that runs one SQL statement DUPLICATE_THRESHOLD
+# times or more is logged as a likely N+1.
+BLOG_METRICS = {
+    'ENABLED': True,
+    'DUPLICATE_THRESHOLD': 3,
+    'ALLOWED_IPS': ['127.0.0.1', '::1'],
+}
+
+# On-demand profiles of single requests (blog_api.profiling). Staff users send
+# X-Blog-Profile: sample|cprofile (or ?_profile=...); the newest MAX_PROFILES
+# files are kept in DIRECTORY.
+BLOG_PROFILING = {
+    'ENABLED': True,
+    'DIRECTORY': BASE_DIR / 'profiles',
+    'MAX_PROFILES': 50,
+    'SAMPLE_INTERVAL': 0.001,
+}
+
+# Limits checked by blog_api.uploads.ImageUploadHandler while the body streams
+# in. Dimensions are read from the first HEADER_LIMIT bytes of each file.
+IMAGE_UPLOADS = {
+    'CHUNK_SIZE': 64 * 1024,
+    'HEADER_LIMIT': 256 * 1024,
+    'MAX_SIZE': 10 * 1024 * 1024,
+    'MAX_REQUEST_SIZE': 12 * 1024 * 1024,
+    'MAX_DIMENSION': 8000,
+    'MAX_PIXELS': 40_000_000,
+    'FORMATS': ['JPEG', 'PNG', 'GIF', 'WEBP', 'AVIF'],
+}
+
+# Background processing of uploaded images (blog_api.images). EAGER runs it
+# inline on save, for tests. Formats the Pillow build cannot encode are skipped.
+IMAGE_PIPELINE = {
+    'ENABLED': True,
+    'EAGER': False,
+    'WORKERS': 2,
+    'FORMATS': ['avif', 'webp'],
+    'QUALITY': 80,
+    'SIZES': {
+        'thumbnail': {'size': (320, 320), 'crop': True},
+        'medium': {'size': (960, 960)},
+        'large': {'size': (1920, 1920)},
+    },
+}
+
+# Full-text search backend for blog posts (dotted path). When unset, one is
+# picked from the database vendor: SQLite FTS5 or PostgreSQL tsvector.
+BLOG_SEARCH_BACKEND = None
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development
 CORS_ALLOW_CREDENTIALS = True
@@ -0,0 +1,248 @@
+"""
+Streaming image uploads and content-addressed image storage.
+
+``ImageUploadHandler`` spools every uploaded file to disk in fixed-size
+chunks and never buffers a whole file in memory. It checks the magic bytes
+and the image dimensions as soon as the header has arrived, so a non-image
+or an oversized image is rejected before the rest of the body is read. It
+also hashes the content as it streams, and ``ContentAddressedStorage`` uses
+that digest to store identical files once.
+"""
+
+import hashlib
+import os
+import posixpath
+import warnings
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db.models import Q
+from django.http.multipartparser import MultiPartParserError
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+from PIL import Image
+
+
+# Leading bytes of every accepted format, as (offset, signature)
+SIGNATURES = {
+    'JPEG': [(0, b'\xff\xd8\xff')],
+    'PNG': [(0, b'\x89PNG\r\n\x1a\n')],
+    'GIF': [(0, b'GIF87a'), (0, b'GIF89a')],
+    'WEBP': [(8, b'WEBP')],
+    'AVIF': [(4, b'ftypavif'), (4, b'ftypavis')],
+}
+SIGNATURE_LENGTH = 12
+
+
+class ImageUploadRejected(MultiPartParserError):
+    """Raised while parsing the body; DRF turns it into a 400 response"""
+
+
+def sniff_format(header):
+    """Image format named by the magic bytes of ``header``, or None"""
+    for fmt, signatures in SIGNATURES.items():
+        for offset, signature in signatures:
+            if header[offset:offset + len(signature)] == signature:
+                return fmt
+    return None
+
+
+def read_dimensions(header):
+    """(width, height) from a partial file, or None until enough of it has arrived
+    
+    ``Image.open`` only parses the header; pixels are never decoded here.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+        try:
+            with Image.open(BytesIO(header)) as image:
+                return image.size
+        except Image.DecompressionBombError:
+            raise ImageUploadRejected('Image dimensions are too large.')
+        except Exception:
+            return None
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """Spool uploads to disk, validating the image header before reading the body"""
+    
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.options = settings.IMAGE_UPLOADS
+        self.chunk_size = self.options['CHUNK_SIZE']
+    
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Refuse a body that cannot fit before reading any of it
+        if content_length and content_length > self.options['MAX_REQUEST_SIZE']:
+            raise ImageUploadRejected('Request body is too large.')
+    
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+        )
+        self.hash = hashlib.sha256()
+        self.header = b''
+        self.image_format = None
+        self.dimensions = None
+    
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.options['MAX_SIZE']:
+            self.reject('Image file is too large.')
+        if self.dimensions is None:
+            self.header += raw_data
+            self.inspect_header()
+        self.hash.update(raw_data)
+        self.file.write(raw_data)
+        return None
+    
+    def inspect_header(self, complete=False):
+        if self.image_format is None:
+            if len(self.header) < SIGNATURE_LENGTH and not complete:
+                return
+            self.image_format = sniff_format(self.header)
+            if self.image_format not in self.options['FORMATS']:
+                self.reject('Upload a valid image. The file is not a supported image format.')
+        
+        self.dimensions = read_dimensions(self.header)
+        if self.dimensions is None:
+            if complete or len(self.header) > self.options['HEADER_LIMIT']:
+                self.reject('Upload a valid image. The image header could not be read.')
+            return
+        
+        width, height = self.dimensions
+        max_dimension = self.options['MAX_DIMENSION']
+        if width > max_dimension or height > max_dimension or width * height > self.options['MAX_PIXELS']:
+            self.reject('Image dimensions are too large.')
+        self.header = b''
+    
+    def file_complete(self, file_size):
+        if self.dimensions is None:
+            self.inspect_header(complete=True)
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.content_hash = self.hash.hexdigest()
+        self.file.image_format = self.image_format
+        return self.file
+    
+    def reject(self, message):
+        self.upload_interrupted()
+        raise ImageUploadRejected(message)
+    
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            temp_location = self.file.temporary_file_path()
+            try:
+                self.file.close()
+                os.remove(temp_location)
+            except FileNotFoundError:
+                pass
+
+
+class StreamingImageUploadMixin:
+    """Parse multipart bodies of the view with ``ImageUploadHandler``"""
+    
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [ImageUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Store files under the sha256 of their content, writing each distinct file once
+    
+    ``blog_images/photo.jpg`` is stored as ``blog_images/ab/abcdef....jpg``.
+    Several rows can point at one file, so ``delete`` leaves a file in place
+    while any row still holds its name.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        # Names are content digests, so a file already at the name (e.g. from
+        # a concurrent upload) holds the same bytes and may be overwritten
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(*args, **kwargs)
+    
+    def _save(self, name, content):
+        digest = getattr(content, 'content_hash', None) or self.hash_content(content)
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        name = posixpath.join(directory, digest[:2], digest + extension)
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
+    
+    def hash_content(self, content):
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        return digest.hexdigest()
+    
+    def delete(self, name):
+        if not self.is_referenced(name):
+            super().delete(name)
+    
+    @cached_property
+    def columns(self):
+        """``[(model, file field, renditions field or None)]`` for every file field stored here
+        
+        Renditions are looked for in the JSON field named after the file
+        field, as ``image_renditions`` next to ``image``.
+        """
+        found = []
+        for model in apps.get_models():
+            for field in model._meta.concrete_fields:
+                storage = getattr(field, 'storage', None)
+                if isinstance(storage, ContentAddressedStorage) and storage.location == self.location:
+                    renditions = f'{field.name}_renditions'
+                    try:
+                        model._meta.get_field(renditions)
+                    except FieldDoesNotExist:
+                        renditions = None
+                    found.append((model, field.name, renditions))
+        return found
+    
+    def is_referenced(self, name):
+        """Whether a row holds ``name`` as its file or as one of its renditions
+        
+        Renditions are matched by their key, i.e. the sizes in
+        ``IMAGE_PIPELINE['SIZES']`` in the format the extension names, so
+        each check is one exact-match query per model.
+        """
+        fmt = posixpath.splitext(name)[1][1:].lower()
+        for model, field_name, renditions in self.columns:
+            condition = Q(**{field_name: name})
+            if renditions is not None and fmt:
+                for label in settings.IMAGE_PIPELINE['SIZES']:
+                    condition |= Q(**{f'{renditions}__{label}__{fmt}': name})
+            if model._default_manager.filter(condition).exists():
+                return True
+        return False
+    
+    def referenced_names(self):
+        """Every name a row holds in the columns ``is_referenced`` looks at"""
+        names = set()
+        for model, field_name, renditions in self.columns:
+            fields = [field_name] if renditions is None else [field_name, renditions]
+            for row in model._default_manager.values_list(*fields).iterator():
+                for value in row:
+                    names.update(strings_in(value))
+        return names
+
+def strings_in(value):
+    """Every string in a JSON value, at any depth"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from strings_in(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from strings_in(item)